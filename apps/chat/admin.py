@@ -1,5 +1,7 @@
 from django.contrib import admin
+from apps.main.search import FullTextSearchAdminMixin
 from .models import Conversation, Message
+from .search import MESSAGE_FTS_TABLE, message_match_ids
 
 
 class MessageInline(admin.TabularInline):
@@ -23,10 +25,13 @@ class ConversationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
+class MessageAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ['conversation', 'sender', 'content_preview', 'sent_at', 'is_read']
     list_filter = ['is_read', 'sent_at', 'sender']
     search_fields = ['content', 'sender__username']
+    fts_table = MESSAGE_FTS_TABLE
+    fts_match = staticmethod(message_match_ids)
+    fts_extra_search_fields = ['sender__username']
     readonly_fields = ['conversation', 'sender', 'content', 'sent_at']
     
     def content_preview(self, obj):
@@ -0,0 +1,23 @@
+"""
+Channels authentication through the in-process user cache
+(see apps/main/authcache.py): a reconnecting client whose user is cached
+is authenticated without a database query or a thread hop.
+"""
+from channels.auth import AuthMiddleware, get_user
+from channels.sessions import CookieMiddleware, SessionMiddleware
+
+from apps.main import authcache
+
+
+class CachedAuthMiddleware(AuthMiddleware):
+    async def resolve_scope(self, scope):
+        session = scope['session']
+        user = authcache.cached_user(session.session_key)
+        if user is None:
+            user = await get_user(scope)
+            authcache.remember(session.session_key, user)
+        scope['user']._wrapped = user
+
+
+def CachedAuthMiddlewareStack(inner):
+    return CookieMiddleware(SessionMiddleware(CachedAuthMiddleware(inner)))
@@ -0,0 +1,113 @@
+"""
+permessage-deflate (RFC 7692) for the chat WebSocket.
+
+Daphne leaves Autobahn's compression off and does not expose its options.
+With ``WS_DEFLATE``, the ASGI entry points call ``install()`` before Daphne
+builds its factory. Daphne then uses ``DeflateWebSocketFactory``, which
+accepts the client's deflate offer as configured:
+
+- ``WS_DEFLATE_MIN_SIZE``: messages shorter than this many bytes are sent
+  uncompressed; on a single chat message the deflate overhead costs more
+  CPU than it saves bytes.
+- ``WS_DEFLATE_CONTEXT_TAKEOVER``: keep the compression window from one
+  message to the next. The JSON keys repeated by every chat message then
+  compress to a few bytes, at the price of keeping the zlib state of each
+  connection between messages.
+- ``WS_DEFLATE_MAX_MEMORY``: zlib memory per connection, in bytes. It
+  picks the window size and memory level of the server's compressor, and
+  the window requested from the client for its messages. Offers that
+  cannot fit in it are declined and the connection stays uncompressed.
+- ``WS_DEFLATE_MAX_MESSAGE_SIZE``: incoming messages inflating beyond this
+  many bytes close the connection (1009), so a small compressed frame
+  cannot expand into a huge one.
+
+The bench_ws_compression command measures bytes on the wire and CPU for
+each setting.
+"""
+import logging
+
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
+from daphne.ws_protocol import WebSocketFactory, WebSocketProtocol
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WINDOW_BITS = range(15, 8, -1)
+# zlib's inflate state, besides its window.
+INFLATE_STATE = 7 * 1024
+
+
+def deflate_memory(window_bits, mem_level, client_window_bits):
+    """zlib memory of a connection: deflate (zconf.h formula) plus inflate."""
+    return (1 << (window_bits + 2)) + (1 << (mem_level + 9)) + (1 << client_window_bits) + INFLATE_STATE
+
+
+def deflate_parameters(max_memory, max_window_bits=15, client_window_bits=None):
+    """
+    Largest ``(window_bits, mem_level, client_window_bits)`` within
+    ``max_memory``, or None. ``client_window_bits`` is fixed when the client
+    cannot be asked for a smaller window.
+    """
+    for window_bits in WINDOW_BITS:
+        if window_bits > max_window_bits:
+            continue
+        # zlib's default pairs a 15-bit window with memory level 8.
+        mem_level = max(1, min(8, window_bits - 7))
+        client_bits = client_window_bits or window_bits
+        if deflate_memory(window_bits, mem_level, client_bits) <= max_memory:
+            return window_bits, mem_level, client_bits
+    return None
+
+
+def accept_offer(offers):
+    """``perMessageCompressionAccept`` of the factory: the first deflate offer that fits the settings."""
+    for offer in offers:
+        if not isinstance(offer, PerMessageDeflateOffer):
+            continue
+        parameters = deflate_parameters(
+            settings.WS_DEFLATE_MAX_MEMORY,
+            offer.request_max_window_bits or 15,
+            None if offer.accept_max_window_bits else 15,
+        )
+        if parameters is None:
+            continue
+        window_bits, mem_level, client_window_bits = parameters
+        no_context_takeover = offer.request_no_context_takeover or not settings.WS_DEFLATE_CONTEXT_TAKEOVER
+        return PerMessageDeflateOfferAccept(
+            offer,
+            request_no_context_takeover=no_context_takeover and offer.accept_no_context_takeover,
+            request_max_window_bits=client_window_bits if offer.accept_max_window_bits else 0,
+            no_context_takeover=no_context_takeover,
+            window_bits=window_bits,
+            mem_level=mem_level,
+            # Inflate one byte past the limit at most: enough for the
+            # protocol to notice and close the connection.
+            max_message_size=settings.WS_DEFLATE_MAX_MESSAGE_SIZE + 1,
+        )
+    return None
+
+
+class DeflateWebSocketProtocol(WebSocketProtocol):
+    def sendMessage(self, payload, isBinary=False, fragmentSize=None, sync=False, doNotCompress=False):
+        doNotCompress = doNotCompress or len(payload) < settings.WS_DEFLATE_MIN_SIZE
+        return super().sendMessage(payload, isBinary, fragmentSize, sync, doNotCompress)
+
+
+class DeflateWebSocketFactory(WebSocketFactory):
+    protocol = DeflateWebSocketProtocol
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setProtocolOptions(
+            perMessageCompressionAccept=accept_offer,
+            maxMessagePayloadSize=settings.WS_DEFLATE_MAX_MESSAGE_SIZE,
+        )
+
+
+def install():
+    """Make Daphne serve WebSockets with permessage-deflate."""
+    import daphne.server
+
+    if deflate_parameters(settings.WS_DEFLATE_MAX_MEMORY) is None:
+        logger.warning("WS_DEFLATE_MAX_MEMORY=%d is too small for permessage-deflate", settings.WS_DEFLATE_MAX_MEMORY)
+    daphne.server.WebSocketFactory = DeflateWebSocketFactory
@@ -1,15 +1,41 @@
 import json
+import time
+
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import IntegrityError
+from .executor import chat_db, chat_db_write, save_message
 from .models import Conversation, Message
+from . import conversations, metrics, writebehind
+from .inbox import INBOX_GROUP, get_inbox_summary
+
+
+def conversation_group(conversation_id):
+    return f"chat_conversation_{conversation_id}"
+
+
+def message_frame(event):
+    """Text frame sent to the browser for a ``chat_message`` event."""
+    return json.dumps({
+        'message': event['message'],
+        'sender_id': event['sender_id'],
+        'sender_name': event['sender_name'],
+        'sender_is_admin': event['sender_is_admin'],
+        'message_id': event.get('message_id'),
+        'timestamp': event.get('timestamp'),
+        'conversation_id': event.get('conversation_id'),
+    })
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """
     WebSocket consumer for real-time chat between users and admin.
     - Users connect to their own conversation channel
-    - Admin connects to all conversations or specific conversation
+    - Admins subscribe to the conversations they display, and to the
+      rate-limited inbox summary (see inbox.py):
+      {"action": "subscribe" | "unsubscribe", "conversation_id": id}
+      {"action": "subscribe" | "unsubscribe", "stream": "inbox"}
     """
     
     async def connect(self):
@@ -17,48 +43,66 @@ class ChatConsumer(AsyncWebsocketConsumer):
         
         # Reject connection if user is not authenticated
         if not self.user.is_authenticated:
+            if metrics.metrics_enabled():
+                metrics.ws_rejections.inc()
             await self.close()
             return
         
-        # Determine the group name based on user role
-        if self.user.is_staff or self.user.is_superuser:
-            # Admin joins the admin group (receives all messages)
-            self.group_name = "chat_admin"
-            await self.channel_layer.group_add(
-                self.group_name,
-                self.channel_name
-            )
-        else:
+        self.role = metrics.role_of(self.user)
+        self.subscriptions = set()
+        
+        if not self.is_admin:
             # Regular user joins their specific conversation group
-            self.conversation = await self.get_or_create_conversation()
-            self.group_name = f"chat_conversation_{self.conversation.id}"
-            await self.channel_layer.group_add(
-                self.group_name,
-                self.channel_name
-            )
+            self.conversation_id = None
+            await self.resolve_conversation()
         
         await self.accept()
+        if metrics.metrics_enabled():
+            metrics.ws_connections.inc(role=self.role)
+            metrics.ws_open.inc(role=self.role)
     
     async def disconnect(self, close_code):
-        # Leave the group
-        if hasattr(self, 'group_name'):
-            await self.channel_layer.group_discard(
-                self.group_name,
-                self.channel_name
-            )
+        # Leave the groups
+        if hasattr(self, 'subscriptions'):
+            for group in self.subscriptions:
+                await self.channel_layer.group_discard(group, self.channel_name)
+            if metrics.metrics_enabled():
+                metrics.ws_disconnections.inc(role=self.role)
+                metrics.ws_open.dec(role=self.role)
+    
+    @property
+    def is_admin(self):
+        return self.user.is_staff or self.user.is_superuser
+    
+    async def join(self, group):
+        if group not in self.subscriptions:
+            self.subscriptions.add(group)
+            await self.channel_layer.group_add(group, self.channel_name)
+    
+    async def leave(self, group):
+        if group in self.subscriptions:
+            self.subscriptions.discard(group)
+            await self.channel_layer.group_discard(group, self.channel_name)
     
     async def receive(self, text_data):
         """
         Receive message from WebSocket.
-        Expected format: {"message": "content", "conversation_id": id (for admin)}
+        Expected format: {"message": "content", "conversation_id": id (for admin)},
+        or a subscription command from an admin.
         """
+        if metrics.metrics_enabled():
+            metrics.ws_frames.inc(role=self.role)
         data = json.loads(text_data)
+        if data.get('action') in ('subscribe', 'unsubscribe'):
+            if self.is_admin:
+                await self.update_subscription(data)
+            return
         message_content = data.get('message', '').strip()
         
         if not message_content:
             return
         
-        if self.user.is_staff or self.user.is_superuser:
+        if self.is_admin:
             # Admin sending message to a specific user
             conversation_id = data.get('conversation_id')
             if conversation_id:
@@ -67,38 +111,48 @@ class ChatConsumer(AsyncWebsocketConsumer):
             # User sending message to admin
             await self.send_user_message(message_content)
     
+    async def update_subscription(self, data):
+        """Join or leave a conversation group or the inbox stream, then acknowledge it."""
+        action = data['action']
+        if data.get('stream') == 'inbox':
+            group, target = INBOX_GROUP, {'stream': 'inbox'}
+        else:
+            try:
+                conversation_id = int(data.get('conversation_id'))
+            except (TypeError, ValueError):
+                return
+            group, target = conversation_group(conversation_id), {'conversation_id': conversation_id}
+        await (self.join(group) if action == 'subscribe' else self.leave(group))
+        await self.send(text_data=json.dumps({'type': f'{action}d', **target}))
+    
+    async def resolve_conversation(self):
+        """
+        Join the group of the user's conversation. The id usually comes from
+        the in-process cache (no query on reconnect); once the entry expires
+        or is forgotten, a conversation recreated elsewhere is picked up here.
+        """
+        conversation_id = conversations.cached_id(self.user.id)
+        if conversation_id is None:
+            conversation_id = await self.get_conversation_id() or await self.create_conversation()
+            conversations.remember(self.user.id, conversation_id)
+        if conversation_id != self.conversation_id:
+            if self.conversation_id is not None:
+                await self.leave(conversation_group(self.conversation_id))
+            self.conversation_id = conversation_id
+            await self.join(conversation_group(conversation_id))
+        return conversation_id
+    
     async def send_user_message(self, content):
         """User sends message to admin"""
-        message = await self.create_message(self.conversation.id, self.user.id, content)
-        
-        # Send message to user's conversation group (so user sees their message)
-        await self.channel_layer.group_send(
-            self.group_name,
-            {
-                'type': 'chat_message',
-                'message': content,
-                'sender_id': self.user.id,
-                'sender_name': self.user.username,
-                'sender_is_admin': False,
-                'message_id': message.id,
-                'timestamp': str(message.sent_at),
-            }
-        )
-        
-        # Also send to admin group
-        await self.channel_layer.group_send(
-            "chat_admin",
-            {
-                'type': 'chat_message',
-                'message': content,
-                'sender_id': self.user.id,
-                'sender_name': self.user.username,
-                'sender_is_admin': False,
-                'conversation_id': self.conversation.id,
-                'message_id': message.id,
-                'timestamp': str(message.sent_at),
-            }
-        )
+        conversation_id = await self.resolve_conversation()
+        try:
+            message = await self.create_message(conversation_id, self.user.id, content)
+        except (IntegrityError, Conversation.DoesNotExist):
+            # Stale cached id: the conversation was deleted by another process
+            conversations.forget(self.user.id)
+            conversation_id = await self.resolve_conversation()
+            message = await self.create_message(conversation_id, self.user.id, content)
+        await self.broadcast(conversation_id, message, content, sender_is_admin=False)
     
     async def send_admin_message(self, conversation_id, content):
         """Admin sends message to a specific user"""
@@ -106,67 +160,72 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if not conversation:
             return
         
-        message = await self.create_message(conversation_id, self.user.id, content)
-        
-        # Send to the specific conversation group (for the user)
-        group_name = f"chat_conversation_{conversation_id}"
+        message = await self.create_message(conversation.id, self.user.id, content)
+        await self.broadcast(conversation.id, message, content, sender_is_admin=True)
+    
+    async def broadcast(self, conversation_id, message, content, sender_is_admin):
+        """
+        Send a message to the conversation group (its user and the admin
+        sockets subscribed to it) and note it for the inbox summary.
+        """
         await self.channel_layer.group_send(
-            group_name,
+            conversation_group(conversation_id),
             {
                 'type': 'chat_message',
                 'message': content,
                 'sender_id': self.user.id,
                 'sender_name': self.user.username,
-                'sender_is_admin': True,
-                'message_id': message.id,
-                'timestamp': str(message.sent_at),
+                'sender_is_admin': sender_is_admin,
                 'conversation_id': conversation_id,
-            }
-        )
-        
-        # Also send back to admin group so admin sees their own message
-        await self.channel_layer.group_send(
-            "chat_admin",
-            {
-                'type': 'chat_message',
-                'message': content,
-                'sender_id': self.user.id,
-                'sender_name': self.user.username,
-                'sender_is_admin': True,
                 'message_id': message.id,
                 'timestamp': str(message.sent_at),
-                'conversation_id': conversation_id,
+                'sent_ts': time.time(),
             }
         )
+        get_inbox_summary().note(conversation_id)
     
     async def chat_message(self, event):
         """
         Receive message from channel layer and send to WebSocket.
         """
-        await self.send(text_data=json.dumps({
-            'message': event['message'],
-            'sender_id': event['sender_id'],
-            'sender_name': event['sender_name'],
-            'sender_is_admin': event['sender_is_admin'],
-            'message_id': event.get('message_id'),
-            'timestamp': event.get('timestamp'),
-            'conversation_id': event.get('conversation_id'),
-        }))
-    
-    @database_sync_to_async
-    def get_or_create_conversation(self):
+        metrics.observe_fanout(event, self.role)
+        await self.send(text_data=message_frame(event))
+    
+    async def inbox_summary(self, event):
+        """New messages per conversation since the previous summary (admins only)."""
+        metrics.observe_fanout(event, self.role)
+        await self.send(text_data=json.dumps({'type': 'inbox', 'conversations': event['conversations']}))
+    
+    @metrics.observe_db_call
+    @chat_db
+    def get_conversation_id(self):
+        return Conversation.objects.filter(user=self.user).values_list('id', flat=True).first()
+
+    @metrics.observe_db_call
+    @chat_db_write
+    def create_conversation(self):
+        """Conversations are created with their user; this covers staff members turned regular users."""
         conversation, _ = Conversation.objects.get_or_create(user=self.user)
-        return conversation
+        return conversation.id
     
-    @database_sync_to_async
+    @metrics.observe_db_call
+    @chat_db
     def get_conversation(self, conversation_id):
         try:
             return Conversation.objects.get(id=conversation_id)
         except Conversation.DoesNotExist:
             return None
     
-    @database_sync_to_async
-    def create_message(self, conversation_id, sender_id, content):
+    @metrics.observe_db_call
+    async def create_message(self, conversation_id, sender_id, content):
+        if settings.CHAT_WRITE_BEHIND:
+            return writebehind.append(conversation_id, sender_id, content)
+        if settings.CHAT_COALESCE_WRITES:
+            return await save_message(conversation_id, sender_id, content)
+        return await self.insert_message(conversation_id, sender_id, content)
+
+    @chat_db_write
+    def insert_message(self, conversation_id, sender_id, content):
         conversation = Conversation.objects.get(id=conversation_id)
         sender = User.objects.get(id=sender_id)
         message = Message.objects.create(
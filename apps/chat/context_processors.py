@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def chat(request):
+    """Where the chat pages open their WebSocket (see CHAT_WS_URL)."""
+    return {'chat_ws_url': settings.CHAT_WS_URL}
@@ -0,0 +1,43 @@
+"""
+Conversation id of each user, cached in process for the WebSocket connect path.
+
+Every non-staff user gets a conversation when created (see signals.py and
+migration 0005), and a conversation never changes owner: once known, the
+id of a user's conversation stays valid until the conversation is
+deleted. ``ChatConsumer`` thus joins the group of a reconnecting user
+without a database query. A deletion drops the entry in the process that
+performs it; other processes keep it for at most
+``CHAT_CONVERSATION_CACHE_SECONDS``, and forget it as soon as a message
+fails to be stored under the stale id.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+_ids = {}
+_lock = threading.Lock()
+
+
+def cached_id(user_id):
+    entry = _ids.get(user_id)
+    if entry is None or entry[1] < time.monotonic():
+        return None
+    return entry[0]
+
+
+def remember(user_id, conversation_id):
+    with _lock:
+        if user_id not in _ids and len(_ids) >= settings.CHAT_CONVERSATION_CACHE_SIZE:
+            del _ids[next(iter(_ids))]
+        _ids[user_id] = (conversation_id, time.monotonic() + settings.CHAT_CONVERSATION_CACHE_SECONDS)
+
+
+def forget(user_id):
+    with _lock:
+        _ids.pop(user_id, None)
+
+
+def clear():
+    with _lock:
+        _ids.clear()
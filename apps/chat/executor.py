@@ -0,0 +1,238 @@
+"""
+Dedicated thread pool for the chat consumer's database work.
+
+``database_sync_to_async`` runs every call of every socket on asgiref's
+executor and opens and closes a connection around each one, so a burst of
+connects thrashes both. ``@chat_db`` runs the call on a fixed pool of
+``CHAT_DB_THREADS`` threads instead; each keeps its own connection for
+``CHAT_DB_CONN_MAX_AGE`` seconds, and at most ``CHAT_DB_MAX_PENDING`` calls
+wait for a thread (callers beyond that wait before queueing). SQLite has a
+single writer: ``@chat_db_write`` calls take a process-wide lock rather than
+failing or spinning on the busy timeout when they collide.
+
+With ``CHAT_COALESCE_WRITES`` new messages are inserted by a single writer
+thread, up to ``CHAT_WRITE_BATCH_SIZE`` per transaction: SQLite takes one
+write lock per batch instead of one per message.
+"""
+import asyncio
+import contextvars
+import functools
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import metrics
+
+write_lock = threading.Lock()
+
+
+def prepare_connections():
+    """Drop connections that are broken or past their lifetime (like close_old_connections)."""
+    for connection in connections.all(initialized_only=True):
+        connection.close_if_unusable_or_obsolete()
+
+
+def keep_new_connections(max_age):
+    """
+    Give connections opened by the call that just ran the pool's lifetime
+    instead of the CONN_MAX_AGE of the process role, then drop the obsolete ones.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.connection is not None and getattr(connection, 'chat_pool_connection', None) is not connection.connection:
+            connection.chat_pool_connection = connection.connection
+            connection.close_at = None if max_age is None else time.monotonic() + max_age
+        connection.close_if_unusable_or_obsolete()
+
+
+class DatabasePool:
+    """Fixed-size thread pool with a bounded queue and queue-depth metrics."""
+
+    def __init__(self, threads, max_pending, conn_max_age):
+        self.threads = threads
+        self.max_pending = max_pending
+        self.conn_max_age = conn_max_age
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='chat-db')
+        # Admission semaphores are bound to an event loop: one per loop.
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.pending = 0
+        self.busy = 0
+        self.lock = threading.Lock()
+
+    def semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(self.max_pending + self.threads)
+        return semaphore
+
+    def _count(self, pending=0, busy=0):
+        with self.lock:
+            self.pending += pending
+            self.busy += busy
+            if metrics.metrics_enabled():
+                metrics.db_pool_queue_depth.set(self.pending)
+                metrics.db_pool_busy_threads.set(self.busy)
+
+    def _run(self, func, args, kwargs, queued_at, write):
+        self._count(pending=-1, busy=1)
+        if metrics.metrics_enabled():
+            metrics.db_pool_wait.observe(time.perf_counter() - queued_at)
+        prepare_connections()
+        try:
+            if write:
+                with write_lock:
+                    return func(*args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            keep_new_connections(self.conn_max_age)
+            self._count(busy=-1)
+
+    async def call(self, func, args, kwargs, write=False):
+        async with self.semaphore():
+            self._count(pending=1)
+            context = contextvars.copy_context()
+            call = functools.partial(context.run, self._run, func, args, kwargs, time.perf_counter(), write)
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def run(self, func, *args, **kwargs):
+        return await self.call(func, args, kwargs)
+
+    async def run_write(self, func, *args, **kwargs):
+        return await self.call(func, args, kwargs, write=True)
+
+
+class MessageWriter:
+    """Single thread inserting queued messages in batches, one transaction each."""
+    thread_name = 'chat-db-writer'
+
+    def __init__(self, batch_size, window, conn_max_age):
+        self.batch_size = batch_size
+        self.window = window
+        self.conn_max_age = conn_max_age
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.loop, name=self.thread_name, daemon=True)
+        self.thread.start()
+
+    def submit(self, conversation_id, sender_id, content):
+        """Queue a message; returns a future resolved with the saved Message."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.put((loop, future, (conversation_id, sender_id, content)))
+        return future
+
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get(timeout=max(0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return batch
+
+    def loop(self):
+        while True:
+            batch = self.next_batch()
+            prepare_connections()
+            try:
+                results = self.write_batch([item for _, _, item in batch])
+            finally:
+                keep_new_connections(self.conn_max_age)
+            self.written(batch, results)
+
+    def written(self, batch, results):
+        """Hand each result to the coroutine waiting for it."""
+        for (loop, future, _), result in zip(batch, results):
+            failed = isinstance(result, Exception)
+            try:
+                loop.call_soon_threadsafe(self.resolve, future, None if failed else result, result if failed else None)
+            except RuntimeError:
+                pass  # The sender's event loop is closed.
+
+    def write_batch(self, items):
+        """Saved messages (or the exception raised for them), in order."""
+        try:
+            return self.write(items)
+        except Exception as exc:
+            if len(items) == 1:
+                return [exc]
+        # Retry one by one so a bad message does not fail the others.
+        return [self.write_batch([item])[0] for item in items]
+
+    @staticmethod
+    def resolve(future, result, exc):
+        if future.cancelled():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+    @staticmethod
+    def write(items):
+        """Insert ``(conversation_id, sender_id, content)`` tuples in one transaction."""
+        from .models import Conversation, Message
+
+        messages = [
+            Message(conversation_id=conversation_id, sender_id=sender_id, content=content)
+            for conversation_id, sender_id, content in items
+        ]
+        with write_lock, transaction.atomic():
+            Message.objects.bulk_create(messages)
+            # What Message.save() does for each message, once per conversation.
+            Conversation.objects.filter(id__in={m.conversation_id for m in messages}).update(
+                last_message_at=timezone.now(),
+            )
+        if metrics.metrics_enabled():
+            metrics.db_write_batch_size.observe(len(messages))
+        return messages
+
+
+_pool = None
+_writer = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = DatabasePool(settings.CHAT_DB_THREADS, settings.CHAT_DB_MAX_PENDING, settings.CHAT_DB_CONN_MAX_AGE)
+        return _pool
+
+
+def get_writer():
+    global _writer
+    with _lock:
+        if _writer is None:
+            _writer = MessageWriter(
+                settings.CHAT_WRITE_BATCH_SIZE, settings.CHAT_WRITE_BATCH_WINDOW, settings.CHAT_DB_CONN_MAX_AGE,
+            )
+        return _writer
+
+
+def chat_db(func):
+    """Run a sync function on the chat database pool; the wrapper is a coroutine function."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await get_pool().run(func, *args, **kwargs)
+    return wrapper
+
+
+def chat_db_write(func):
+    """Like ``chat_db`` for functions writing to the database, one at a time per process."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await get_pool().run_write(func, *args, **kwargs)
+    return wrapper
+
+
+async def save_message(conversation_id, sender_id, content):
+    """Insert a message through the writer thread (see CHAT_COALESCE_WRITES)."""
+    return await get_writer().submit(conversation_id, sender_id, content)
@@ -0,0 +1,62 @@
+"""
+Inbox summary stream for the admins.
+
+Admin sockets no longer receive every message: they subscribe to the
+conversations they display, and the inbox page subscribes to this stream.
+Instead of one event per message, each process sends the ``chat_inbox``
+group at most one summary every ``CHAT_INBOX_INTERVAL`` seconds: the
+number of new messages per conversation since the previous summary. The
+first message after a quiet period goes out at once; a burst costs one
+event per interval and per admin socket, however many messages it holds.
+"""
+import asyncio
+import time
+import weakref
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+INBOX_GROUP = 'chat_inbox'
+
+
+class InboxSummary:
+    """Coalesces the conversations with new messages into rate-limited summaries."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.pending = {}
+        self.flushing = None
+        self.last_sent = float('-inf')
+
+    def note(self, conversation_id):
+        self.pending[conversation_id] = self.pending.get(conversation_id, 0) + 1
+        if self.flushing is None:
+            self.flushing = asyncio.ensure_future(self.flush())
+
+    async def flush(self):
+        try:
+            delay = self.last_sent + self.interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            pending, self.pending = self.pending, {}
+            self.last_sent = time.monotonic()
+        finally:
+            # Messages noted from now on go to the next summary.
+            self.flushing = None
+        await get_channel_layer().group_send(INBOX_GROUP, {
+            'type': 'inbox_summary',
+            'conversations': {str(conversation_id): count for conversation_id, count in pending.items()},
+            'sent_ts': time.time(),
+        })
+
+
+_summaries = weakref.WeakKeyDictionary()
+
+
+def get_inbox_summary():
+    """The summary of the running event loop (one per process in production)."""
+    loop = asyncio.get_running_loop()
+    summary = _summaries.get(loop)
+    if summary is None:
+        summary = _summaries[loop] = InboxSummary(settings.CHAT_INBOX_INTERVAL)
+    return summary
@@ -0,0 +1,327 @@
+"""
+Load-testing harness for the chat WebSocket.
+
+Simulates N users plus M admin tabs sending at a configurable rate and
+measures throughput, delivery latency, DB writes per message and memory
+per connection. Clients are either in-process ``WebsocketCommunicator``
+instances or real sockets against a running Daphne.
+"""
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from importlib import import_module
+from urllib.parse import urlparse
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.utils import timezone
+
+from apps.main.benchmarking import summarize
+from .routing import websocket_urlpatterns
+
+BENCH_PREFIX = 'bench_'
+
+
+def session_key_for(user, engine=None):
+    """Create a logged-in session for ``user`` (``SESSION_ENGINE`` by default) and return its key."""
+    session = import_module(engine or settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()  # creates the row, or signs the cookie
+    return session.session_key
+
+
+class BenchAccounts:
+    """
+    Users created for a benchmark run against the configured database, named
+    ``bench_<run>_<name>`` so they never clash with existing accounts.
+    ``delete()`` removes them and their sessions (those made with
+    ``session_key()`` and those opened by logging in), and nothing else.
+    """
+
+    def __init__(self):
+        self.run = uuid.uuid4().hex[:8]
+        # Sessions created from now on expire after this.
+        self.started = timezone.now() - timedelta(seconds=1)
+        self.user_ids = []
+
+    def user(self, name, **kwargs):
+        from django.contrib.auth.models import User
+
+        user = User.objects.create_user(f'{BENCH_PREFIX}{self.run}_{name}', **kwargs)
+        self.user_ids.append(user.pk)
+        return user
+
+    def users(self, count, name='user', **kwargs):
+        return [self.user(f'{name}_{i}', **kwargs) for i in range(count)]
+
+    def delete(self):
+        from django.contrib.auth.models import User
+        from django.contrib.sessions.models import Session
+
+        # Signed-cookie sessions store nothing; db and cached_db use this table.
+        user_ids = {str(pk) for pk in self.user_ids}
+        recent = Session.objects.filter(expire_date__gte=self.started + timedelta(seconds=settings.SESSION_COOKIE_AGE))
+        Session.objects.filter(
+            pk__in=[session.pk for session in recent.iterator() if session.get_decoded().get(SESSION_KEY) in user_ids],
+        ).delete()
+        User.objects.filter(pk__in=self.user_ids).delete()
+        self.user_ids = []
+
+
+def conversation_ids_for(users):
+    """Conversation id of each of ``users``, in order."""
+    from .models import Conversation
+
+    return [Conversation.objects.get_or_create(user=user)[0].id for user in users]
+
+
+def wait_for_port(host, port, timeout=15.0):
+    """Wait until a server accepts connections on ``host:port``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Nothing is listening on {host}:{port}")
+
+
+class CommunicatorClient:
+    """In-process client driving the consumer through WebsocketCommunicator."""
+    application = URLRouter(websocket_urlpatterns)
+
+    def __init__(self, user):
+        self.communicator = WebsocketCommunicator(self.application, '/ws/chat/')
+        self.communicator.scope['user'] = user
+
+    async def connect(self):
+        connected, _ = await self.communicator.connect()
+        if not connected:
+            raise RuntimeError("WebSocket connection refused")
+
+    async def send(self, data):
+        await self.communicator.send_json_to(data)
+
+    async def receive(self, timeout):
+        return await self.communicator.receive_json_from(timeout=timeout)
+
+    async def close(self):
+        await self.communicator.disconnect()
+
+
+class SocketClient:
+    """
+    Minimal asyncio WebSocket client (RFC 6455 text frames) authenticated by
+    session cookie. Autobahn's asyncio flavour cannot be used in-process
+    since Daphne already selected Twisted for txaio.
+    """
+
+    def __init__(self, url, session_key):
+        self.url = urlparse(url)
+        self.session_key = session_key
+
+    async def connect(self):
+        host, port = self.url.hostname, self.url.port or 80
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f"GET {self.url.path or '/'} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n"
+            f"Cookie: sessionid={self.session_key}\r\n"
+            "\r\n"
+        ).encode())
+        await self.writer.drain()
+        response = await self.reader.readuntil(b'\r\n\r\n')
+        if not response.startswith(b'HTTP/1.1 101'):
+            raise RuntimeError(f"WebSocket handshake failed: {response.splitlines()[0]!r}")
+
+    def _frame(self, opcode, payload):
+        mask = os.urandom(4)
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return header + mask + masked
+
+    async def send(self, data):
+        self.writer.write(self._frame(0x1, json.dumps(data).encode('utf-8')))
+        await self.writer.drain()
+
+    async def _read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', await self.reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await self.reader.readexactly(8))
+        return first & 0x0F, await self.reader.readexactly(length)
+
+    async def receive(self, timeout):
+        while True:
+            opcode, payload = await asyncio.wait_for(self._read_frame(), timeout)
+            if opcode == 0x1:
+                return json.loads(payload.decode('utf-8'))
+            if opcode == 0x9:
+                self.writer.write(self._frame(0xA, payload))
+            elif opcode == 0x8:
+                raise ConnectionError("WebSocket closed by server")
+
+    async def close(self):
+        try:
+            self.writer.write(self._frame(0x8, struct.pack('!H', 1000)))
+            await self.writer.drain()
+        except ConnectionError:
+            pass
+        self.writer.close()
+
+
+class Scenario:
+    """
+    N users each send ``messages`` messages at ``rate`` msg/s (0 = as fast
+    as possible) while M admin tabs are connected, each subscribed to the
+    inbox summary and to ``admin_watch`` of the users' ``conversation_ids``.
+    Every message should be delivered to its sender and to every admin tab
+    watching its conversation.
+    """
+
+    def __init__(self, users, admin_tabs, messages, rate, timeout=30.0, conversation_ids=(), admin_watch=1):
+        self.users = users
+        self.admin_tabs = admin_tabs
+        self.messages = messages
+        self.rate = rate
+        self.timeout = timeout
+        watch = min(admin_watch, len(conversation_ids))
+        self.watched = [
+            [conversation_ids[(tab * watch + offset) % len(conversation_ids)] for offset in range(watch)]
+            for tab in range(len(admin_tabs))
+        ]
+        self.latencies = []
+        self.delivered = 0
+        self.summaries = 0
+
+    @property
+    def expected_deliveries(self):
+        return self.messages * (len(self.users) + sum(len(watched) for watched in self.watched))
+
+    async def _subscribe(self, client, watched):
+        commands = [{'action': 'subscribe', 'stream': 'inbox'}]
+        commands += [{'action': 'subscribe', 'conversation_id': conversation_id} for conversation_id in watched]
+        for command in commands:
+            await client.send(command)
+        for _ in commands:
+            await client.receive(timeout=self.timeout)
+
+    async def _reader(self, client, done):
+        # No short receive timeouts: WebsocketCommunicator cancels the
+        # application when one expires. Readers are cancelled at the end.
+        while True:
+            event = await client.receive(timeout=3600)
+            if event.get('type') == 'inbox':
+                self.summaries += 1
+                continue
+            content = event.get('message', '')
+            if not content.startswith('bench|'):
+                continue
+            self.latencies.append(time.perf_counter() - float(content.split('|')[3]))
+            self.delivered += 1
+            if self.delivered >= self.expected_deliveries:
+                done.set()
+
+    async def _sender(self, index, client):
+        interval = 1.0 / self.rate if self.rate else 0
+        for seq in range(self.messages):
+            await client.send({'message': f'bench|{index}|{seq}|{time.perf_counter()!r}'})
+            await asyncio.sleep(interval)
+
+    async def run(self, measure_memory=False):
+        clients = self.admin_tabs + self.users
+
+        if measure_memory:
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        connect_start = time.perf_counter()
+        for client in clients:
+            await client.connect()
+        connect_time = time.perf_counter() - connect_start
+        for client, watched in zip(self.admin_tabs, self.watched):
+            await self._subscribe(client, watched)
+        memory_per_connection = None
+        if measure_memory:
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            grown = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+            memory_per_connection = grown / len(clients)
+
+        done = asyncio.Event()
+        readers = [asyncio.ensure_future(self._reader(client, done)) for client in clients]
+        start = time.perf_counter()
+        await asyncio.gather(*(self._sender(i, client) for i, client in enumerate(self.users)))
+        sent_time = time.perf_counter() - start
+        try:
+            await asyncio.wait_for(done.wait(), self.timeout)
+        except (asyncio.TimeoutError, TimeoutError):
+            pass
+        elapsed = time.perf_counter() - start
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+        for client in clients:
+            await client.close()
+
+        sent = len(self.users) * self.messages
+        return {
+            'connections': len(clients),
+            'connect_seconds': round(connect_time, 4),
+            'messages_sent': sent,
+            'deliveries_expected': self.expected_deliveries,
+            'deliveries': self.delivered,
+            'send_seconds': round(sent_time, 4),
+            'elapsed_seconds': round(elapsed, 4),
+            'messages_per_second': round(sent / elapsed, 1) if elapsed else None,
+            'deliveries_per_second': round(self.delivered / elapsed, 1) if elapsed else None,
+            'inbox_summaries': self.summaries,
+            'delivery_latency': summarize(self.latencies),
+            'memory_per_connection_bytes': round(memory_per_connection) if memory_per_connection else None,
+        }
+
+
+async def reconnect_storm(url, session_keys, rounds):
+    """
+    Every session connects at once, then all drop and reconnect, ``rounds``
+    times: the handshake latencies and failures of each round.
+    """
+    async def handshake(client):
+        start = time.perf_counter()
+        await client.connect()
+        return time.perf_counter() - start
+
+    results = []
+    for _ in range(rounds):
+        clients = [SocketClient(url, key) for key in session_keys]
+        outcomes = await asyncio.gather(*(handshake(client) for client in clients), return_exceptions=True)
+        latencies = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        for client, outcome in zip(clients, outcomes):
+            if not isinstance(outcome, BaseException):
+                await client.close()
+        results.append({'latencies': latencies, 'failed': len(outcomes) - len(latencies)})
+    return results
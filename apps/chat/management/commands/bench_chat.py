@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from apps.chat.loadtest import (
+    BENCH_PREFIX, BenchAccounts, CommunicatorClient, Scenario, SocketClient, conversation_ids_for, session_key_for,
+    wait_for_port,
+)
+from apps.main.benchmarking import QueryCounter, format_summary, write_json
+
+
+def rss_bytes(pid):
+    """Resident set size of ``pid`` (Linux only)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the chat WebSocket with N users and M admin tabs. "
+        "By default clients are in-process WebsocketCommunicators against a "
+        "throwaway test database; --url/--spawn-daphne use real sockets "
+        "against the configured database (bench_* users are removed afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Concurrent user sockets")
+        parser.add_argument('--admin-tabs', type=int, default=2, help="Concurrent admin sockets")
+        parser.add_argument('--admin-watch', type=int, default=1, help="Conversations each admin tab subscribes to")
+        parser.add_argument('--messages', type=int, default=20, help="Messages sent per user")
+        parser.add_argument('--rate', type=float, default=10.0, help="Messages per second per user (0 = unthrottled)")
+        parser.add_argument('--timeout', type=float, default=30.0, help="Seconds to wait for outstanding deliveries")
+        parser.add_argument('--url', help="Real-socket mode: ws:// URL of a running server, e.g. ws://127.0.0.1:8001/ws/chat/")
+        parser.add_argument('--spawn-daphne', action='store_true', help="Real-socket mode against a Daphne started for the run")
+        parser.add_argument('--port', type=int, default=8765, help="Port for --spawn-daphne")
+        parser.add_argument('--json', dest='json_path', help="Write the machine-readable report to this file")
+
+    def handle(self, *args, **options):
+        if options['url'] or options['spawn_daphne']:
+            report = self.run_sockets(options)
+        else:
+            report = self.run_in_process(options)
+
+        report.update({
+            'benchmark': 'chat_websocket',
+            'recorded_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'channel_layer': settings.CHANNEL_LAYERS['default']['BACKEND'],
+            'params': {key: options[key] for key in ('users', 'admin_tabs', 'admin_watch', 'messages', 'rate')},
+        })
+        self.stdout.write(format_summary('delivery latency', report['delivery_latency']))
+        self.stdout.write(
+            f"{report['deliveries']}/{report['deliveries_expected']} deliveries, "
+            f"{report['messages_per_second']} msg/s, {report['deliveries_per_second']} deliveries/s"
+        )
+        if options['json_path']:
+            write_json(options['json_path'], report)
+        else:
+            self.stdout.write(json.dumps(report, indent=2, sort_keys=True))
+
+    def make_scenario(self, users, admin_tabs, conversation_ids, options):
+        return Scenario(
+            users, admin_tabs, options['messages'], options['rate'], options['timeout'],
+            conversation_ids=conversation_ids, admin_watch=options['admin_watch'],
+        )
+
+    def run_in_process(self, options):
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            admin = User.objects.create_user(f'{BENCH_PREFIX}admin', is_staff=True)
+            users = [User.objects.create_user(f'{BENCH_PREFIX}user_{i}') for i in range(options['users'])]
+            scenario = self.make_scenario(
+                [CommunicatorClient(user) for user in users],
+                [CommunicatorClient(admin) for _ in range(options['admin_tabs'])],
+                conversation_ids_for(users),
+                options,
+            )
+            with QueryCounter() as counter:
+                report = asyncio.run(scenario.run(measure_memory=True))
+            sent = report['messages_sent'] or 1
+            report.update({
+                'mode': 'in_process',
+                'db_writes': counter.writes,
+                'db_writes_per_message': round(counter.writes / sent, 2),
+                'db_queries_per_message': round(counter.queries / sent, 2),
+            })
+            return report
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def run_sockets(self, options):
+        daphne = None
+        url = options['url']
+        if options['spawn_daphne']:
+            url = f"ws://127.0.0.1:{options['port']}/ws/chat/"
+            daphne = subprocess.Popen(
+                [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(options['port']), 'portfolio.asgi:application'],
+                env={**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'portfolio.settings')},
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_port('127.0.0.1', options['port'])
+            except RuntimeError as exc:
+                daphne.terminate()
+                raise CommandError(str(exc))
+
+        accounts = BenchAccounts()
+        try:
+            admin = accounts.user('admin', is_staff=True)
+            users = accounts.users(options['users'])
+            admin_key = session_key_for(admin)
+            scenario = self.make_scenario(
+                [SocketClient(url, session_key_for(user)) for user in users],
+                [SocketClient(url, admin_key) for _ in range(options['admin_tabs'])],
+                conversation_ids_for(users),
+                options,
+            )
+            rss_before = rss_bytes(daphne.pid) if daphne else None
+            report = asyncio.run(scenario.run())
+            rss_after = rss_bytes(daphne.pid) if daphne else None
+            if rss_before and rss_after:
+                report['memory_per_connection_bytes'] = round((rss_after - rss_before) / report['connections'])
+            report.update({'mode': 'socket', 'url': url, 'db_writes_per_message': None})
+            return report
+        finally:
+            if daphne:
+                daphne.terminate()
+                daphne.wait(timeout=10)
+            accounts.delete()
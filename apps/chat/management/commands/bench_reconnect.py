@@ -0,0 +1,87 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.chat.loadtest import BenchAccounts, reconnect_storm, session_key_for, wait_for_port
+from apps.main.benchmarking import format_summary, summarize, write_json
+from apps.main.management.commands.bench_coldstart import free_port
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure chat WebSocket handshake latency during a reconnect storm: "
+        "all clients connect at once, drop and reconnect, for each session "
+        "backend with the in-process user cache off and on. Starts one "
+        "WebSocket Daphne worker per configuration on the configured "
+        "database; bench_* users are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(settings.SESSION_ENGINES), help="Comma-separated session backends")
+        parser.add_argument('--clients', type=int, default=200, help="Sockets reconnecting at once")
+        parser.add_argument('--rounds', type=int, default=5, help="Storms per configuration; the first one is cold")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        backends = options['backends'].split(',')
+        unknown = set(backends) - set(settings.SESSION_ENGINES)
+        if unknown:
+            raise CommandError(f"Unknown session backend(s): {', '.join(sorted(unknown))}")
+        if options['rounds'] < 2:
+            raise CommandError("--rounds must be at least 2 (one cold storm, then warm ones)")
+
+        accounts = BenchAccounts()
+        results = {}
+        try:
+            users = accounts.users(options['clients'])
+            for backend in backends:
+                keys = [session_key_for(user, settings.SESSION_ENGINES[backend]) for user in users]
+                for user_cache in (False, True):
+                    name = f"{backend}{'+user-cache' if user_cache else ''}"
+                    results[name] = self.run_configuration(backend, user_cache, keys, options)
+        finally:
+            accounts.delete()
+
+        for name, result in results.items():
+            self.stdout.write(f"{name}:")
+            self.stdout.write(format_summary('  cold storm', result['cold']))
+            self.stdout.write(format_summary('  warm storms', result['warm']))
+            self.stdout.write(f"  failed handshakes: {result['failed']}")
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'reconnect_storm',
+                'recorded_at': timezone.now().isoformat(),
+                'cpus': os.cpu_count(),
+                'params': {key: options[key] for key in ('clients', 'rounds')},
+                'configurations': results,
+            })
+
+    def run_configuration(self, backend, user_cache, keys, options):
+        port = free_port()
+        env = {**os.environ, 'DEBUG': 'False', 'SESSION_BACKEND': backend}
+        if not user_cache:
+            env['USER_CACHE_SECONDS'] = '0'
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'portfolio.asgi_ws:application'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            try:
+                wait_for_port('127.0.0.1', port, timeout=30)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            rounds = asyncio.run(reconnect_storm(f'ws://127.0.0.1:{port}/ws/chat/', keys, options['rounds']))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        cold, *warm = rounds
+        return {
+            'cold': summarize(cold['latencies']),
+            'warm': summarize([latency for storm in warm for latency in storm['latencies']]),
+            'failed': sum(storm['failed'] for storm in rounds),
+        }
@@ -0,0 +1,127 @@
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from autobahn.websocket.compress import PerMessageDeflate
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.chat.compression import deflate_memory, deflate_parameters
+from apps.chat.consumers import message_frame
+from apps.main.benchmarking import LOREM, write_json
+
+NAMES = ['alice', 'bruno', 'chloe', 'david', 'emma', 'farid', 'admin']
+WORDS = LOREM.replace(',', '').replace('.', '').lower().split()
+
+
+def chat_frames(count, rng, conversation_id=1):
+    """``count`` chat_message frames of one conversation, as the consumer encodes them."""
+    sent_at = datetime(2026, 1, 1, 9, 0, tzinfo=dt_timezone.utc)
+    frames = []
+    for index in range(count):
+        sender = rng.choice(NAMES)
+        sent_at += timedelta(seconds=rng.randint(1, 600), microseconds=rng.randint(0, 999999))
+        frames.append(message_frame({
+            'message': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 40))).capitalize(),
+            'sender_id': NAMES.index(sender) + 1,
+            'sender_name': sender,
+            'sender_is_admin': sender == 'admin',
+            'message_id': 1000 + index,
+            'timestamp': str(sent_at),
+            'conversation_id': conversation_id,
+        }).encode())
+    return frames
+
+
+def frame_header(length):
+    """Size of a server (unmasked) frame header for a payload of ``length`` bytes."""
+    return 2 if length < 126 else 4 if length < 65536 else 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bytes on the wire, compression CPU and zlib memory per "
+        "connection of permessage-deflate for chat traffic, for each minimum "
+        "size, context takeover and memory cap (see apps/chat/compression.py). "
+        "Frames are compressed by Autobahn's deflate extension as Daphne "
+        "would, without sockets: typical traffic is a few messages on many "
+        "connections, a history replay many messages on one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=200, help="Connections of the typical workload")
+        parser.add_argument('--messages', type=int, default=5, help="Messages per connection in the typical workload")
+        parser.add_argument('--history', type=int, default=500, help="Messages of the history replay")
+        parser.add_argument('--min-sizes', default='0,256', help="Comma-separated WS_DEFLATE_MIN_SIZE values")
+        parser.add_argument('--memory', default='16384,65536,327680', help="Comma-separated WS_DEFLATE_MAX_MEMORY values")
+        parser.add_argument('--rounds', type=int, default=5, help="Repetitions of each workload, for CPU time")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        workloads = {
+            'typical': [chat_frames(options['messages'], rng, i) for i in range(options['connections'])],
+            'history': [chat_frames(options['history'], rng)],
+        }
+        configurations = [('off', None)]
+        for min_size in map(int, options['min_sizes'].split(',')):
+            for context_takeover in (True, False):
+                for max_memory in map(int, options['memory'].split(',')):
+                    name = f"min={min_size} {'takeover' if context_takeover else 'no-takeover'} mem={max_memory // 1024}K"
+                    configurations.append((name, (min_size, context_takeover, max_memory)))
+
+        results = {}
+        for workload, connections in workloads.items():
+            self.stdout.write(f"{workload} ({len(connections)} connection(s), {sum(map(len, connections))} frames):")
+            results[workload] = {}
+            for name, configuration in configurations:
+                result = self.measure(connections, configuration, options['rounds'])
+                results[workload][name] = result
+                self.stdout.write(
+                    f"  {name:<32} wire={result['wire_bytes']:>8} ({result['ratio']:.2f} of plain) "
+                    f"cpu={result['cpu_us_per_frame']:>6.1f}us/frame mem={result['memory_per_connection'] // 1024}K"
+                )
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'ws_compression',
+                'recorded_at': timezone.now().isoformat(),
+                'cpus': os.cpu_count(),
+                'params': {key: options[key] for key in ('connections', 'messages', 'history', 'seed')},
+                'workloads': results,
+            })
+
+    def measure(self, connections, configuration, rounds):
+        plain = sum(len(frame) + frame_header(len(frame)) for frames in connections for frame in frames)
+        if configuration is None:
+            return {'wire_bytes': plain, 'plain_bytes': plain, 'ratio': 1.0, 'cpu_us_per_frame': 0.0, 'memory_per_connection': 0}
+        min_size, context_takeover, max_memory = configuration
+        parameters = deflate_parameters(max_memory)
+        if parameters is None:
+            return {'wire_bytes': plain, 'plain_bytes': plain, 'ratio': 1.0, 'cpu_us_per_frame': 0.0, 'memory_per_connection': 0}
+        window_bits, mem_level, client_window_bits = parameters
+        frame_count = sum(map(len, connections))
+        cpu = 0.0
+        for _ in range(rounds):
+            wire = 0
+            for frames in connections:
+                deflate = PerMessageDeflate(
+                    True, not context_takeover, not context_takeover, window_bits, client_window_bits, mem_level,
+                )
+                start = time.process_time()
+                for frame in frames:
+                    if len(frame) < min_size:
+                        wire += len(frame) + frame_header(len(frame))
+                        continue
+                    deflate.start_compress_message()
+                    data = deflate.compress_message_data(frame) + deflate.end_compress_message()
+                    wire += len(data) + frame_header(len(data))
+                cpu += time.process_time() - start
+        return {
+            'wire_bytes': wire,
+            'plain_bytes': plain,
+            'ratio': round(wire / plain, 3),
+            'cpu_us_per_frame': round(cpu / rounds / frame_count * 1e6, 2),
+            'memory_per_connection': deflate_memory(window_bits, mem_level, client_window_bits),
+        }
@@ -0,0 +1,57 @@
+"""
+Chat (WebSocket) metrics, published on the same ``/metrics`` registry as
+the HTTP request metrics. Only recorded when ``METRICS_ENABLED`` is set.
+"""
+import functools
+import time
+
+from apps.main.metrics import COUNT_BUCKETS, metrics_enabled, registry
+
+
+ws_connections = registry.counter(
+    'chat_ws_connections_total', "Accepted chat WebSocket connections by role.", ('role',))
+ws_rejections = registry.counter(
+    'chat_ws_rejections_total', "Rejected (unauthenticated) chat WebSocket connections.")
+ws_disconnections = registry.counter(
+    'chat_ws_disconnections_total', "Closed chat WebSocket connections by role.", ('role',))
+ws_open = registry.gauge(
+    'chat_ws_open_connections', "Currently open chat WebSocket connections by role.", ('role',))
+ws_frames = registry.counter(
+    'chat_ws_frames_received_total', "Inbound chat WebSocket frames by role.", ('role',))
+db_call_duration = registry.histogram(
+    'chat_db_call_seconds', "Latency of chat database calls, pool queueing included.", ('method',))
+db_pool_queue_depth = registry.gauge(
+    'chat_db_pool_queue_depth', "Chat database calls waiting for a pool thread.")
+db_pool_busy_threads = registry.gauge(
+    'chat_db_pool_busy_threads', "Chat database pool threads running a call.")
+db_pool_wait = registry.histogram(
+    'chat_db_pool_wait_seconds', "Time chat database calls wait for a pool thread.")
+db_write_batch_size = registry.histogram(
+    'chat_db_write_batch_size', "Messages inserted per transaction by the coalescing writer.", (), COUNT_BUCKETS)
+fanout_latency = registry.histogram(
+    'chat_fanout_latency_seconds', "Delay between group_send and delivery to a socket, by receiver role.", ('role',))
+
+
+def role_of(user):
+    return 'admin' if user.is_staff or user.is_superuser else 'user'
+
+
+def observe_db_call(func):
+    """Time an async (database) consumer method into chat_db_call_seconds."""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        if not metrics_enabled():
+            return await func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            db_call_duration.observe(time.perf_counter() - start, method=func.__name__)
+    return wrapper
+
+
+def observe_fanout(event, role):
+    """Record the fan-out lag of a channel layer event stamped with ``sent_ts``."""
+    sent_ts = event.get('sent_ts')
+    if sent_ts is not None and metrics_enabled():
+        fanout_latency.observe(max(0.0, time.time() - sent_ts), role=role)
@@ -0,0 +1,55 @@
+from django.db import migrations
+
+
+def run_fts_sql(statements):
+    """RunPython callable executing ``statements`` on SQLite with FTS5."""
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+# External-content index: the text lives in chat_message only, the FTS table
+# stores the inverted index keyed by the message rowid.
+MESSAGE_FTS_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chat_message_fts USING fts5(
+        content, content = 'chat_message', content_rowid = 'id',
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_ai AFTER INSERT ON chat_message BEGIN
+        INSERT INTO chat_message_fts (rowid, content) VALUES (new.id, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_ad AFTER DELETE ON chat_message BEGIN
+        INSERT INTO chat_message_fts (chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chat_message_fts_au AFTER UPDATE OF content ON chat_message BEGIN
+        INSERT INTO chat_message_fts (chat_message_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_message_fts (rowid, content) VALUES (new.id, new.content);
+    END""",
+    "INSERT INTO chat_message_fts (chat_message_fts) VALUES ('rebuild')",
+]
+
+MESSAGE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS chat_message_fts_ai",
+    "DROP TRIGGER IF EXISTS chat_message_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_message_fts_au",
+    "DROP TABLE IF EXISTS chat_message_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_alter_message_options'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_fts_sql(MESSAGE_FTS_SQL), run_fts_sql(MESSAGE_FTS_DROP_SQL)),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_missing_conversations(apps, schema_editor):
+    """Give every existing non-staff user a conversation (new users get one on creation)."""
+    User = apps.get_model('auth', 'User')
+    Conversation = apps.get_model('chat', 'Conversation')
+    user_ids = list(
+        User.objects.filter(is_staff=False, is_superuser=False, conversation__isnull=True)
+        .values_list('id', flat=True)
+    )
+    Conversation.objects.bulk_create((Conversation(user_id=user_id) for user_id in user_ids), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('chat', '0004_message_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_conversations, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 
@@ -24,6 +25,13 @@ class Conversation(models.Model):
         """Returns count of messages not read by user (from admin)"""
         return self.messages.filter(is_read=False).exclude(sender=self.user).count()
 
+    @staticmethod
+    def unread_count_for(user):
+        """Messages waiting for ``user``: from every user for admins, from the admin otherwise"""
+        if user.is_staff or user.is_superuser:
+            return Message.objects.filter(is_read=False, sender=models.F('conversation__user')).count()
+        return Message.objects.filter(is_read=False, conversation__user=user).exclude(sender=user).count()
+
 
 class Message(models.Model):
     """
@@ -43,6 +51,11 @@ class Message(models.Model):
         return f"Message from {self.sender.username} at {self.sent_at}"
     
     def save(self, *args, **kwargs):
+        if self.pk is None and settings.CHAT_WRITE_BEHIND:
+            # Share the id space of the messages stored behind (see writebehind.py)
+            from .writebehind import next_message_id
+            self.pk = next_message_id()
+            kwargs.setdefault('force_insert', True)
         super().save(*args, **kwargs)
         # Update conversation's last_message_at
         self.conversation.last_message_at = self.sent_at
@@ -0,0 +1,46 @@
+"""
+FTS5 search over chat messages (see apps.main.search).
+"""
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from apps.main.search import fts_table_exists, icontains_filter, to_fts_query
+
+
+MESSAGE_FTS_TABLE = 'chat_message_fts'
+
+
+def search_messages(text, limit=50, conversation=None):
+    """Return messages matching ``text``, best match first (bm25 rank)."""
+    from .models import Message
+
+    query = to_fts_query(text)
+    if not query:
+        return []
+    queryset = Message.objects.select_related('sender', 'conversation__user')
+    if conversation is not None:
+        queryset = queryset.filter(conversation=conversation)
+
+    if not fts_table_exists(MESSAGE_FTS_TABLE):
+        return list(queryset.filter(icontains_filter(['content'], text)).order_by('-sent_at')[:limit])
+
+    where, params = '', [query]
+    if conversation is not None:
+        where = 'AND m.conversation_id = %s'
+        params.append(getattr(conversation, 'pk', conversation))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT f.rowid FROM {MESSAGE_FTS_TABLE} f
+                JOIN chat_message m ON m.id = f.rowid
+                WHERE {MESSAGE_FTS_TABLE} MATCH %s {where}
+                ORDER BY f.rank LIMIT %s""",
+            params + [limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    messages = queryset.in_bulk(ids)
+    return [messages[pk] for pk in ids if pk in messages]
+
+
+def message_match_ids(text):
+    """Subquery of the ids of messages matching ``text`` (for ``pk__in``)."""
+    return RawSQL(f"SELECT rowid FROM {MESSAGE_FTS_TABLE} WHERE {MESSAGE_FTS_TABLE} MATCH %s", [to_fts_query(text)])
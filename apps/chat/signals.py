@@ -0,0 +1,19 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import conversations
+from .models import Conversation
+
+
+@receiver(post_save, sender=User)
+def create_conversation(sender, instance, created, raw=False, **kwargs):
+    """Give every new non-staff user their conversation up front."""
+    if created and not raw and not (instance.is_staff or instance.is_superuser):
+        conversation, _ = Conversation.objects.get_or_create(user=instance)
+        conversations.remember(instance.pk, conversation.pk)
+
+
+@receiver(post_delete, sender=Conversation)
+def forget_conversation(sender, instance, **kwargs):
+    conversations.forget(instance.user_id)
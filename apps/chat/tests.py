@@ -1,3 +1,573 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.main import authcache
+from apps.main.benchmarking import QueryCounter
+from apps.main.metrics import registry
+from . import auth, conversations, metrics, writebehind
+from .executor import DatabasePool, MessageWriter
+from .loadtest import session_key_for
+from .models import Conversation, Message
+from .routing import websocket_urlpatterns
+from .search import search_messages
+from .writebehind import IdAllocator
+
+
+application = URLRouter(websocket_urlpatterns)
+
+
+async def connect(user):
+    communicator = WebsocketCommunicator(application, '/ws/chat/')
+    communicator.scope['user'] = user
+    connected, _ = await communicator.connect()
+    return communicator, connected
+
+
+@override_settings(METRICS_ENABLED=True)
+class ChatConsumerMetricsTests(TransactionTestCase):
+
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user('visitor', password='pass')
+        self.admin = User.objects.create_user('owner', password='pass', is_staff=True)
+        self.conversation_id = self.user.conversation.id
+        conversations.clear()
+
+    async def test_message_round_trip_is_instrumented(self):
+        admin_socket, connected = await connect(self.admin)
+        self.assertTrue(connected)
+        await admin_socket.send_json_to({'action': 'subscribe', 'conversation_id': self.conversation_id})
+        await admin_socket.receive_json_from()
+        user_socket, connected = await connect(self.user)
+        self.assertTrue(connected)
+
+        self.assertEqual(metrics.ws_connections.value(role='admin'), 1)
+        self.assertEqual(metrics.ws_connections.value(role='user'), 1)
+        self.assertEqual(metrics.ws_open.value(role='user'), 1)
+
+        await user_socket.send_json_to({'message': 'Bonjour'})
+        received = await user_socket.receive_json_from()
+        self.assertEqual(received['message'], 'Bonjour')
+        self.assertNotIn('sent_ts', received)
+        received = await admin_socket.receive_json_from()
+        conversation = await Conversation.objects.aget(user=self.user)
+        self.assertEqual(received['conversation_id'], conversation.id)
+        self.assertEqual(await Message.objects.filter(conversation=conversation).acount(), 1)
+
+        self.assertEqual(metrics.ws_frames.value(role='user'), 1)
+        self.assertEqual(metrics.db_call_duration.count(method='get_conversation_id'), 1)
+        self.assertEqual(metrics.db_call_duration.count(method='create_message'), 1)
+        self.assertEqual(metrics.fanout_latency.count(role='user'), 1)
+        self.assertEqual(metrics.fanout_latency.count(role='admin'), 1)
+
+        await user_socket.disconnect()
+        await admin_socket.disconnect()
+        self.assertEqual(metrics.ws_disconnections.value(role='user'), 1)
+        self.assertEqual(metrics.ws_open.value(role='user'), 0)
+        self.assertEqual(metrics.ws_open.value(role='admin'), 0)
+
+        exposition = registry.exposition()
+        self.assertIn('chat_ws_connections_total{role="user"} 1', exposition)
+        self.assertIn('chat_db_call_seconds_count{method="create_message"} 1', exposition)
+
+    async def test_anonymous_connection_is_rejected_and_counted(self):
+        _, connected = await connect(AnonymousUser())
+        self.assertFalse(connected)
+        self.assertEqual(metrics.ws_rejections.value(), 1)
+        self.assertEqual(metrics.ws_open.value(role='user'), 0)
+
+
+class AdminSubscriptionTests(TransactionTestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user('owner', is_staff=True)
+        self.users = [User.objects.create_user(f'visitor{i}') for i in range(2)]
+        self.conversation_ids = [user.conversation.id for user in self.users]
+
+    async def subscribe(self, socket, **target):
+        await socket.send_json_to({'action': 'subscribe', **target})
+        self.assertEqual(await socket.receive_json_from(), {'type': 'subscribed', **target})
+
+    async def test_admin_receives_the_subscribed_conversations_only(self):
+        admin_socket, _ = await connect(self.admin)
+        first, _ = await connect(self.users[0])
+        second, _ = await connect(self.users[1])
+        await self.subscribe(admin_socket, conversation_id=self.conversation_ids[0])
+
+        await second.send_json_to({'message': 'Ailleurs'})
+        await second.receive_json_from()
+        await first.send_json_to({'message': 'Ici'})
+        await first.receive_json_from()
+        received = await admin_socket.receive_json_from()
+        self.assertEqual((received['message'], received['conversation_id']), ('Ici', self.conversation_ids[0]))
+        # The pages tell messages from acknowledgements by the latter's type
+        self.assertNotIn('type', received)
+
+        await admin_socket.send_json_to({'action': 'unsubscribe', 'conversation_id': self.conversation_ids[0]})
+        self.assertEqual(await admin_socket.receive_json_from(), {'type': 'unsubscribed', 'conversation_id': self.conversation_ids[0]})
+        await first.send_json_to({'message': 'Plus suivi'})
+        await first.receive_json_from()
+        self.assertTrue(await admin_socket.receive_nothing())
+        for socket in (admin_socket, first, second):
+            await socket.disconnect()
+
+    @override_settings(CHAT_INBOX_INTERVAL=1.0)
+    async def test_inbox_summary_is_coalesced(self):
+        admin_socket, _ = await connect(self.admin)
+        user_socket, _ = await connect(self.users[0])
+        await self.subscribe(admin_socket, stream='inbox')
+
+        for index in range(4):
+            await user_socket.send_json_to({'message': f'Message {index}'})
+            await user_socket.receive_json_from()
+        key = str(self.conversation_ids[0])
+        first = await admin_socket.receive_json_from()
+        second = await admin_socket.receive_json_from(timeout=3)
+        self.assertEqual(first, {'type': 'inbox', 'conversations': {key: 1}})
+        self.assertEqual(second, {'type': 'inbox', 'conversations': {key: 3}})
+        self.assertTrue(await admin_socket.receive_nothing(timeout=0.3))
+        await user_socket.disconnect()
+        await admin_socket.disconnect()
+
+    def test_conversation_page_skips_acknowledgements(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('chat:admin_conversation', args=[self.conversation_ids[0]]))
+        self.assertContains(response, "'action': 'subscribe', 'conversation_id': conversationId")
+        self.assertContains(response, "if (data.type) {")
+
+    async def test_users_cannot_subscribe(self):
+        user_socket, _ = await connect(self.users[0])
+        await user_socket.send_json_to({'action': 'subscribe', 'conversation_id': self.conversation_ids[1]})
+        self.assertTrue(await user_socket.receive_nothing())
+        await user_socket.disconnect()
+
+
+class ChatDatabasePoolTests(TransactionTestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    @override_settings(METRICS_ENABLED=True)
+    async def test_calls_reuse_the_thread_connection_and_are_counted(self):
+        pool = DatabasePool(threads=1, max_pending=4, conn_max_age=60)
+
+        def connection_id():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return id(connection.connection)
+
+        results = await asyncio.gather(*(pool.run(connection_id) for _ in range(3)))
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(metrics.db_pool_wait.count(), 3)
+        self.assertEqual(metrics.db_pool_queue_depth.value(), 0)
+        self.assertEqual(metrics.db_pool_busy_threads.value(), 0)
+        pool.executor.shutdown()
+
+    async def test_connection_is_closed_without_a_lifetime(self):
+        pool = DatabasePool(threads=1, max_pending=4, conn_max_age=0)
+
+        def query():
+            User.objects.count()
+            return connection
+
+        used = await pool.run(query)
+        self.assertIsNone(used.connection)
+        pool.executor.shutdown()
+
+
+@override_settings(METRICS_ENABLED=True, CHAT_COALESCE_WRITES=True)
+class CoalescedWritesTests(TransactionTestCase):
+
+    def setUp(self):
+        registry.clear()
+        self.user = User.objects.create_user('visitor', password='pass')
+
+    async def test_messages_are_saved_through_the_writer(self):
+        user_socket, connected = await connect(self.user)
+        self.assertTrue(connected)
+        for index in range(5):
+            await user_socket.send_json_to({'message': f'Message {index}'})
+        received = [await user_socket.receive_json_from() for _ in range(5)]
+        await user_socket.disconnect()
+
+        self.assertEqual([event['message'] for event in received], [f'Message {i}' for i in range(5)])
+        ids = [message.id async for message in Message.objects.order_by('id')]
+        self.assertEqual([event['message_id'] for event in received], ids)
+        self.assertEqual(metrics.db_write_batch_size.sum(), 5)
+        self.assertEqual(metrics.db_call_duration.count(method='create_message'), 5)
+
+    def test_batch_is_one_transaction(self):
+        conversation = self.user.conversation
+        before = conversation.last_message_at
+        items = [(conversation.id, self.user.id, f'Message {i}') for i in range(3)]
+        with self.assertNumQueries(4) as queries:
+            messages = MessageWriter.write(items)
+        self.assertEqual(
+            [query['sql'].split()[0] for query in queries.captured_queries],
+            ['BEGIN', 'INSERT', 'UPDATE', 'COMMIT'],
+        )
+        self.assertEqual(len({message.pk for message in messages}), 3)
+        self.assertTrue(all(message.sent_at for message in messages))
+        conversation.refresh_from_db()
+        self.assertGreater(conversation.last_message_at, before)
+        self.assertEqual(metrics.db_write_batch_size.count(), 1)
+
+
+class MessageIdTests(SimpleTestCase):
+
+    def test_ids_increase_and_carry_the_worker(self):
+        allocator = IdAllocator(worker=3)
+        ids = [allocator.next() for _ in range(1000)]
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertTrue(all(pk >> writebehind.SEQUENCE_BITS & 0xF == 3 for pk in ids))
+        self.assertLess(ids[-1], 2 ** 53)
+        self.assertNotEqual(ids[0], IdAllocator(worker=4).next())
+
+
+class WriteBehindTests(TransactionTestCase):
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+        self.user = User.objects.create_user('visitor', password='pass')
+        self.conversation = self.user.conversation
+
+    async def test_message_is_broadcast_then_stored_with_its_id(self):
+        with self.settings(CHAT_WRITE_BEHIND=True, CHAT_LOG_DIR=self.log_dir, CHAT_ID_WORKER=0):
+            writebehind._log = writebehind._allocator = None
+            self.addCleanup(setattr, writebehind, '_log', None)
+            self.addCleanup(setattr, writebehind, '_allocator', None)
+            user_socket, connected = await connect(self.user)
+            self.assertTrue(connected)
+            await user_socket.send_json_to({'message': 'Bonjour'})
+            received = await user_socket.receive_json_from()
+            await user_socket.disconnect()
+
+            for _ in range(100):
+                message = await Message.objects.filter(pk=received['message_id']).afirst()
+                if message:
+                    break
+                await asyncio.sleep(0.02)
+            self.assertEqual(message.content, 'Bonjour')
+            self.assertEqual(os.path.getsize(writebehind._log.path), 0)
+
+    def entry(self, content, pk):
+        message = Message(
+            id=pk, conversation_id=self.conversation.id, sender_id=self.user.id,
+            content=content, sent_at=timezone.now() - timedelta(minutes=5),
+        )
+        return writebehind.entry_line(message)
+
+    def wait_for_empty_queue(self, log):
+        for _ in range(200):
+            with log.log_lock:
+                if not log.unstored:
+                    return
+            time.sleep(0.01)
+        self.fail("Messages still unstored")
+
+    def test_transient_errors_are_retried(self):
+        log = writebehind.WriteBehindLog(self.log_dir, 10, 0.001, 0)
+        message = Message(
+            id=10 ** 12, conversation_id=self.conversation.id, sender_id=self.user.id,
+            content='Verrouillé', sent_at=timezone.now(),
+        )
+        store = writebehind.store
+        failures = [OperationalError('database is locked')] * 2
+        def flaky_store(messages):
+            if failures:
+                raise failures.pop()
+            return store(messages)
+
+        with mock.patch.object(writebehind, 'store', flaky_store), \
+                mock.patch.object(writebehind, 'RETRY_DELAYS', (0.01,)), \
+                self.assertLogs('apps.chat.writebehind', 'WARNING') as logs:
+            log.append(message)
+            self.wait_for_empty_queue(log)
+        self.assertEqual(len(logs.records), 2)
+        self.assertTrue(Message.objects.filter(pk=10 ** 12).exists())
+        self.assertEqual(os.path.getsize(log.path), 0)
+
+    def test_log_is_compacted_under_steady_traffic(self):
+        log = writebehind.WriteBehindLog(self.log_dir, 1, 0.001, 0)
+        messages = [
+            Message(id=10 ** 12 + i, conversation_id=self.conversation.id, sender_id=self.user.id,
+                    content=f'Message {i}', sent_at=timezone.now())
+            for i in range(6)
+        ]
+        store, allowed = writebehind.store, threading.Semaphore(0)
+        def slow_store(batch):
+            allowed.acquire()
+            return store(batch)
+
+        def logged_ids():
+            with open(log.path, encoding='utf-8') as f:
+                return [json.loads(line)['id'] for line in f]
+
+        with mock.patch.object(writebehind, 'store', slow_store), \
+                mock.patch.object(writebehind, 'COMPACT_LINES', 4):
+            log.append(messages[0])
+            # Each message is appended before the previous one is stored:
+            # something is always in flight.
+            for previous, message in zip(messages, messages[1:]):
+                log.append(message)
+                allowed.release()
+                for _ in range(200):
+                    with log.log_lock:
+                        if previous.pk not in log.pending:
+                            break
+                    time.sleep(0.01)
+                self.assertEqual(list(log.pending), [message.pk])
+            # Compacted when the 4th line came in, then appended to.
+            self.assertEqual(logged_ids(), [m.pk for m in messages[3:]])
+            allowed.release()
+            self.wait_for_empty_queue(log)
+        self.assertEqual(logged_ids(), [])
+        self.assertEqual(Message.objects.filter(pk__in=[m.pk for m in messages]).count(), 6)
+        self.assertEqual(os.listdir(self.log_dir), [os.path.basename(log.path)])
+
+    def test_failed_entries_stay_in_the_log(self):
+        log = writebehind.WriteBehindLog(self.log_dir, 10, 0.001, 0)
+        orphan = Message(id=10 ** 12, conversation_id=10 ** 6, sender_id=self.user.id, content='Orphelin', sent_at=timezone.now())
+        stored = Message(id=10 ** 12 + 1, conversation_id=self.conversation.id, sender_id=self.user.id, content='Rangé', sent_at=timezone.now())
+        with self.assertLogs('apps.chat.writebehind', 'ERROR'):
+            log.append(orphan)
+            log.append(stored)
+            self.wait_for_empty_queue(log)
+        self.assertTrue(Message.objects.filter(pk=stored.pk).exists())
+        with open(log.path, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [orphan.pk])
+
+        # A later recovery keeps it again rather than dropping it.
+        dead = os.path.join(self.log_dir, 'chat-1.log')
+        shutil.copy(log.path, dead)
+        with self.settings(CHAT_WRITE_BEHIND=True, CHAT_LOG_DIR=self.log_dir, CHAT_ID_WORKER=0), \
+                self.assertLogs('apps.chat.writebehind', 'ERROR'):
+            self.assertEqual(writebehind.recover(), 0)
+        with open(dead, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['id'] for line in f], [orphan.pk])
+
+    def test_write_behind_requires_a_worker_number(self):
+        with self.settings(CHAT_WRITE_BEHIND=True, CHAT_LOG_DIR=self.log_dir, CHAT_ID_WORKER=-1):
+            with self.assertRaises(ImproperlyConfigured):
+                writebehind.recover()
+
+    def test_recover_skips_logs_removed_meanwhile(self):
+        path = os.path.join(self.log_dir, 'chat-1.log')
+        open(path, 'w').close()
+        with mock.patch.object(writebehind.glob, 'glob', return_value=[path, path + '.gone']), \
+                self.settings(CHAT_WRITE_BEHIND=True, CHAT_LOG_DIR=self.log_dir, CHAT_ID_WORKER=0):
+            self.assertEqual(writebehind.recover(), 0)
+        self.assertFalse(os.path.exists(path))
+
+    def test_recover_replays_the_logs_of_dead_processes(self):
+        stored = Message.objects.create(conversation=self.conversation, sender=self.user, content='Déjà là')
+        with open(os.path.join(self.log_dir, 'chat-1.log'), 'w', encoding='utf-8') as f:
+            f.write(self.entry('Déjà là', stored.pk))
+            f.write(self.entry('Perdu', 10 ** 12))
+            f.write(self.entry('Coupé', 10 ** 12 + 1)[:20])
+
+        with self.settings(CHAT_WRITE_BEHIND=True, CHAT_LOG_DIR=self.log_dir, CHAT_ID_WORKER=0):
+            live = writebehind.WriteBehindLog(self.log_dir, 10, 0.001, 0)
+            live.file.write(self.entry('En cours', 10 ** 12 + 2))
+            live.file.flush()
+            self.assertEqual(writebehind.recover(), 1)
+
+        replayed = Message.objects.get(pk=10 ** 12)
+        self.assertEqual(replayed.content, 'Perdu')
+        self.assertLess(replayed.sent_at, timezone.now() - timedelta(minutes=4))
+        self.assertFalse(Message.objects.filter(pk__in=[10 ** 12 + 1, 10 ** 12 + 2]).exists())
+        self.assertEqual(os.listdir(self.log_dir), [os.path.basename(live.path)])
+
+
+class CachedConnectTests(TransactionTestCase):
+
+    def setUp(self):
+        authcache.clear()
+        conversations.clear()
+        self.user = User.objects.create_user('visitor', password='pass')
+        self.session_key = session_key_for(self.user)
+
+    async def handshake(self):
+        communicator = WebsocketCommunicator(
+            auth.CachedAuthMiddlewareStack(application), '/ws/chat/',
+            headers=[(b'cookie', f'sessionid={self.session_key}'.encode())],
+        )
+        connected, _ = await communicator.connect()
+        await communicator.disconnect()
+        return connected
+
+    async def test_reconnect_is_authenticated_from_the_cache(self):
+        with mock.patch('apps.chat.auth.get_user', wraps=auth.get_user) as get_user:
+            self.assertTrue(await self.handshake())
+            self.assertTrue(await self.handshake())
+        self.assertEqual(get_user.call_count, 1)
+
+    async def test_reconnect_does_not_query_the_database(self):
+        self.assertTrue(await self.handshake())
+        with QueryCounter() as counter:
+            self.assertTrue(await self.handshake())
+        self.assertEqual(counter.queries, 0)
+
+    async def test_deleted_user_is_not_served_from_the_cache(self):
+        self.assertTrue(await self.handshake())
+        await self.user.adelete()
+        self.assertFalse(await self.handshake())
+
+
+class ConversationCreationTests(TransactionTestCase):
+
+    def test_regular_users_get_a_conversation_on_creation(self):
+        user = User.objects.create_user('visitor')
+        self.assertEqual(conversations.cached_id(user.pk), user.conversation.pk)
+        admin = User.objects.create_user('owner', is_staff=True)
+        self.assertFalse(Conversation.objects.filter(user=admin).exists())
+
+    def test_cached_ids_expire(self):
+        conversations.remember(10 ** 6, 1)
+        self.assertEqual(conversations.cached_id(10 ** 6), 1)
+        with self.settings(CHAT_CONVERSATION_CACHE_SECONDS=-1):
+            conversations.remember(10 ** 6, 1)
+        self.assertIsNone(conversations.cached_id(10 ** 6))
+
+    async def test_stale_cached_id_is_resolved_again(self):
+        user = await User.objects.acreate_user('visitor')
+        old_id = conversations.cached_id(user.pk)
+        socket, connected = await connect(user)
+        self.assertTrue(connected)
+        # Another process deletes the conversation; the page recreates it.
+        await Conversation.objects.filter(pk=old_id).adelete()
+        conversations.remember(user.pk, old_id)
+        conversation, _ = await Conversation.objects.aget_or_create(user=user)
+
+        await socket.send_json_to({'message': 'Toujours là ?'})
+        received = await socket.receive_json_from()
+        self.assertEqual(received['conversation_id'], conversation.pk)
+        self.assertEqual(conversations.cached_id(user.pk), conversation.pk)
+        self.assertTrue(await Message.objects.filter(conversation=conversation, content='Toujours là ?').aexists())
+
+        # Admin replies to the new conversation reach the same socket.
+        admin = await User.objects.acreate_user('owner', is_staff=True)
+        admin_socket, _ = await connect(admin)
+        await admin_socket.send_json_to({'message': 'Oui', 'conversation_id': conversation.pk})
+        self.assertEqual((await socket.receive_json_from())['message'], 'Oui')
+        await admin_socket.disconnect()
+        await socket.disconnect()
+
+    def test_backfill_migration(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        # bulk_create() sends no post_save: users from before the signal
+        User.objects.bulk_create([User(username='old'), User(username='staff', is_staff=True)])
+        import_module('apps.chat.migrations.0005_backfill_conversations').create_missing_conversations(apps, None)
+        self.assertEqual(list(Conversation.objects.values_list('user__username', flat=True)), ['old'])
+
+
+class DeflateNegotiationTests(SimpleTestCase):
+
+    def test_parameters_fit_the_memory_cap(self):
+        from .compression import deflate_memory, deflate_parameters
+
+        self.assertEqual(deflate_parameters(64 * 1024), (12, 5, 12))
+        self.assertEqual(deflate_parameters(1024 * 1024), (15, 8, 15))
+        self.assertIsNone(deflate_parameters(1024))
+        for max_memory in (16 * 1024, 64 * 1024, 320 * 1024):
+            self.assertLessEqual(deflate_memory(*deflate_parameters(max_memory)), max_memory)
+
+    @override_settings(WS_DEFLATE_MAX_MEMORY=64 * 1024, WS_DEFLATE_CONTEXT_TAKEOVER=True)
+    def test_accept_offer(self):
+        from autobahn.websocket.compress import PerMessageDeflateOffer
+        from .compression import accept_offer
+
+        accept = accept_offer([PerMessageDeflateOffer()])
+        self.assertEqual((accept.window_bits, accept.mem_level, accept.request_max_window_bits), (12, 5, 12))
+        self.assertFalse(accept.no_context_takeover)
+        # Clients unable to shrink their window get a server window that fits next to theirs
+        accept = accept_offer([PerMessageDeflateOffer(accept_max_window_bits=False)])
+        self.assertEqual((accept.window_bits, accept.request_max_window_bits), (11, 0))
+        with override_settings(WS_DEFLATE_CONTEXT_TAKEOVER=False):
+            accept = accept_offer([PerMessageDeflateOffer()])
+        self.assertTrue(accept.no_context_takeover)
+        self.assertTrue(accept.request_no_context_takeover)
+        with override_settings(WS_DEFLATE_MAX_MEMORY=1024):
+            self.assertIsNone(accept_offer([PerMessageDeflateOffer()]))
+
+
+class ChatPageTests(TransactionTestCase):
+
+    def test_pages_open_the_configured_socket(self):
+        self.client.force_login(User.objects.create_user('visitor'))
+        response = self.client.get(reverse('chat:home'))
+        self.assertContains(response, "new WebSocket('' || wsProtocol")
+        with self.settings(CHAT_WS_URL='ws://127.0.0.1:8001/ws/chat/'):
+            response = self.client.get(reverse('chat:home'))
+        self.assertContains(response, "new WebSocket('ws://127.0.0.1:8001/ws/chat/' ||")
+
+
+class MessageSearchTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('visitor')
+        self.other = User.objects.create_user('lecteur')
+
+    def contents(self, text, **kwargs):
+        return [message.content for message in search_messages(text, **kwargs)]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        message = Message.objects.create(conversation=self.user.conversation, sender=self.user, content="Devis pour un site vitrine")
+        Message.objects.create(conversation=self.other.conversation, sender=self.other, content="Un autre devis")
+        self.assertEqual(sorted(self.contents('devis')), ["Devis pour un site vitrine", "Un autre devis"])
+        self.assertEqual(self.contents('devis', conversation=self.other.conversation), ["Un autre devis"])
+
+        Message.objects.filter(pk=message.pk).update(content="Question sur l'hébergement")
+        self.assertEqual(self.contents('vitrine'), [])
+        self.assertEqual(self.contents('hebergement'), ["Question sur l'hébergement"])
+        message.delete()
+        self.assertEqual(self.contents('hebergement'), [])
+
+    def test_admin_search_matches_content_and_usernames(self):
+        Message.objects.create(conversation=self.user.conversation, sender=self.user, content="Bonjour")
+        Message.objects.create(conversation=self.other.conversation, sender=self.other, content="Rendez-vous demain")
+        self.client.force_login(User.objects.create_superuser('root', password='pass'))
+        url = reverse('admin:chat_message_changelist')
+        for term, expected in (('demain', ["Rendez-vous demain"]), ('lect', ["Rendez-vous demain"]), ('bonj', ["Bonjour"])):
+            response = self.client.get(url, {'q': term})
+            self.assertEqual([message.content for message in response.context['cl'].result_list], expected)
+
+
+class BenchAccountsTests(TransactionTestCase):
+
+    def test_delete_removes_the_run_accounts_and_their_sessions_only(self):
+        from django.contrib.sessions.models import Session
+        from .loadtest import BenchAccounts
+
+        existing = User.objects.create_user('bench_user_0')
+        existing_key = session_key_for(existing)
+        accounts = BenchAccounts()
+        users = accounts.users(2)
+        admin = accounts.user('admin', is_staff=True, password='pass')
+        keys = [session_key_for(user) for user in users]
+        self.assertTrue(self.client.login(username=admin.username, password='pass'))
+        self.assertEqual(Session.objects.count(), 4)
+
+        accounts.delete()
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['bench_user_0'])
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), [existing_key])
+        self.assertNotIn(keys[0], Session.objects.values_list('session_key', flat=True))
@@ -0,0 +1,313 @@
+"""
+Write-behind persistence of chat messages (``CHAT_WRITE_BEHIND``).
+
+The consumer broadcasts a message as soon as it has an id: ``append()``
+allocates one in process, appends the message to this process's log in
+``CHAT_LOG_DIR`` and queues it for a background thread that inserts queued
+messages in batches, one transaction each (see executor.MessageWriter).
+Delivery therefore waits neither for SQLite nor for a disk sync.
+
+The log is emptied whenever everything in it is stored, and compacted to
+the entries still needed once it has grown to ``COMPACT_LINES`` lines, so
+it stays small under steady traffic too. Messages that fail
+on a transient error (``OperationalError``: database locked...) are retried
+with backoff; the others stay in the log, for ``recover()``. It is written
+but not fsynced: it survives a crash of the process, not of the machine.
+``recover()`` replays the logs left by dead processes at startup; each
+live process holds a lock on its own log so that it is never replayed
+under its feet. Entries it cannot store either are kept in their log for
+the next startup.
+
+Message ids embed ``CHAT_ID_WORKER``: each process writing messages needs
+its own number, set explicitly (process ids collide modulo 16).
+"""
+import fcntl
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import conversations, metrics
+from .executor import MessageWriter, write_lock
+
+logger = logging.getLogger(__name__)
+
+# Message ids are milliseconds since ID_EPOCH_MS (41 bits), a worker number
+# (4 bits) and a sequence within the millisecond (8 bits): 53 bits, exact as
+# JSON numbers in browsers and larger than the autoincrement ids before them.
+ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 4
+SEQUENCE_BITS = 8
+REPLAY_BATCH_SIZE = 500
+# Seconds before storing a message again after a transient error, by attempt.
+RETRY_DELAYS = (0.5, 2, 5, 15, 30)
+# The log is rewritten once it has this many lines, at most half of them
+# still needed (unstored or rejected entries).
+COMPACT_LINES = 1000
+
+
+class IdAllocator:
+    """Monotonic message ids, unique across workers with distinct numbers."""
+
+    def __init__(self, worker):
+        self.worker = worker % (1 << WORKER_BITS)
+        self.last_ms = 0
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            now = max(int(time.time() * 1000) - ID_EPOCH_MS, self.last_ms)
+            if now == self.last_ms:
+                self.sequence += 1
+                if self.sequence >> SEQUENCE_BITS:
+                    # Sequence exhausted: borrow the next millisecond.
+                    now += 1
+                    self.sequence = 0
+            else:
+                self.sequence = 0
+            self.last_ms = now
+            return (now << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker << SEQUENCE_BITS) | self.sequence
+
+
+def to_entry(message):
+    return {
+        'id': message.pk,
+        'conversation': message.conversation_id,
+        'sender': message.sender_id,
+        'content': message.content,
+        'sent_at': message.sent_at.isoformat(),
+    }
+
+
+def entry_line(message):
+    return json.dumps(to_entry(message)) + '\n'
+
+
+def from_entry(entry):
+    from .models import Message
+
+    return Message(
+        id=entry['id'],
+        conversation_id=entry['conversation'],
+        sender_id=entry['sender'],
+        content=entry['content'],
+        sent_at=parse_datetime(entry['sent_at']),
+    )
+
+
+def store(messages):
+    """Insert messages that already have their id and date, in one transaction."""
+    from .models import Conversation
+
+    last = {}
+    with write_lock, transaction.atomic():
+        for message in messages:
+            # raw: keep sent_at rather than auto_now_add's insertion time.
+            message.save_base(raw=True, force_insert=True)
+            last[message.conversation_id] = max(message.sent_at, last.get(message.conversation_id, message.sent_at))
+        for conversation_id, sent_at in last.items():
+            Conversation.objects.filter(id=conversation_id, last_message_at__lt=sent_at).update(last_message_at=sent_at)
+    if metrics.metrics_enabled():
+        metrics.db_write_batch_size.observe(len(messages))
+    return messages
+
+
+def store_each(messages):
+    """
+    ``store()``, retrying one by one on failure. Returns the stored messages
+    and the ``(message, exception)`` pairs of those that could not be.
+    """
+    try:
+        return store(messages), []
+    except Exception as exc:
+        if len(messages) == 1:
+            return [], [(messages[0], exc)]
+    stored, failed = [], []
+    for message in messages:
+        ok, failure = store_each([message])
+        stored += ok
+        failed += failure
+    return stored, failed
+
+
+class WriteBehindLog(MessageWriter):
+    """Append-only log of this process plus the thread storing its entries."""
+    thread_name = 'chat-write-behind'
+
+    def __init__(self, directory, batch_size, window, conn_max_age):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'chat-{os.getpid()}.log')
+        self.file = self.open_locked(self.path, 'a')
+        self.lines = 0
+        # Entries not stored yet, by id, and those that failed for good
+        # (kept in the log for recover()).
+        self.pending = {}
+        self.rejected = []
+        self.log_lock = threading.Lock()
+        super().__init__(batch_size, window, conn_max_age)
+
+    @staticmethod
+    def open_locked(path, mode):
+        f = open(path, mode, encoding='utf-8')
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return f
+
+    @property
+    def unstored(self):
+        return len(self.pending)
+
+    def append(self, message):
+        with self.log_lock:
+            self.file.write(entry_line(message))
+            self.file.flush()
+            self.lines += 1
+            self.pending[message.pk] = message
+        # Queue items are (loop, future, item) for MessageWriter; here the
+        # future slot holds the number of attempts so far.
+        self.queue.put((None, 0, message))
+
+    def write(self, messages):
+        return store(messages)
+
+    def written(self, batch, results):
+        with self.log_lock:
+            for (_, attempts, message), result in zip(batch, results):
+                if isinstance(result, OperationalError):
+                    self.retry(message, attempts, result)
+                    continue
+                if isinstance(result, Exception):
+                    logger.error("Chat message %s cannot be stored, kept in %s: %s", message.pk, self.path, result)
+                    self.rejected.append(message)
+                    # Possibly a stale cached conversation id: look it up again.
+                    conversations.forget(message.sender_id)
+                self.pending.pop(message.pk, None)
+            needed = len(self.pending) + len(self.rejected)
+            if self.lines > needed and (not self.pending or (self.lines >= COMPACT_LINES and needed * 2 <= self.lines)):
+                self.compact()
+
+    def compact(self):
+        """
+        Replace the log with the entries still needed (``log_lock`` held).
+        The new file is locked before it takes the log's name, so recover()
+        in another process never sees it unlocked.
+        """
+        entries = self.rejected + list(self.pending.values())
+        new = self.open_locked(self.path + '.tmp', 'w')
+        new.writelines(entry_line(message) for message in entries)
+        new.flush()
+        os.replace(new.name, self.path)
+        self.file.close()
+        self.file = new
+        self.lines = len(entries)
+
+    def retry(self, message, attempts, exc):
+        delay = RETRY_DELAYS[min(attempts, len(RETRY_DELAYS) - 1)]
+        logger.warning("Chat message %s not stored, retrying in %ss: %s", message.pk, delay, exc)
+        timer = threading.Timer(delay, self.queue.put, [(None, attempts + 1, message)])
+        timer.daemon = True
+        timer.start()
+
+
+_allocator = None
+_log = None
+_lock = threading.Lock()
+
+
+def worker_number():
+    worker = settings.CHAT_ID_WORKER
+    if not 0 <= worker < 1 << WORKER_BITS:
+        raise ImproperlyConfigured(
+            f"CHAT_WRITE_BEHIND needs a CHAT_ID_WORKER between 0 and {(1 << WORKER_BITS) - 1}, "
+            "distinct for each process (runservers sets it)."
+        )
+    return worker
+
+
+def next_message_id():
+    global _allocator
+    with _lock:
+        if _allocator is None:
+            _allocator = IdAllocator(worker_number())
+    return _allocator.next()
+
+
+def get_log():
+    global _log
+    with _lock:
+        if _log is None:
+            _log = WriteBehindLog(
+                settings.CHAT_LOG_DIR, settings.CHAT_WRITE_BATCH_SIZE,
+                settings.CHAT_WRITE_BATCH_WINDOW, settings.CHAT_DB_CONN_MAX_AGE,
+            )
+        return _log
+
+
+def append(conversation_id, sender_id, content):
+    """Log a new message for storage and return it (unsaved, with its id)."""
+    from .models import Message
+
+    message = Message(
+        id=next_message_id(), conversation_id=conversation_id, sender_id=sender_id,
+        content=content, sent_at=timezone.now(),
+    )
+    get_log().append(message)
+    return message
+
+
+def recover(directory=None):
+    """
+    Store the messages left in the logs of dead processes, then delete the
+    logs; entries that cannot be stored stay in their log. Returns the
+    number of messages replayed. Also checks CHAT_ID_WORKER at startup.
+    """
+    from .models import Message
+
+    if not settings.CHAT_WRITE_BEHIND:
+        return 0
+    worker_number()
+    replayed = 0
+    for path in sorted(glob.glob(os.path.join(directory or settings.CHAT_LOG_DIR, 'chat-*.log'))):
+        try:
+            f = open(path, 'r+', encoding='utf-8')
+        except FileNotFoundError:
+            continue  # Replayed by another process starting at the same time.
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue  # Its process is alive.
+            messages = []
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Torn last write: never acknowledged.
+                messages.append(from_entry(json.loads(line)))
+            failed = []
+            for start in range(0, len(messages), REPLAY_BATCH_SIZE):
+                batch = messages[start:start + REPLAY_BATCH_SIZE]
+                stored = set(Message.objects.filter(pk__in=[m.pk for m in batch]).values_list('pk', flat=True))
+                missing = [message for message in batch if message.pk not in stored]
+                if missing:
+                    ok, failures = store_each(missing)
+                    replayed += len(ok)
+                    failed += failures
+            if failed:
+                for message, exc in failed:
+                    logger.error("Chat message %s not replayed, kept in %s: %s", message.pk, path, exc)
+                f.seek(0)
+                f.truncate()
+                f.writelines(entry_line(message) for message, _ in failed)
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    return replayed
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.translation import gettext_lazy as _
-from .models import Project, Skill, About, Contact, SocialLink, SiteSettings, PageContent
+from .models import Project, Skill, About, Contact, SocialLink, SiteSettings, PageContent, Technology
+from .search import FullTextSearchAdminMixin, PROJECT_FTS_TABLE, project_match_ids
 
 
 @admin.register(SiteSettings)
@@ -25,19 +27,36 @@ class PageContentAdmin(admin.ModelAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin):
+class ProjectAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'created_at', 'is_published', 'order', 'featured')
     list_filter = ('is_published', 'featured', 'created_at')
     search_fields = ('title', 'description', 'technologies')
+    filter_horizontal = ('tags',)
+    fts_table = PROJECT_FTS_TABLE
+    fts_match = staticmethod(project_match_ids)
     ordering = ('order', '-created_at')
     
     fieldsets = (
-        (_('General'), {'fields': ('title', 'short_description', 'description', 'image', 'technologies')}),
+        (_('General'), {'fields': ('title', 'short_description', 'description', 'image', 'tags')}),
         (_('Links'), {'fields': ('link', 'github_link')}),
         (_('Settings'), {'fields': ('is_published', 'featured', 'order')}),
     )
 
 
+@admin.register(Technology)
+class TechnologyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'project_count')
+    search_fields = ('name',)
+    prepopulated_fields = {'slug': ('name',)}
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(project_count=Count('projects'))
+    
+    @admin.display(description=_('Projects'), ordering='project_count')
+    def project_count(self, obj):
+        return obj.project_count
+
+
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'proficiency', 'is_active', 'order')
@@ -5,3 +5,6 @@ class MainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.main'
     verbose_name = 'Portfolio Main'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,117 @@
+"""
+Async versions of the public portfolio pages.
+
+Under Daphne these views run on the event loop instead of going through the
+thread-sensitive sync_to_async executor. Independent queries are issued
+concurrently and every queryset is evaluated before rendering, so templates
+never touch the database from the async context.
+
+The sync views in ``views.py`` remain the fallback (see ``ASYNC_VIEWS``).
+"""
+import asyncio
+
+from django.core.exceptions import ValidationError
+from django.shortcuts import render
+from django.http import Http404
+
+from .caching import public_page
+from .composition import aget_layout
+from .markup import render_markdown
+from .models import Project, Skill, About, SocialLink, SiteSettings, Technology
+from .views import get_next_query, get_project_filters, get_project_paginator
+
+
+async def _alist(queryset):
+    """Evaluate a queryset asynchronously."""
+    return [obj async for obj in queryset]
+
+
+def _render_bio(about):
+    return render_markdown(about.bio) if about else ''
+
+
+@public_page
+async def home(request):
+    """Home page view."""
+    site_settings, projects, skills, about, social_links, sections = await asyncio.gather(
+        SiteSettings.aget_instance(),
+        _alist(Project.published()[:6]),
+        _alist(Skill.objects.filter(is_active=True).order_by('order', 'category')),
+        About.aget_instance(),
+        _alist(SocialLink.objects.filter(is_active=True).order_by('order')),
+        aget_layout('home'),
+    )
+
+    context = {
+        'site_settings': site_settings,
+        'projects': projects,
+        'skills': skills,
+        'about': about,
+        'about_bio_html': _render_bio(about),
+        'social_links': social_links,
+        'sections': sections,
+    }
+    return render(request, 'pages/home.html', context)
+
+
+@public_page
+async def projects(request):
+    """Projects page view."""
+    tech, featured = get_project_filters(request)
+    site_settings, page, technologies, sections = await asyncio.gather(
+        SiteSettings.aget_instance(),
+        get_project_paginator(tech, featured).apage(request.GET.get('after')),
+        _alist(Technology.facets()),
+        aget_layout('projects'),
+    )
+    context = {
+        'site_settings': site_settings,
+        'projects': page,
+        'next_query': get_next_query(request, page),
+        'technologies': technologies,
+        'active_tech': tech,
+        'featured': featured,
+        'sections': sections,
+    }
+    return render(request, 'pages/projects.html', context)
+
+
+async def _aget_published_project(project_id):
+    try:
+        return await Project.objects.prefetch_related('tags').aget(id=project_id, is_published=True)
+    except (Project.DoesNotExist, ValidationError):
+        # ValidationError: project_id is not a valid UUID.
+        raise Http404("No Project matches the given query.")
+
+
+@public_page
+async def project_detail(request, project_id):
+    """Project detail view."""
+    site_settings, project = await asyncio.gather(
+        SiteSettings.aget_instance(),
+        _aget_published_project(project_id),
+    )
+    context = {
+        'site_settings': site_settings,
+        'project': project,
+    }
+    return render(request, 'pages/project_detail.html', context)
+
+
+@public_page
+async def about(request):
+    """About page view."""
+    site_settings, about, social_links, sections = await asyncio.gather(
+        SiteSettings.aget_instance(),
+        About.aget_instance(),
+        _alist(SocialLink.objects.filter(is_active=True).order_by('order')),
+        aget_layout('about'),
+    )
+    context = {
+        'site_settings': site_settings,
+        'about': about,
+        'about_bio_html': _render_bio(about),
+        'social_links': social_links,
+        'sections': sections,
+    }
+    return render(request, 'pages/about.html', context)
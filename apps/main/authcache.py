@@ -0,0 +1,119 @@
+"""
+Authenticated users cached in process, keyed by session.
+
+Resolving ``request.user`` (and ``scope['user']`` for a WebSocket
+handshake) costs a ``django_session`` SELECT, unless SESSION_BACKEND is
+cached_db or signed_cookies, plus an ``auth_user`` SELECT.
+``CachedAuthenticationMiddleware`` (and ``CachedAuthMiddleware`` in
+apps/chat/auth.py for Channels) keeps the user of an authenticated session
+for ``USER_CACHE_SECONDS``. Entries are keyed by a hash of the session key,
+so the cache never holds a usable session cookie. Each lookup gets its own
+copy of the user.
+
+Logging out drops the entry of the session. Saving or deleting a user,
+e.g. after a password change, drops all of that user's sessions. Both only
+happen in the process that handles them, so another worker keeps a stale
+entry for up to ``USER_CACHE_SECONDS``; keep the TTL short.
+"""
+import copy
+import hashlib
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+_users = {}
+_lock = threading.Lock()
+
+
+def session_hash(session_key):
+    return hashlib.blake2b(session_key.encode(), digest_size=16).hexdigest()
+
+
+def cached_user(session_key):
+    """A copy of the cached user of ``session_key``, or None."""
+    if not session_key or not settings.USER_CACHE_SECONDS:
+        return None
+    entry = _users.get(session_hash(session_key))
+    if entry is None:
+        return None
+    expires, user = entry
+    if expires < time.monotonic():
+        forget_session(session_key)
+        return None
+    return copy.copy(user)
+
+
+def remember(session_key, user):
+    """Cache ``user`` for ``session_key`` if it is authenticated."""
+    if not session_key or not settings.USER_CACHE_SECONDS or not user.is_authenticated:
+        return
+    now = time.monotonic()
+    with _lock:
+        if len(_users) >= settings.USER_CACHE_SIZE:
+            for key in [key for key, (expires, _) in _users.items() if expires < now]:
+                del _users[key]
+            while len(_users) >= settings.USER_CACHE_SIZE:
+                del _users[next(iter(_users))]
+        _users[session_hash(session_key)] = (now + settings.USER_CACHE_SECONDS, copy.copy(user))
+
+
+def forget_session(session_key):
+    if session_key:
+        with _lock:
+            _users.pop(session_hash(session_key), None)
+
+
+def forget_user(user_id):
+    with _lock:
+        for key in [key for key, (_, user) in _users.items() if user.pk == user_id]:
+            del _users[key]
+
+
+def clear():
+    with _lock:
+        _users.clear()
+
+
+def get_user(request):
+    """``auth.get_user(request)``, from the cache when possible."""
+    session_key = request.session.session_key
+    user = cached_user(session_key)
+    if user is None:
+        user = auth.get_user(request)
+        remember(request.session.session_key, user)
+    return user
+
+
+async def aget_user(request):
+    session_key = request.session.session_key
+    user = cached_user(session_key)
+    if user is None:
+        user = await auth.aget_user(request)
+        remember(request.session.session_key, user)
+    return user
+
+
+def _get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def _auser(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await aget_user(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """Django's AuthenticationMiddleware resolving users through the cache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _get_user(request))
+        request.auser = partial(_auser, request)
@@ -0,0 +1,233 @@
+"""
+Small helpers shared by the ``bench_*`` management commands.
+"""
+import json
+import math
+import random
+import statistics
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+def percentile(values, pct):
+    """Return the ``pct`` percentile (0-100) of ``values`` using nearest-rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed=None):
+    """
+    Summarize a list of latencies (in seconds) as milliseconds.
+    When ``elapsed`` (wall time of the whole run) is given, throughput is added.
+    """
+    summary = {
+        'count': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(max(latencies, default=0.0) * 1000, 3),
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+def format_summary(label, summary):
+    """Format a summary as a single human-readable line."""
+    line = (
+        f"{label:<28} n={summary['count']:<6} p50={summary['p50_ms']:>8.2f}ms "
+        f"p99={summary['p99_ms']:>8.2f}ms max={summary['max_ms']:>8.2f}ms"
+    )
+    if 'throughput_rps' in summary:
+        line += f" {summary['throughput_rps']:>9.1f} req/s"
+    return line
+
+
+def write_json(path, data):
+    """Write benchmark results to ``path`` as JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class QueryCounter:
+    """
+    Count queries and write statements on the current thread's connections
+    and on every connection opened while active (such as the ones of the
+    threads sync_to_async runs ORM calls in).
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.writes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if sql.lstrip().upper().startswith(WRITE_VERBS):
+            self.writes += 1
+        return execute(sql, params, many, context)
+
+    def reset(self):
+        self.queries = self.writes = 0
+
+    def _install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        connection_created.connect(self._install, weak=False)
+        for connection in connections.all(initialized_only=True):
+            self._install(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._install)
+        for connection in connections.all(initialized_only=True):
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+TECHNOLOGIES = [
+    'Python', 'Django', 'HTMX', 'Tailwind', 'PostgreSQL', 'SQLite', 'Redis', 'Docker',
+    'JavaScript', 'TypeScript', 'React', 'Vue', 'Channels', 'Celery', 'Nginx', 'Linux',
+]
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat."
+)
+
+
+# Realistic Markdown of this site (bios, project descriptions, page
+# sections), written in the subset every MARKDOWN_RENDERER backend renders
+# identically: the equivalence test and bench_markdown use it.
+MARKDOWN_CORPUS = {
+    'bio': (
+        "Bonjour ! Je suis **Menja Randriamanantena**, un développeur Full Stack passionné "
+        "avec une expertise dans la création d'applications web modernes et performantes.\n\n"
+        "## Ma philosophie\n\n"
+        "Je crois en l'importance de créer des expériences numériques qui sont à la fois "
+        "**belles** et **fonctionnelles**. Chaque projet est l'occasion d'apprendre.\n\n"
+        "## Ma stack technique\n\n"
+        "### Frontend\n\n"
+        "- HTML5, CSS3, JavaScript (ES6+)\n- React.js, Vue.js, *Tailwind CSS*\n\n"
+        "### Backend\n\n"
+        "- Python, Django, Flask\n- Node.js, Express\n\n"
+        "### Database & DevOps\n\n"
+        "- PostgreSQL, MySQL, MongoDB\n- Docker, CI/CD\n"
+    ),
+    'project': (
+        "Application de gestion (CRUD) de produits avec **Django** et **HTMX** : recherche "
+        "instantanée, pagination infinie et formulaires validés côté serveur.\n\n"
+        "## Fonctionnalités\n\n"
+        "1. Création, modification et suppression de produits\n"
+        "2. Recherche plein texte avec `SQLite FTS5`\n"
+        "3. Export CSV\n\n"
+        "## Installation\n\n"
+        "```bash\npython -m venv .venv\npip install -r requirements.txt\npython manage.py migrate\n```\n\n"
+        "Le code est disponible sur [GitHub](https://github.com/example/crud \"Dépôt\").\n"
+    ),
+    'project_table': (
+        "Tableau de bord temps réel pour suivre les performances d'une API.\n\n"
+        "| Métrique | Avant | Après |\n| --- | --- | --- |\n"
+        "| Latence p99 | 480 ms | 95 ms |\n| Requêtes par page | 42 | 3 |\n\n"
+        "> Les mesures ont été prises sur un serveur à 1 vCPU.\n\n"
+        "---\n\n"
+        "Technologies : *Python*, *Channels*, _Redis_ et ~~Celery~~.\n"
+    ),
+    'section': (
+        "### Services\n\n"
+        "Je développe des **applications web** sur mesure, de la maquette à la mise en production.\n\n"
+        "- Audit de performance\n- Intégration continue\n- Formation\n\n"
+        "Contactez-moi par [email](mailto:contact@portfolio.com).\n"
+    ),
+    'short': "Site vitrine **responsive** réalisé en *une semaine*.",
+}
+
+
+def seed_dataset(projects=0, skills=0, conversations=0, messages=0, batch_size=5000, seed=0):
+    """
+    Bulk-create a synthetic dataset for benchmarks. Messages are spread
+    evenly over the conversations; one staff user (``bench_admin``) answers.
+    Returns the staff user.
+    """
+    from django.contrib.auth.models import User
+    from apps.chat.models import Conversation, Message
+    from .models import About, Project, SiteSettings, Skill, Technology
+
+    rng = random.Random(seed)
+    SiteSettings.get_instance()
+    About.objects.get_or_create(defaults={'bio': f"# Bio\n\n{LOREM}\n\n- Django\n- HTMX\n"})
+
+    tags = {}
+    for name in TECHNOLOGIES:
+        tags[name], _ = Technology.objects.get_or_create(name=name)
+    picks = [rng.sample(TECHNOLOGIES, rng.randint(2, 8)) for _ in range(projects)]
+    created = Project.objects.bulk_create(
+        (
+            Project(
+                title=f"Projet {i}",
+                short_description=LOREM[:120],
+                description=f"{LOREM}\n\n{LOREM}",
+                technologies=', '.join(names),
+                featured=i % 10 == 0,
+                order=i % 50,
+            )
+            for i, names in enumerate(picks)
+        ),
+        batch_size=batch_size,
+    )
+    Project.tags.through.objects.bulk_create(
+        (
+            Project.tags.through(project_id=project.pk, technology_id=tags[name].pk)
+            for project, names in zip(created, picks)
+            for name in names
+        ),
+        batch_size=batch_size,
+    )
+    categories = ['frontend', 'backend', 'database', 'devops', 'tools']
+    Skill.objects.bulk_create(
+        (
+            Skill(name=f"Skill {i}", category=categories[i % len(categories)], proficiency=rng.randint(30, 100), order=i)
+            for i in range(skills)
+        ),
+        batch_size=batch_size,
+    )
+
+    admin, _ = User.objects.get_or_create(username='bench_admin', defaults={'is_staff': True})
+    if conversations:
+        User.objects.bulk_create(
+            (User(username=f'bench_user_{i}') for i in range(conversations)),
+            batch_size=batch_size,
+        )
+        user_ids = User.objects.filter(username__startswith='bench_user_').values_list('id', flat=True)
+        Conversation.objects.bulk_create(
+            (Conversation(user_id=user_id, is_read_by_admin=False) for user_id in user_ids),
+            batch_size=batch_size,
+        )
+    if messages and conversations:
+        pairs = list(Conversation.objects.values_list('id', 'user_id'))
+        batch = []
+        for i in range(messages):
+            conversation_id, user_id = pairs[i % len(pairs)]
+            from_user = rng.random() < 0.6
+            batch.append(Message(
+                conversation_id=conversation_id,
+                sender_id=user_id if from_user else admin.id,
+                content=LOREM[:rng.randint(20, len(LOREM))],
+                is_read=not from_user or rng.random() < 0.7,
+            ))
+            if len(batch) >= batch_size:
+                Message.objects.bulk_create(batch)
+                batch = []
+        Message.objects.bulk_create(batch)
+    return admin
@@ -0,0 +1,55 @@
+"""
+Shared-cache (reverse proxy, CDN) support for the public pages.
+
+Views decorated with ``public_page`` render the same bytes for every
+visitor: what depends on the user (auth links, chat badge, flash messages,
+CSRF token) is loaded afterwards from the ``session`` endpoint by HTMX.
+``PublicCacheMiddleware`` then sends their successful GET responses with
+``Cache-Control: public, max-age=0, s-maxage=PUBLIC_CACHE_SECONDS``, unless
+something touched the session or set a cookie anyway, in which case the
+response stays private.
+
+The proxy or CDN in front must honour ``Cache-Control`` and never cache
+``/session/`` (nor ``/contact/form/``, the contact page for visitors
+without JavaScript): both carry the visitor's CSRF token and messages.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.utils.cache import has_vary_header, patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+
+
+def mark_public(request, response):
+    if request.method in ('GET', 'HEAD') and response.status_code == 200:
+        response.public_page = True
+    return response
+
+
+def public_page(view):
+    """Let shared caches store the view's successful GET responses."""
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            return mark_public(request, await view(request, *args, **kwargs))
+    else:
+        def wrapper(request, *args, **kwargs):
+            return mark_public(request, view(request, *args, **kwargs))
+    return wraps(view)(wrapper)
+
+
+class PublicCacheMiddleware(MiddlewareMixin):
+    """
+    Set the Cache-Control header of ``public_page`` responses. Must come
+    before the session, CSRF and auth middleware so that it sees the
+    ``Vary: Cookie`` and cookies they add.
+    """
+
+    def process_response(self, request, response):
+        if not getattr(response, 'public_page', False) or not settings.PUBLIC_CACHE_SECONDS:
+            return response
+        if response.cookies or has_vary_header(response, 'Cookie'):
+            patch_cache_control(response, private=True)
+        else:
+            patch_cache_control(response, public=True, max_age=0, s_maxage=settings.PUBLIC_CACHE_SECONDS)
+        return response
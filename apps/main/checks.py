@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+# Fragments older than this may be served by the processes that did not
+# see an edit, when the cache is not shared.
+LOCAL_FRAGMENT_TIMEOUT = 60
+
+
+@register()
+def check_fragment_cache(app_configs, **kwargs):
+    """A long fragment timeout needs a cache shared by the processes."""
+    if settings.FRAGMENT_CACHE_TIMEOUT > LOCAL_FRAGMENT_TIMEOUT and isinstance(caches['default'], LocMemCache):
+        return [Warning(
+            f"FRAGMENT_CACHE_TIMEOUT is {settings.FRAGMENT_CACHE_TIMEOUT}s with a per-process cache: "
+            "after an edit, processes other than the one saving it serve stale fragments that long.",
+            hint=f"Set CACHE_REDIS_URL, or keep FRAGMENT_CACHE_TIMEOUT at {LOCAL_FRAGMENT_TIMEOUT} or less.",
+            id='main.W001',
+        )]
+    return []
@@ -0,0 +1,73 @@
+"""
+Page composition from ``PageContent`` sections.
+
+``get_layout(page)`` loads the active sections of a page in one ordered
+query and renders their Markdown, raw HTML and icon once. The layout is
+cached like a template fragment (name ``page:<page>``, see fragments.py),
+so a page with any number of sections costs one query when the cache is
+cold and none afterwards; saving or deleting a PageContent row drops the
+cached layouts. Templates render a layout with ``{% page_sections %}``.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.template import TemplateDoesNotExist
+from django.utils.safestring import mark_safe
+
+from .fragments import fragment_key
+from .markup import render_markdown
+
+SECTION_FIELDS = (
+    'id', 'section', 'title', 'subtitle', 'content', 'content_html', 'image', 'icon', 'button_text', 'button_url',
+)
+
+
+def layout_name(page):
+    return f'page:{page}'
+
+
+def render_icon(name):
+    from .templatetags.icons import load_icon
+
+    try:
+        return load_icon(name) if name else ''
+    except TemplateDoesNotExist:
+        return ''
+
+
+def build_section(row):
+    """Template-ready section: ``row`` plus its pre-rendered ``html``, ``icon_svg`` and ``image_url``."""
+    html = render_markdown(row['content'])
+    if row['content_html']:
+        html = mark_safe(html + row['content_html'])
+    return {
+        **row,
+        'html': html,
+        'icon_svg': render_icon(row['icon']),
+        'image_url': default_storage.url(row['image']) if row['image'] else '',
+    }
+
+
+def load_layout(page):
+    """Sections of ``page`` in display order, straight from the database."""
+    from .models import PageContent
+
+    rows = PageContent.objects.filter(page=page, is_active=True).order_by('order', 'id').values(*SECTION_FIELDS)
+    return [build_section(row) for row in rows]
+
+
+def get_layout(page):
+    """Sections of ``page`` in display order, from the cache when possible."""
+    timeout = settings.FRAGMENT_CACHE_TIMEOUT
+    if not timeout:
+        return load_layout(page)
+    key = fragment_key(layout_name(page))
+    layout = cache.get(key)
+    if layout is None:
+        layout = load_layout(page)
+        cache.set(key, layout, timeout)
+    return layout
+
+
+aget_layout = sync_to_async(get_layout)
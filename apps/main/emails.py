@@ -0,0 +1,256 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+from threading import Lock
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.template import engines
+from django.utils import timezone
+
+
+# Tags that never get a closing tag, so they are not pushed on the stack.
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+CSS_RULE_RE = re.compile(r'([^{}@]+)\{([^{}]*)\}')
+CSS_AT_BLOCK_RE = re.compile(r'@[^{]+\{(?:[^{}]*\{[^{}]*\})*[^{}]*\}', re.S)
+SIMPLE_SELECTOR_RE = re.compile(r'^([a-z][a-z0-9]*)?((?:\.[\w-]+)*)$', re.I)
+
+BODY_RE = re.compile(r'<body[^>]*>(.*)</body>', re.S | re.I)
+LINK_RE = re.compile(r'<a\s[^>]*href="(?!#)([^"]+)"[^>]*>(.*?)</a>', re.S | re.I)
+BREAK_RE = re.compile(r'<br\s*/?>|</(?:p|div|h[1-6]|li|tr)>', re.I)
+TAG_RE = re.compile(r'<[^>]+>')
+
+
+def _parse_compound(selector):
+    """Parse a compound selector (``tag``, ``.cls`` or ``tag.cls``) into (tag, classes)."""
+    match = SIMPLE_SELECTOR_RE.match(selector)
+    if not match or not selector:
+        return None
+    tag = (match.group(1) or '').lower() or None
+    classes = frozenset(c for c in match.group(2).split('.') if c)
+    return tag, classes
+
+
+def _specificity(parts):
+    """Return a sortable specificity for a list of compound selectors."""
+    return (sum(len(classes) for _, classes in parts), sum(1 for tag, _ in parts if tag))
+
+
+def parse_css_rules(css):
+    """
+    Parse a stylesheet into inlinable rules.
+    Only simple and descendant selectors made of tags and classes are kept;
+    at-rules (media queries) and anything fancier stay in the <style> block.
+    """
+    css = CSS_COMMENT_RE.sub('', css)
+    css = CSS_AT_BLOCK_RE.sub('', css)
+    rules = []
+    for index, (selectors, body) in enumerate(CSS_RULE_RE.findall(css)):
+        declarations = '; '.join(d.strip() for d in body.split(';') if d.strip())
+        if not declarations:
+            continue
+        for selector in selectors.split(','):
+            parts = [_parse_compound(p) for p in selector.split()]
+            if not parts or None in parts:
+                continue
+            rules.append((_specificity(parts), index, parts, declarations))
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+    return [(parts, declarations) for _, _, parts, declarations in rules]
+
+
+def _matches(compound, tag, classes):
+    rule_tag, rule_classes = compound
+    return (rule_tag is None or rule_tag == tag) and rule_classes <= classes
+
+
+class _CSSInliner(HTMLParser):
+    """Walk the template source and compute the inline style of every start tag."""
+
+    def __init__(self, rules):
+        super().__init__(convert_charrefs=False)
+        self.rules = rules
+        self.stack = []
+        self.replacements = []
+
+    def handle_starttag(self, tag, attrs):
+        self._inline(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.stack.append((tag, self._classes(attrs)))
+
+    def handle_startendtag(self, tag, attrs):
+        self._inline(tag, attrs)
+
+    def handle_endtag(self, tag):
+        for position in range(len(self.stack) - 1, -1, -1):
+            if self.stack[position][0] == tag:
+                del self.stack[position:]
+                break
+
+    @staticmethod
+    def _classes(attrs):
+        return frozenset((dict(attrs).get('class') or '').split())
+
+    def _matches_rule(self, parts, tag, classes):
+        if not _matches(parts[-1], tag, classes):
+            return False
+        ancestors = iter(reversed(self.stack))
+        for compound in reversed(parts[:-1]):
+            if not any(_matches(compound, a_tag, a_classes) for a_tag, a_classes in ancestors):
+                return False
+        return True
+
+    def _inline(self, tag, attrs):
+        if tag in ('html', 'head', 'meta', 'title', 'style', 'link'):
+            return
+        classes = self._classes(attrs)
+        styles = [decl for parts, decl in self.rules if self._matches_rule(parts, tag, classes)]
+        if not styles:
+            return
+        existing = dict(attrs).get('style')
+        if existing:
+            styles.append(existing.strip().rstrip(';'))
+        original = self.get_starttag_text()
+        line, offset = self.getpos()
+        self.replacements.append((line, offset, original, self._rewrite(original, '; '.join(styles) + ';')))
+
+    @staticmethod
+    def _rewrite(start_tag, style):
+        style = style.replace('"', "'")
+        if re.search(r'\sstyle\s*=', start_tag, re.I):
+            return re.sub(r'\sstyle\s*=\s*("[^"]*"|\'[^\']*\')', f' style="{style}"', start_tag, count=1, flags=re.I)
+        closing = '/>' if start_tag.endswith('/>') else '>'
+        return f'{start_tag[:-len(closing)].rstrip()} style="{style}"{closing}'
+
+
+def inline_css(source):
+    """
+    Copy the rules of the <style> blocks of ``source`` onto the matching
+    elements' ``style`` attributes. The <style> block is kept for clients
+    honouring media queries.
+    """
+    css = '\n'.join(STYLE_BLOCK_RE.findall(source))
+    rules = parse_css_rules(css)
+    if not rules:
+        return source
+
+    parser = _CSSInliner(rules)
+    parser.feed(source)
+    parser.close()
+
+    lines = source.splitlines(keepends=True)
+    # Apply from the end so earlier offsets stay valid.
+    for line, offset, original, replacement in reversed(parser.replacements):
+        text = lines[line - 1]
+        if text[offset:offset + len(original)] == original:
+            lines[line - 1] = text[:offset] + replacement + text[offset + len(original):]
+    return ''.join(lines)
+
+
+def html_to_text(html):
+    """Build a plaintext alternative from a rendered HTML email."""
+    body = BODY_RE.search(html)
+    text = body.group(1) if body else html
+    text = LINK_RE.sub(r'\2 (\1)', text)
+    text = BREAK_RE.sub('\n', text)
+    text = TAG_RE.sub('', text)
+    text = unescape(text)
+    lines = [' '.join(line.split()) for line in text.splitlines()]
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip() + '\n'
+
+
+class EmailRenderer:
+    """
+    Render HTML emails from templates compiled once per process.
+    CSS is inlined on the template source at load time, so sending only
+    costs a template render and a plaintext conversion.
+    """
+
+    def __init__(self, using='django'):
+        self.using = using
+        self._templates = {}
+        self._lock = Lock()
+
+    def get_template(self, template_name):
+        """Return the compiled, CSS-inlined template for ``template_name``."""
+        template = self._templates.get(template_name)
+        if template is None:
+            with self._lock:
+                template = self._templates.get(template_name)
+                if template is None:
+                    engine = engines[self.using]
+                    source = engine.get_template(template_name).template.source
+                    template = engine.from_string(inline_css(source))
+                    self._templates[template_name] = template
+        return template
+
+    def clear(self):
+        """Drop compiled templates (e.g. after editing them in development)."""
+        with self._lock:
+            self._templates.clear()
+
+    def render(self, template_name, context):
+        """Render ``template_name`` and return an (html, text) pair."""
+        html = self.get_template(template_name).render(context)
+        return html, html_to_text(html)
+
+    def render_many(self, template_name, contexts):
+        """Render ``template_name`` once per context, reusing the compiled template."""
+        template = self.get_template(template_name)
+        rendered = []
+        for context in contexts:
+            html = template.render(context)
+            rendered.append((html, html_to_text(html)))
+        return rendered
+
+    def build_message(self, template_name, context, subject, to, from_email=None, **kwargs):
+        """Build a multipart message with a plaintext body and an HTML alternative."""
+        html, text = self.render(template_name, context)
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body=text,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to=to,
+            **kwargs
+        )
+        message.attach_alternative(html, 'text/html')
+        return message
+
+
+renderer = EmailRenderer()
+
+
+def build_contact_emails(contact):
+    """Return the admin notification and the user confirmation for a contact message."""
+    date = timezone.now().strftime('%d/%m/%Y à %H:%M')
+    notification = renderer.build_message(
+        'email/contact_notification.html',
+        {
+            'name': contact.name,
+            'email': contact.email,
+            'subject': contact.subject,
+            'message': contact.message,
+            'date': date,
+        },
+        subject=f"[Portfolio] Nouveau message de {contact.name}",
+        to=[settings.CONTACT_EMAIL],
+    )
+    confirmation = renderer.build_message(
+        'email/contact_confirmation.html',
+        {
+            'name': contact.name,
+            'subject': contact.subject,
+            'date': date,
+        },
+        subject=f"Reçu: {contact.subject}",
+        to=[contact.email],
+    )
+    return [notification, confirmation]
+
+
+def send_messages(email_messages, fail_silently=False):
+    """Send a batch of messages over a single backend connection."""
+    connection = get_connection(fail_silently=fail_silently)
+    return connection.send_messages(email_messages)
@@ -0,0 +1,52 @@
+"""
+Versioned template fragment cache for the site chrome (header, footer),
+the skills grid (see the ``{% fragment %}`` tag) and the PageContent
+layouts (see composition.py).
+
+Every fragment name has a version stored in the cache and its entries are
+keyed by name, version and vary-on values. Invalidating a fragment deletes
+its version, which drops all of its variants at once (e.g. the footer with
+and without social links). The models listed in ``FRAGMENT_DEPENDENCIES``
+invalidate their fragments when saved or deleted (see signals.py).
+
+With the default per-process LocMemCache, invalidation only reaches the
+current process; the others serve their copy until it expires, hence the
+short default ``FRAGMENT_CACHE_TIMEOUT`` without ``CACHE_REDIS_URL`` (and
+the system check in checks.py).
+"""
+import hashlib
+import uuid
+
+from django.core.cache import cache
+
+
+FRAGMENT_DEPENDENCIES = {
+    'header': ('main.SiteSettings',),
+    'footer': ('main.SiteSettings', 'main.SocialLink'),
+    'skills': ('main.Skill',),
+    # A section can move between pages: an edit drops every page's layout.
+    **{f'page:{page}': ('main.PageContent',) for page in ('home', 'about', 'projects', 'contact')},
+}
+
+
+def version_key(name):
+    return f'fragment-version:{name}'
+
+
+def fragment_key(name, vary_on=()):
+    """Cache key of the current version of fragment ``name`` for ``vary_on``."""
+    # add() is atomic: concurrent first renders agree on one version.
+    cache.add(version_key(name), uuid.uuid4().hex, None)
+    version = cache.get(version_key(name))
+    digest = hashlib.md5(':'.join(str(value) for value in vary_on).encode(), usedforsecurity=False).hexdigest()
+    return f'fragment:{name}:{version}:{digest}'
+
+
+def invalidate(*names):
+    """Drop every cached variant of the given fragments."""
+    cache.delete_many([version_key(name) for name in names])
+
+
+def dependents(model_label):
+    """Names of the fragments rendered from ``model_label`` rows."""
+    return [name for name, labels in FRAGMENT_DEPENDENCIES.items() if model_label in labels]
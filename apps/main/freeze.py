@@ -0,0 +1,234 @@
+"""
+Static freeze of the public pages (``FREEZE_DIR``).
+
+``freeze()`` renders home, projects, about and every published project to
+``<FREEZE_DIR>/<path>/index.html`` and copies the static and media files
+next to them, so that nginx can serve the portfolio without Django::
+
+    location / {
+        if ($args) { proxy_pass http://django; }  # ?tech=, ?after=, ...
+        root /srv/portfolio/frozen;
+        try_files $uri/index.html $uri @django;
+    }
+
+Contact, auth, chat and the HTMX partials (session, search, infinite
+scroll) still go to Django. The pages are those the views serve: since they
+are the same for every visitor (see caching.py), the frozen copy is too.
+
+Saving or deleting a model listed in ``FREEZE_DEPENDENCIES`` re-freezes the
+pages rendered from it once the transaction commits, a burst of saves
+(``FREEZE_DELAY`` seconds) at a time, on a background thread. Files are
+replaced atomically, so nginx never serves a half-written page.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.db import connections
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+# Pages to re-freeze when a row of the model is saved or deleted: 'all',
+# or names of page groups (see paths_for()).
+FREEZE_DEPENDENCIES = {
+    'main.SiteSettings': 'all',
+    'main.SocialLink': 'all',
+    'main.Project': ('home', 'projects', 'project'),
+    'main.Skill': ('home',),
+    'main.About': ('home', 'about'),
+    'main.PageContent': ('home', 'projects', 'about'),
+}
+
+
+def project_path(pk):
+    return reverse('project_detail', args=[pk])
+
+
+def public_paths():
+    """Every frozen path: the pages, then the published projects."""
+    from .models import Project
+
+    projects = Project.objects.filter(is_published=True).values_list('pk', flat=True)
+    return [reverse('home'), reverse('projects'), reverse('about')] + [project_path(pk) for pk in projects]
+
+
+def paths_for(instance):
+    """Paths rendered from ``instance`` (a saved or deleted model row)."""
+    groups = FREEZE_DEPENDENCIES.get(instance._meta.label, ())
+    if groups == 'all':
+        return public_paths()
+    # Every other group is the name of a page URL.
+    paths = [reverse(group) for group in groups if group != 'project']
+    if 'project' in groups:
+        paths.append(project_path(instance.pk))
+    return paths
+
+
+def output_file(path, directory=None):
+    return os.path.join(directory or settings.FREEZE_DIR, path.strip('/'), 'index.html')
+
+
+def write_atomic(filename, content):
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temporary = f'{filename}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, filename)
+
+
+def render(path):
+    """Response of the view serving ``path`` to an anonymous GET."""
+    base = urlsplit(settings.FREEZE_BASE_URL)
+    request = RequestFactory().get(path, secure=base.scheme == 'https', HTTP_HOST=base.netloc)
+    match = resolve(path)
+    if iscoroutinefunction(match.func):
+        return async_to_sync(match.func)(request, *match.args, **match.kwargs)
+    return match.func(request, *match.args, **match.kwargs)
+
+
+def freeze_path(path, directory=None):
+    """
+    Write the page at ``path``, or remove it if the view no longer serves
+    it (unpublished or deleted project). Returns whether a page was written.
+    """
+    from django.http import Http404
+
+    filename = output_file(path, directory)
+    try:
+        response = render(path)
+    except Http404:
+        response = None
+    if response is None or response.status_code != 200:
+        if os.path.exists(filename):
+            os.remove(filename)
+        return False
+    write_atomic(filename, response.content)
+    return True
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _freeze_many(paths, directory):
+    try:
+        return [freeze_path(path, directory) for path in paths]
+    finally:
+        connections.close_all()
+
+
+def freeze_paths(paths, directory=None, workers=1):
+    """Freeze ``paths``, split between ``workers`` processes; returns the number written."""
+    directory = directory or settings.FREEZE_DIR
+    if workers <= 1 or len(paths) <= workers:
+        return sum(freeze_path(path, directory) for path in paths)
+    chunks = [paths[i::workers] for i in range(workers)]
+    # spawn: forking a process that runs threads (server, chat writer) is unsafe.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        return sum(sum(written) for written in pool.map(_freeze_many, chunks, [directory] * workers))
+
+
+def copy_file(src, dst):
+    """Copy ``src`` unless ``dst`` is already up to date; returns the number copied."""
+    source = os.stat(src)
+    if os.path.exists(dst):
+        target = os.stat(dst)
+        if target.st_size == source.st_size and target.st_mtime >= source.st_mtime:
+            return 0
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    shutil.copy2(src, dst)
+    return 1
+
+
+def copy_assets(directory=None):
+    """Copy the static files (those collectstatic finds) and the media; returns the number copied."""
+    directory = directory or settings.FREEZE_DIR
+    static = os.path.join(directory, settings.STATIC_URL.strip('/'))
+    copied = 0
+    for finder in finders.get_finders():
+        for path, storage in finder.list(['CVS', '.*', '*~']):
+            copied += copy_file(storage.path(path), os.path.join(static, path))
+    media = os.path.join(directory, settings.MEDIA_URL.strip('/'))
+    for root, _, files in os.walk(settings.MEDIA_ROOT):
+        for name in files:
+            src = os.path.join(root, name)
+            copied += copy_file(src, os.path.join(media, os.path.relpath(src, settings.MEDIA_ROOT)))
+    return copied
+
+
+def remove_stale(directory=None):
+    """Remove the frozen pages of projects that are no longer published; returns how many."""
+    from .models import Project
+
+    projects = os.path.join(directory or settings.FREEZE_DIR, reverse('projects').strip('/'))
+    if not os.path.isdir(projects):
+        return 0
+    live = {str(pk) for pk in Project.objects.filter(is_published=True).values_list('pk', flat=True)}
+    removed = 0
+    for name in os.listdir(projects):
+        if name not in live and os.path.isfile(os.path.join(projects, name, 'index.html')):
+            shutil.rmtree(os.path.join(projects, name))
+            removed += 1
+    return removed
+
+
+def freeze(directory=None, workers=1, assets=True):
+    """Freeze every public page; returns ``(written, removed, copied)``."""
+    directory = directory or settings.FREEZE_DIR
+    written = freeze_paths(public_paths(), directory, workers)
+    removed = remove_stale(directory)
+    copied = copy_assets(directory) if assets else 0
+    return written, removed, copied
+
+
+class Refreezer:
+    """Background thread re-freezing the paths queued by model signals."""
+
+    def __init__(self, delay, workers):
+        self.delay = delay
+        self.workers = workers
+        self.pending = set()
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def schedule(self, paths):
+        with self.lock:
+            self.pending.update(paths)
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            paths, self.pending, self.timer = sorted(self.pending), set(), None
+        try:
+            freeze_paths(paths, workers=self.workers)
+        except Exception:
+            logger.exception("Re-freezing %s failed", ', '.join(paths))
+        finally:
+            connections.close_all()
+
+
+_refreezer = None
+_lock = threading.Lock()
+
+
+def get_refreezer():
+    global _refreezer
+    with _lock:
+        if _refreezer is None:
+            _refreezer = Refreezer(settings.FREEZE_DELAY, settings.FREEZE_WORKERS)
+        return _refreezer
@@ -0,0 +1,105 @@
+"""
+Image metadata stored on the model when the image is uploaded.
+
+Each field of ``IMAGE_FIELDS`` (e.g. ``Project.image``) comes with
+``<field>_width``, ``<field>_height``, ``<field>_color`` and
+``<field>_placeholder``: the dimensions, the dominant colour and a tiny
+WebP data URI (LQIP, about a hundred bytes), filled by a pre_save signal
+(see signals.py). They are not the ImageField's width_field/height_field:
+Django would open the file whenever a row with empty dimensions is loaded. Templates size the ``<img>`` and paint its placeholder from
+these columns (see the ``images`` template tags), so rendering a page never
+opens a media file and the layout does not shift when the image arrives.
+
+Images uploaded before these columns existed are covered by the
+``backfill_image_metadata`` command.
+"""
+import base64
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FIELDS = {
+    'main.Project': 'image',
+    'main.About': 'photo',
+}
+# Longest side of the placeholder, in pixels: the browser stretches (and
+# thus blurs) it to the size of the image.
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 50
+
+
+def dominant_color(image):
+    """Most common colour of an RGB image once reduced to a few, as #rrggbb."""
+    paletted = image.quantize(colors=8)
+    _, index = max(paletted.getcolors())
+    red, green, blue = paletted.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def extract(file):
+    """``{'width', 'height', 'color', 'placeholder'}`` of an image file object."""
+    from PIL import Image
+
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        # JPEG: decode at a fraction of the size, enough for a 16px thumbnail.
+        image.draft('RGB', (PLACEHOLDER_SIZE * 4, PLACEHOLDER_SIZE * 4))
+        thumbnail = image.convert('RGB')
+    file.seek(0)
+    thumbnail.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    return {
+        'width': width,
+        'height': height,
+        'color': dominant_color(thumbnail),
+        'placeholder': encode_placeholder(thumbnail),
+    }
+
+
+def encode_placeholder(thumbnail):
+    """Data URI of ``thumbnail``: WebP, or JPEG if Pillow was built without it."""
+    from PIL import features
+
+    image_format = 'WEBP' if features.check('webp') else 'JPEG'
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, image_format, quality=PLACEHOLDER_QUALITY)
+    return f'data:image/{image_format.lower()};base64,' + base64.b64encode(buffer.getvalue()).decode()
+
+
+def read_metadata(field_file):
+    """Metadata of a stored or just uploaded image, None if it cannot be read."""
+    committed = field_file._committed
+    try:
+        if committed:
+            with field_file.storage.open(field_file.name, 'rb') as f:
+                return extract(f)
+        return extract(field_file.file)
+    except (OSError, ValueError) as exc:
+        # PIL.UnidentifiedImageError is an OSError.
+        logger.warning("Cannot read image %s: %s", field_file.name, exc)
+        return None
+
+
+def metadata_values(field, metadata):
+    """Model attributes to set for ``metadata`` of image ``field`` (None clears them)."""
+    metadata = metadata or {}
+    return {
+        f'{field}_width': metadata.get('width'),
+        f'{field}_height': metadata.get('height'),
+        f'{field}_color': metadata.get('color', ''),
+        f'{field}_placeholder': metadata.get('placeholder', ''),
+    }
+
+
+def update_metadata(instance, field):
+    """Fill the metadata of ``instance.<field>`` if it is a new upload or has none yet."""
+    field_file = getattr(instance, field)
+    if not field_file:
+        values = metadata_values(field, None)
+    elif field_file._committed and getattr(instance, f'{field}_color'):
+        return
+    else:
+        values = metadata_values(field, read_metadata(field_file))
+    for name, value in values.items():
+        setattr(instance, name, value)
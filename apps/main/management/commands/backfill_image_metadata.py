@@ -0,0 +1,31 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from apps.main.images import IMAGE_FIELDS, metadata_values, read_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the dimensions, dominant colour and placeholder of images "
+        "uploaded before they were recorded at upload (see apps/main/images.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Recompute the metadata of every image")
+
+    def handle(self, *args, **options):
+        for label, field in IMAGE_FIELDS.items():
+            model = apps.get_model(label)
+            queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if not options['force']:
+                queryset = queryset.filter(**{f'{field}_color': ''})
+            updated = failed = 0
+            for obj in queryset.only('pk', field).iterator():
+                metadata = read_metadata(getattr(obj, field))
+                if metadata is None:
+                    failed += 1
+                    continue
+                # update(): no save() side effects (auto_now, signals).
+                model.objects.filter(pk=obj.pk).update(**metadata_values(field, metadata))
+                updated += 1
+            self.stdout.write(f"{label}.{field}: {updated} image(s) updated, {failed} unreadable")
@@ -0,0 +1,178 @@
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from apps.main.benchmarking import write_json
+from apps.main.readiness import warm_up
+
+DEFAULT_URLS = '/,/projects/,/about/,/contact/'
+
+# Environment of the child process for each startup mode.
+MODES = {
+    'cold': {'DEBUG': 'False', 'TEMPLATE_RELOAD': 'False', 'READINESS_WARMUP': 'False'},
+    'ready': {'DEBUG': 'False', 'TEMPLATE_RELOAD': 'False', 'READINESS_WARMUP': 'True', 'TEMPLATE_PREWARM': 'True'},
+    'reload': {'DEBUG': 'False', 'TEMPLATE_RELOAD': 'True', 'READINESS_WARMUP': 'False'},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def http_get(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+        return response.status
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure cold-start latency: each run starts a fresh process (as after "
+        "a deploy) in the given modes and times startup, warm-up, and the "
+        "first and second request to each URL. With --daphne the process is "
+        "a real Daphne server and the time from spawn to the first response "
+        "is reported. Only issues GET requests against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help="Fresh processes per mode")
+        parser.add_argument('--modes', default='cold,ready', help=f"Comma-separated subset of {', '.join(MODES)}")
+        parser.add_argument('--urls', default=DEFAULT_URLS, help="Comma-separated URLs, requested in order")
+        parser.add_argument('--daphne', action='store_true', help="Spawn Daphne and measure over HTTP")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+        parser.add_argument('--child', action='store_true', help="Internal: run one measurement and print it as JSON")
+
+    def handle(self, *args, **options):
+        urls = options['urls'].split(',')
+        if options['child']:
+            self.stdout.write(json.dumps(self.measure(urls)))
+            return
+
+        modes = options['modes'].split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+        run = self.run_daphne if options['daphne'] else self.run_child
+        results = {}
+        for mode in modes:
+            env = {**os.environ, **MODES[mode]}
+            results[mode] = self.aggregate([run(env, urls) for _ in range(options['runs'])], urls)
+
+        for mode, result in results.items():
+            self.stdout.write(
+                f"{mode:<8} startup={result['startup_ms']:>7.1f}ms warm-up={result['warmup_ms']:>6.1f}ms "
+                f"spawn-to-first-response={result['spawn_to_first_response_ms']:>7.1f}ms"
+            )
+            for url in urls:
+                self.stdout.write(
+                    f"    {url:<24} first={result['first_ms'][url]:>7.2f}ms then={result['warm_ms'][url]:>6.2f}ms"
+                )
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'coldstart',
+                'server': 'daphne' if options['daphne'] else 'test-client',
+                'runs': options['runs'],
+                'modes': results,
+            })
+
+    def measure(self, urls):
+        """Child process: time startup, warm-up and the first requests."""
+        startup = time.time() - float(os.environ['BENCH_COLDSTART_T0'])
+        start = time.perf_counter()
+        warm_up()
+        warmup = time.perf_counter() - start
+        client = Client()
+        first, warm = {}, {}
+        for timings in (first, warm):
+            for url in urls:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings[url] = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(f"{url} returned {response.status_code}")
+        return {
+            'startup': startup,
+            'warmup': warmup,
+            'spawn_to_first_response': startup + warmup + first[urls[0]],
+            'first': first,
+            'warm': warm,
+        }
+
+    def run_child(self, env, urls):
+        env['BENCH_COLDSTART_T0'] = repr(time.time())
+        completed = subprocess.run(
+            [sys.executable, sys.argv[0], 'bench_coldstart', '--child', '--urls', ','.join(urls)],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"Child run failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def run_daphne(self, env, urls):
+        """Spawn Daphne and poll the first URL until it answers."""
+        port = free_port()
+        base = f'http://127.0.0.1:{port}'
+        spawned = time.perf_counter()
+        daphne = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'portfolio.asgi:application'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            listening = None
+            while True:
+                if daphne.poll() is not None:
+                    raise CommandError("Daphne exited during startup")
+                try:
+                    with socket.create_connection(('127.0.0.1', port), timeout=1):
+                        listening = listening or time.perf_counter()
+                    break
+                except OSError:
+                    time.sleep(0.005)
+            first, warm = {}, {}
+            for timings in (first, warm):
+                for url in urls:
+                    start = time.perf_counter()
+                    try:
+                        status = http_get(base + url)
+                    except urllib.error.HTTPError as exc:
+                        status = exc.code
+                    timings[url] = time.perf_counter() - start
+                    if status != 200:
+                        raise CommandError(f"{url} returned {status}")
+                    if timings is first and url == urls[0]:
+                        first_response = time.perf_counter()
+            return {
+                # Daphne warms up before it listens: both are in 'startup'.
+                'startup': listening - spawned,
+                'warmup': 0.0,
+                'spawn_to_first_response': first_response - spawned,
+                'first': first,
+                'warm': warm,
+            }
+        finally:
+            daphne.terminate()
+            daphne.wait()
+
+    @staticmethod
+    def aggregate(samples, urls):
+        def median_ms(values):
+            return round(statistics.median(values) * 1000, 3)
+
+        return {
+            'startup_ms': median_ms([s['startup'] for s in samples]),
+            'warmup_ms': median_ms([s['warmup'] for s in samples]),
+            'spawn_to_first_response_ms': median_ms([s['spawn_to_first_response'] for s in samples]),
+            'first_ms': {url: median_ms([s['first'][url] for s in samples]) for url in urls},
+            'warm_ms': {url: median_ms([s['warm'][url] for s in samples]) for url in urls},
+        }
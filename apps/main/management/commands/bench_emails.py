@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from apps.main.emails import EmailRenderer
+
+
+class Command(BaseCommand):
+    help = "Benchmark contact email rendering: render_to_string vs the cached EmailRenderer."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Number of notifications to render")
+
+    def handle(self, *args, **options):
+        count = options['count']
+        date = timezone.now().strftime('%d/%m/%Y à %H:%M')
+        contexts = [
+            {
+                'name': f"Visiteur {i}",
+                'email': f"visiteur{i}@example.com",
+                'subject': f"Demande de devis #{i}",
+                'message': "Bonjour,\n\nJ'aimerais discuter d'un projet.\n\nMerci !",
+                'date': date,
+            }
+            for i in range(count)
+        ]
+        template_name = 'email/contact_notification.html'
+
+        start = time.perf_counter()
+        for context in contexts:
+            render_to_string(template_name, context)
+        baseline = time.perf_counter() - start
+
+        renderer = EmailRenderer()
+        start = time.perf_counter()
+        renderer.get_template(template_name)
+        load = time.perf_counter() - start
+
+        template = renderer.get_template(template_name)
+        start = time.perf_counter()
+        for context in contexts:
+            template.render(context)
+        html_only = time.perf_counter() - start
+
+        start = time.perf_counter()
+        renderer.render_many(template_name, contexts)
+        batched = time.perf_counter() - start
+
+        self.stdout.write(f"Rendered {count} notifications")
+        self.stdout.write(f"  render_to_string (html only):       {baseline:.3f}s ({count / baseline:,.0f}/s)")
+        self.stdout.write(f"  EmailRenderer load + inline CSS:    {load * 1000:.1f}ms (once)")
+        self.stdout.write(f"  EmailRenderer (html only):          {html_only:.3f}s ({count / html_only:,.0f}/s)")
+        self.stdout.write(f"  EmailRenderer.render_many (+text):  {batched:.3f}s ({count / batched:,.0f}/s)")
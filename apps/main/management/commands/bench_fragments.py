@@ -0,0 +1,111 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+
+from apps.main import metrics
+from apps.main.benchmarking import QueryCounter, percentile, seed_dataset, summarize, write_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the template render time saved per request by the fragment "
+        "cache (header, footer, skills) and by {% icon %} over {% include %}."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=50)
+        parser.add_argument('--skills', type=int, default=40)
+        parser.add_argument('--requests', type=int, default=100, help="Timed requests per page and mode")
+        parser.add_argument('--icons', type=int, default=5000, help="Renders of the icon micro-benchmark")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        metrics.install()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            seed_dataset(projects=options['projects'], skills=options['skills'])
+            from apps.main.models import Project
+            project = Project.published().first()
+            pages = [
+                ('home', reverse('home')),
+                ('projects', reverse('projects')),
+                ('about', reverse('about')),
+                ('contact', reverse('contact')),
+                ('project_detail', reverse('project_detail', args=[project.id])),
+                ('login', reverse('login')),
+            ]
+            with QueryCounter() as self.counter:
+                results = {name: self.bench_page(url, options['requests']) for name, url in pages}
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        self.stdout.write(f"{'page':<16} {'tpl uncached':>13} {'tpl cached':>11} {'saved':>9} {'queries':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<16} {result['uncached']['tpl_p50_ms']:>11.2f}ms {result['cached']['tpl_p50_ms']:>9.2f}ms "
+                f"{result['tpl_saved_ms']:>7.2f}ms {result['uncached']['queries']:>4} -> {result['cached']['queries']}"
+            )
+
+        icons = self.bench_icons(options['icons'])
+        self.stdout.write(
+            f"\n20 icons x {options['icons']}: include {icons['include_us']:.1f}us/render, "
+            f"icon tag {icons['icon_tag_us']:.1f}us/render"
+        )
+        if options['json_path']:
+            write_json(options['json_path'], {'benchmark': 'fragments', 'pages': results, 'icons': icons})
+
+    def measure(self, client, url, count):
+        tpl, latencies, queries = [], [], []
+        for _ in range(count):
+            stats = metrics.RequestStats()
+            token = metrics.current_stats.set(stats)
+            self.counter.reset()
+            start = time.perf_counter()
+            try:
+                response = client.get(url)
+            finally:
+                metrics.current_stats.reset(token)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            tpl.append(stats.timings.get('tpl', 0.0))
+            queries.append(self.counter.queries)
+        result = summarize(latencies)
+        result['tpl_p50_ms'] = round(percentile(tpl, 50) * 1000, 3)
+        result['queries'] = percentile(queries, 50)
+        return result
+
+    def bench_page(self, url, count):
+        client = Client()
+        cache.clear()
+        with override_settings(FRAGMENT_CACHE_TIMEOUT=0):
+            client.get(url)
+            uncached = self.measure(client, url, count)
+        # Warm-up fills the fragments
+        client.get(url)
+        cached = self.measure(client, url, count)
+        return {
+            'uncached': uncached,
+            'cached': cached,
+            'tpl_saved_ms': round(uncached['tpl_p50_ms'] - cached['tpl_p50_ms'], 3),
+        }
+
+    def bench_icons(self, count):
+        names = ['mail', 'github', 'linkedin', 'send', 'folder'] * 4
+        engine = engines['django']
+        include = engine.from_string(''.join(f"{{% include 'components/icons/{name}.svg' %}}" for name in names))
+        tag = engine.from_string('{% load icons %}' + ''.join(f"{{% icon '{name}' %}}" for name in names))
+        if include.render({}) != tag.render({}):
+            raise CommandError("{% icon %} output differs from {% include %}")
+        timings = {}
+        for label, template in (('include_us', include), ('icon_tag_us', tag)):
+            start = time.perf_counter()
+            for _ in range(count):
+                template.render({})
+            timings[label] = round((time.perf_counter() - start) / count * 1e6, 2)
+        return timings
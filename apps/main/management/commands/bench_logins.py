@@ -0,0 +1,175 @@
+import http.cookiejar
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.chat.loadtest import BenchAccounts, wait_for_port
+from apps.main.benchmarking import format_summary, summarize, write_json
+
+from .bench_coldstart import free_port
+
+DEFAULT_URLS = '/,/projects/,/about/'
+PASSWORD = 'bench-Password-42'
+CSRF_INPUT = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+# Settings of each mode; "inline" is hashing in the request thread, unbounded.
+MODES = {
+    'inline': {'PASSWORD_HASH_WORKERS': '0', 'PASSWORD_HASH_CONCURRENCY': '0'},
+    'pooled': {},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure page latency for other visitors during a burst of logins, "
+        "with password hashing in the request threads (inline) and in the "
+        "niced process pool with admission limits (pooled). Starts one Daphne "
+        "HTTP server per mode on the configured database; the bench_ user is "
+        "removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modes', default=','.join(MODES), help="Comma-separated subset of inline,pooled")
+        parser.add_argument('--logins', type=int, default=16, help="Concurrent login clients during the burst")
+        parser.add_argument('--page-clients', type=int, default=4, help="Concurrent page clients")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per phase")
+        parser.add_argument('--urls', default=DEFAULT_URLS, help="Comma-separated pages requested by the page clients")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f"Unknown mode(s): {', '.join(sorted(unknown))}")
+        accounts = BenchAccounts()
+        results = {}
+        try:
+            self.username = accounts.user('login', password=PASSWORD).username
+            for mode in modes:
+                results[mode] = self.run_mode(mode, options)
+        finally:
+            accounts.delete()
+
+        for mode, result in results.items():
+            self.stdout.write(f"{mode}:")
+            self.stdout.write(format_summary('  pages at rest', result['rest']))
+            self.stdout.write(format_summary('  pages during logins', result['burst']))
+            self.stdout.write(format_summary('  logins', result['logins']))
+            self.stdout.write(
+                f"  page p99 burst/rest: x{result['p99_ratio']}, logins rejected (429): {result['rejected']}, "
+                f"failed: {result['failed']}"
+            )
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'logins',
+                'recorded_at': timezone.now().isoformat(),
+                'cpus': os.cpu_count(),
+                'params': {key: options[key] for key in ('logins', 'page_clients', 'duration')},
+                'modes': results,
+            })
+
+    def run_mode(self, mode, options):
+        port = free_port()
+        env = {**os.environ, 'DEBUG': 'False', **MODES[mode]}
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'portfolio.asgi_http:application'],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f'http://127.0.0.1:{port}'
+        urls = options['urls'].split(',')
+        try:
+            try:
+                wait_for_port('127.0.0.1', port, timeout=30)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            self.login(base)  # Warm-up, and starts the hashing pool
+            rest = self.run_clients(base, urls, options, logins=0)
+            burst = self.run_clients(base, urls, options, logins=options['logins'])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        return {
+            'rest': summarize(rest['pages'], options['duration']),
+            'burst': summarize(burst['pages'], options['duration']),
+            'logins': summarize(burst['logins'], options['duration']),
+            'rejected': burst['rejected'],
+            'failed': burst['failed'],
+            'p99_ratio': round(
+                percentile_ms(burst['pages'], 99) / (percentile_ms(rest['pages'], 99) or 1), 2,
+            ),
+        }
+
+    def run_clients(self, base, urls, options, logins):
+        """Page clients (and ``logins`` login clients) for ``--duration`` seconds."""
+        result = {'pages': [], 'logins': [], 'rejected': 0, 'failed': 0}
+        deadline = time.perf_counter() + options['duration']
+        lock = threading.Lock()
+
+        def page_client(offset):
+            index = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(base + urls[index % len(urls)], timeout=60) as response:
+                        response.read()
+                    with lock:
+                        result['pages'].append(time.perf_counter() - start)
+                except (urllib.error.URLError, OSError):
+                    with lock:
+                        result['failed'] += 1
+                index += 1
+
+        def login_client():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                status = self.login(base)
+                with lock:
+                    if status == 302:
+                        result['logins'].append(time.perf_counter() - start)
+                    elif status == 429:
+                        result['rejected'] += 1
+                    else:
+                        result['failed'] += 1
+
+        threads = [threading.Thread(target=page_client, args=(i,)) for i in range(options['page_clients'])]
+        threads += [threading.Thread(target=login_client) for _ in range(logins)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def login(self, base):
+        """Log in with a fresh cookie jar; returns the status of the POST (302 on success)."""
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect(),
+        )
+        try:
+            with opener.open(base + '/accounts/login/', timeout=60) as response:
+                token = CSRF_INPUT.search(response.read().decode()).group(1)
+            data = urllib.parse.urlencode({
+                'username': self.username, 'password': PASSWORD, 'csrfmiddlewaretoken': token,
+            }).encode()
+            with opener.open(base + '/accounts/login/', data=data, timeout=60) as response:
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+        except (urllib.error.URLError, OSError, AttributeError):
+            return None
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile_ms(latencies, pct):
+    return summarize(latencies)[f'p{pct}_ms']
@@ -0,0 +1,88 @@
+import os
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.main import markup
+from apps.main.benchmarking import MARKDOWN_CORPUS, summarize, write_json
+
+
+class FreshPythonMarkdown:
+    """The former renderer: ``markdown.markdown()``, which builds a parser per call."""
+    name = 'python-markdown (per call)'
+
+    def __init__(self):
+        import markdown
+
+        self.markdown = markdown
+
+    def render(self, text):
+        return self.markdown.markdown(text, extensions=markup.MARKDOWN_EXTENSIONS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the Markdown backends (see MARKDOWN_RENDERER) on bios, project "
+        "descriptions and page sections: the built-in corpus, plus the "
+        "content of the configured database with --database-content."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=200, help="Renders of every document per backend")
+        parser.add_argument('--database-content', action='store_true', help="Also render About, Project and PageContent texts")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        documents = list(MARKDOWN_CORPUS.values())
+        if options['database_content']:
+            documents += self.database_documents()
+        size = sum(len(text) for text in documents)
+        self.stdout.write(f"{len(documents)} documents, {size / 1024:.1f} KiB, {options['rounds']} rounds")
+
+        renderers = [FreshPythonMarkdown()]
+        for name in markup.RENDERERS:
+            try:
+                renderers.append(markup.get_renderer(name))
+            except ImproperlyConfigured as exc:
+                self.stdout.write(f"  {name}: skipped ({exc})")
+
+        results = {}
+        for renderer in renderers:
+            for text in documents:  # Warm-up: imports, lazy compilation
+                renderer.render(text)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(options['rounds']):
+                for text in documents:
+                    begin = time.perf_counter()
+                    renderer.render(text)
+                    latencies.append(time.perf_counter() - begin)
+            results[renderer.name] = summary = summarize(latencies, time.perf_counter() - start)
+            summary['kib_per_s'] = round(size * options['rounds'] / 1024 / (time.perf_counter() - start), 1)
+
+        baseline = results[FreshPythonMarkdown.name]['throughput_rps']
+        self.stdout.write(f"{'backend':<28} {'docs/s':>9} {'KiB/s':>9} {'p50':>9} {'p99':>9} {'speedup':>8}")
+        for name, summary in results.items():
+            self.stdout.write(
+                f"{name:<28} {summary['throughput_rps']:>9,.0f} {summary['kib_per_s']:>9,.0f} "
+                f"{summary['p50_ms']:>7.3f}ms {summary['p99_ms']:>7.3f}ms "
+                f"{summary['throughput_rps'] / baseline:>7.1f}x"
+            )
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'markdown',
+                'recorded_at': timezone.now().isoformat(),
+                'cpus': os.cpu_count(),
+                'params': {'rounds': options['rounds'], 'documents': len(documents), 'bytes': size},
+                'backends': results,
+            })
+
+    def database_documents(self):
+        from apps.main.models import About, PageContent, Project
+
+        texts = list(About.objects.values_list('bio', flat=True))
+        texts += Project.objects.values_list('description', flat=True)
+        texts += PageContent.objects.values_list('content', flat=True)
+        return [text for text in texts if text]
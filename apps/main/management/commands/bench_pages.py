@@ -0,0 +1,181 @@
+import asyncio
+import json
+import platform
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.main.benchmarking import QueryCounter, format_summary, percentile, seed_dataset, summarize, write_json
+
+METRICS = ('p50_ms', 'p99_ms', 'queries', 'alloc_peak_kb')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and benchmark the page views (latency "
+        "percentiles, queries per request, tracemalloc peak allocations), "
+        "optionally against a stored baseline. Example of a large dataset: "
+        "--projects 5000 --skills 200 --conversations 10000 --messages 1000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--skills', type=int, default=50)
+        parser.add_argument('--conversations', type=int, default=500)
+        parser.add_argument('--messages', type=int, default=20000)
+        parser.add_argument('--requests', type=int, default=30, help="Timed requests per view")
+        parser.add_argument('--alloc-requests', type=int, default=3, help="Requests per view traced with tracemalloc")
+        parser.add_argument('--client', choices=('test', 'asgi'), default='test', help="Django test client or ASGI handler")
+        parser.add_argument('--views', help="Comma-separated subset of views to run")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+        parser.add_argument('--baseline', help="Compare against a baseline JSON written by --save-baseline")
+        parser.add_argument('--save-baseline', help="Store these results as the new baseline")
+        parser.add_argument('--tolerance', type=float, default=0.10, help="Allowed relative regression (default 10%%)")
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        self.loop = asyncio.new_event_loop()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            start = time.perf_counter()
+            admin = seed_dataset(
+                projects=options['projects'],
+                skills=options['skills'],
+                conversations=options['conversations'],
+                messages=options['messages'],
+            )
+            self.stdout.write(f"Seeded dataset in {time.perf_counter() - start:.1f}s")
+            views = self.views(admin)
+            if options['views']:
+                wanted = options['views'].split(',')
+                views = [view for view in views if view[0] in wanted]
+            # One counter for the whole run: it can only hook connections
+            # created while it is active (e.g. the sync_to_async thread's).
+            with QueryCounter() as self.counter:
+                results = {
+                    name: self.bench_view(url, options, staff)
+                    for name, url, staff in views
+                }
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            self.loop.close()
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{format_summary(name, result)} queries={result['queries']:<6} alloc={result['alloc_peak_kb']:.0f}KiB"
+            )
+
+        report = {
+            'benchmark': 'pages',
+            'recorded_at': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'client': options['client'],
+            'dataset': {key: options[key] for key in ('projects', 'skills', 'conversations', 'messages')},
+            'views': results,
+        }
+        if options['json_path']:
+            write_json(options['json_path'], report)
+        if options['save_baseline']:
+            write_json(options['save_baseline'], report)
+            self.stdout.write(f"Baseline saved to {options['save_baseline']}")
+        if options['baseline']:
+            regressions = self.compare(report, options['baseline'], options['tolerance'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+
+    def views(self, admin):
+        from apps.chat.models import Conversation
+        from apps.main.models import Project
+
+        project = Project.objects.filter(is_published=True).order_by('order', '-created_at').first()
+        conversation = Conversation.objects.order_by('-last_message_at').first()
+        views = [
+            ('home', reverse('home'), False),
+            ('projects', reverse('projects'), False),
+            ('about', reverse('about'), False),
+            ('contact', reverse('contact'), False),
+            ('admin_inbox', reverse('chat:admin_inbox'), True),
+        ]
+        if project:
+            views.append(('project_detail', reverse('project_detail', args=[project.id]), False))
+        if conversation:
+            views.append(('admin_conversation', reverse('chat:admin_conversation', args=[conversation.id]), True))
+        self.admin = admin
+        return views
+
+    def make_client(self, options, staff):
+        """Return a ``get(url)`` callable backed by the requested client."""
+        if options['client'] == 'asgi':
+            client = AsyncClient()
+            if staff:
+                self.loop.run_until_complete(client.aforce_login(self.admin))
+
+            def get(url):
+                return self.loop.run_until_complete(client.get(url))
+        else:
+            client = Client()
+            if staff:
+                client.force_login(self.admin)
+            get = client.get
+
+        def checked_get(url):
+            response = get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} returned {response.status_code}")
+            return response
+        return checked_get
+
+    def bench_view(self, url, options, staff):
+        get = self.make_client(options, staff)
+        # Warm-up (template loading, first connection)
+        get(url)
+
+        latencies = []
+        queries = []
+        for _ in range(options['requests']):
+            self.counter.reset()
+            start = time.perf_counter()
+            get(url)
+            latencies.append(time.perf_counter() - start)
+            queries.append(self.counter.queries)
+
+        peaks = []
+        for _ in range(options['alloc_requests']):
+            tracemalloc.start()
+            get(url)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        result = summarize(latencies)
+        result['queries'] = percentile(queries, 50)
+        result['alloc_peak_kb'] = round(percentile(peaks, 50) / 1024, 1) if peaks else 0.0
+        return result
+
+    def compare(self, report, baseline_path, tolerance):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('dataset') != report['dataset']:
+            self.stderr.write(f"Warning: baseline dataset {baseline.get('dataset')} differs from {report['dataset']}")
+
+        regressions = []
+        self.stdout.write(f"\nComparison with {baseline_path} (recorded {baseline.get('recorded_at')}):")
+        for name, result in report['views'].items():
+            previous = baseline.get('views', {}).get(name)
+            if not previous:
+                continue
+            deltas = []
+            for metric in METRICS:
+                old, new = previous.get(metric), result.get(metric)
+                if not old:
+                    continue
+                change = (new - old) / old
+                deltas.append(f"{metric} {change:+.0%}")
+                if change > tolerance:
+                    regressions.append(f"{name}.{metric}")
+            self.stdout.write(f"  {name:<20} " + '  '.join(deltas))
+        return regressions
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.chat.loadtest import (
+    BenchAccounts, Scenario, SocketClient, conversation_ids_for, session_key_for, wait_for_port,
+)
+from apps.main.benchmarking import format_summary, summarize, write_json
+
+from .bench_coldstart import free_port
+
+DEFAULT_URLS = '/,/projects/,/about/'
+TOPOLOGIES = ('combined', 'split')
+# Seconds the HTTP spike runs before WebSocket latency is measured.
+SPIKE_RAMP = 1.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure chat WebSocket delivery latency at rest and during an HTTP "
+        "spike, with HTTP and WebSocket served by one Daphne process "
+        "(portfolio.asgi) and by separate workers (runservers). Runs against "
+        "the configured database; bench_* users are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topologies', default=','.join(TOPOLOGIES), help="Comma-separated subset of combined,split")
+        parser.add_argument('--users', type=int, default=10, help="Chat user sockets")
+        parser.add_argument('--admin-tabs', type=int, default=1, help="Chat admin sockets")
+        parser.add_argument('--admin-watch', type=int, default=1, help="Conversations each admin tab subscribes to")
+        parser.add_argument('--rate', type=float, default=5.0, help="Chat messages per second per user")
+        parser.add_argument('--duration', type=float, default=5.0, help="Seconds of chat traffic per phase")
+        parser.add_argument('--http-clients', type=int, default=32, help="Concurrent HTTP clients during the spike")
+        parser.add_argument('--http-workers', type=int, default=2, help="HTTP workers in the split topology")
+        parser.add_argument('--http-nice', type=int, default=10, help="Niceness of the HTTP workers in the split topology")
+        parser.add_argument('--urls', default=DEFAULT_URLS, help="Comma-separated URLs requested by the spike")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+        parser.add_argument('--spike-child', metavar='BASE_URL', help="Internal: run the HTTP spike and print it as JSON")
+
+    def handle(self, *args, **options):
+        urls = options['urls'].split(',')
+        if options['spike_child']:
+            self.stdout.write(json.dumps(self.spike(options['spike_child'], urls, options)))
+            return
+
+        topologies = options['topologies'].split(',')
+        unknown = set(topologies) - set(TOPOLOGIES)
+        if unknown:
+            raise CommandError(f"Unknown topology(ies): {', '.join(sorted(unknown))}")
+
+        accounts = BenchAccounts()
+        results = {}
+        try:
+            admin = accounts.user('admin', is_staff=True)
+            users = accounts.users(options['users'])
+            self.sessions = (
+                [session_key_for(user) for user in users],
+                [session_key_for(admin) for _ in range(options['admin_tabs'])],
+            )
+            self.conversation_ids = conversation_ids_for(users)
+            for topology in topologies:
+                results[topology] = self.run_topology(topology, urls, options)
+        finally:
+            accounts.delete()
+
+        for topology, result in results.items():
+            self.stdout.write(f"{topology}:")
+            self.stdout.write(format_summary('  ws at rest', result['baseline']))
+            self.stdout.write(format_summary('  ws during HTTP spike', result['spike']))
+            self.stdout.write(format_summary('  http during spike', result['http']))
+            (rest, spike), (expected, _) = result['deliveries'], result['deliveries_expected']
+            self.stdout.write(
+                f"  ws p99 spike/rest: x{result['p99_ratio']}, deliveries {rest}/{expected} at rest, "
+                f"{spike}/{expected} during the spike"
+            )
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'benchmark': 'split_serving',
+                'recorded_at': timezone.now().isoformat(),
+                'cpus': os.cpu_count(),
+                'params': {key: options[key] for key in (
+                    'users', 'admin_tabs', 'admin_watch', 'rate', 'duration', 'http_clients', 'http_workers', 'http_nice',
+                )},
+                'topologies': results,
+            })
+
+    def start_servers(self, topology, options):
+        """Start the servers; return ``(processes, http_port, ws_port)``."""
+        env = {**os.environ, 'DEBUG': 'False'}
+        if topology == 'combined':
+            port = free_port()
+            command = [sys.executable, '-m', 'daphne', '-b', '127.0.0.1', '-p', str(port), 'portfolio.asgi:application']
+            http_port = ws_port = port
+        else:
+            http_port, ws_port = free_port(), free_port()
+            command = [
+                sys.executable, sys.argv[0], 'runservers', '--http-port', str(http_port), '--ws-port', str(ws_port),
+                '--http-workers', str(options['http_workers']), '--ws-workers', '1', '--http-nice', str(options['http_nice']),
+            ]
+        server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            for port in {http_port, ws_port}:
+                wait_for_port('127.0.0.1', port, timeout=30)
+        except RuntimeError as exc:
+            server.terminate()
+            raise CommandError(str(exc))
+        return server, http_port, ws_port
+
+    def run_topology(self, topology, urls, options):
+        server, http_port, ws_port = self.start_servers(topology, options)
+        base = f'http://127.0.0.1:{http_port}'
+        ws_url = f'ws://127.0.0.1:{ws_port}/ws/chat/'
+        try:
+            for url in urls:
+                urllib.request.urlopen(base + url, timeout=30).read()
+            baseline = asyncio.run(self.chat(ws_url, options))
+            spike = subprocess.Popen(
+                [
+                    sys.executable, sys.argv[0], 'bench_split', '--spike-child', base, '--urls', ','.join(urls),
+                    '--http-clients', str(options['http_clients']),
+                    '--duration', str(options['duration'] + 2 * SPIKE_RAMP),
+                ],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            time.sleep(SPIKE_RAMP)
+            during = asyncio.run(self.chat(ws_url, options))
+            out, err = spike.communicate()
+            if spike.returncode:
+                raise CommandError(f"HTTP spike failed:\n{err}")
+            http = json.loads(out.strip().splitlines()[-1])
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        return {
+            'baseline': baseline['delivery_latency'],
+            'spike': during['delivery_latency'],
+            'deliveries': [baseline['deliveries'], during['deliveries']],
+            'deliveries_expected': [baseline['deliveries_expected'], during['deliveries_expected']],
+            'http': http,
+            'p99_ratio': round(during['delivery_latency']['p99_ms'] / (baseline['delivery_latency']['p99_ms'] or 1), 2),
+        }
+
+    async def chat(self, url, options):
+        user_keys, admin_keys = self.sessions
+        scenario = Scenario(
+            [SocketClient(url, key) for key in user_keys],
+            [SocketClient(url, key) for key in admin_keys],
+            messages=max(1, int(options['rate'] * options['duration'])),
+            rate=options['rate'],
+            conversation_ids=self.conversation_ids,
+            admin_watch=options['admin_watch'],
+        )
+        return await scenario.run()
+
+    def spike(self, base, urls, options):
+        """Child process: ``--http-clients`` threads requesting ``urls`` in a loop."""
+        latencies, errors = [], []
+        deadline = time.perf_counter() + options['duration']
+
+        def client(offset):
+            index = offset
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(base + urls[index % len(urls)], timeout=30) as response:
+                        response.read()
+                    latencies.append(time.perf_counter() - start)
+                except (urllib.error.URLError, OSError) as exc:
+                    errors.append(str(exc))
+                index += 1
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(options['http_clients'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        summary = summarize(latencies, time.perf_counter() - start)
+        summary['errors'] = len(errors)
+        return summary
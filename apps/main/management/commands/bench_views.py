@@ -0,0 +1,75 @@
+import asyncio
+import json
+import time
+from types import ModuleType
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import include, path
+
+from apps.main import async_views, views
+from apps.main import urls as main_urls
+from apps.main.benchmarking import format_summary, summarize, write_json
+from apps.main.models import Project
+
+PAGE_VIEWS = ('home', 'projects', 'project_detail', 'about')
+
+
+def build_urlconf(name, page_views):
+    """Build a root urlconf serving the public pages with ``page_views``."""
+    patterns = []
+    for pattern in main_urls.urlpatterns:
+        callback = pattern.callback
+        if pattern.name in PAGE_VIEWS:
+            callback = getattr(page_views, pattern.name)
+        patterns.append(path(str(pattern.pattern), callback, name=pattern.name))
+    patterns.append(path('chat/', include('apps.chat.urls')))
+    module = ModuleType(name)
+    module.urlpatterns = patterns
+    return module
+
+
+class Command(BaseCommand):
+    help = "Load-test the public pages with the sync and the async views through the ASGI handler."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per view and mode")
+        parser.add_argument('--concurrency', type=int, default=100, help="Concurrent in-flight requests")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        project = Project.objects.filter(is_published=True).first()
+        urls = {'home': '/', 'projects': '/projects/', 'about': '/about/'}
+        if project:
+            urls['project_detail'] = f'/projects/{project.id}/'
+
+        results = {}
+        for mode, page_views in (('sync', views), ('async', async_views)):
+            with override_settings(ROOT_URLCONF=build_urlconf(f'bench_{mode}_urls', page_views)):
+                for view_name, url in urls.items():
+                    summary = asyncio.run(self.run(url, options['requests'], options['concurrency']))
+                    results[f'{view_name}.{mode}'] = summary
+                    self.stdout.write(format_summary(f'{view_name} [{mode}]', summary))
+
+        if options['json_path']:
+            write_json(options['json_path'], results)
+        elif options['verbosity'] > 1:
+            self.stdout.write(json.dumps(results, indent=2))
+
+    async def run(self, url, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} returned {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return summarize(latencies, time.perf_counter() - start)
@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.freeze import freeze, freeze_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public pages (home, projects, about, published projects) "
+        "to static HTML with the static and media files, for nginx to serve "
+        "(see apps/main/freeze.py). Pass paths to re-freeze only those."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help="Paths to re-freeze, e.g. /about/ (default: every page)")
+        parser.add_argument('--output', default=settings.FREEZE_DIR, help="Output directory (default: FREEZE_DIR)")
+        parser.add_argument('--workers', type=int, default=settings.FREEZE_WORKERS, help="Rendering processes")
+        parser.add_argument('--no-assets', action='store_true', help="Do not copy the static and media files")
+
+    def handle(self, *args, **options):
+        if not options['output']:
+            raise CommandError("Set FREEZE_DIR or pass --output")
+        start = time.perf_counter()
+        if options['paths']:
+            written = freeze_paths(options['paths'], options['output'], options['workers'])
+            self.stdout.write(f"Froze {written}/{len(options['paths'])} page(s) in {time.perf_counter() - start:.2f}s")
+            return
+        written, removed, copied = freeze(options['output'], options['workers'], not options['no_assets'])
+        self.stdout.write(
+            f"Froze {written} page(s) with {options['workers']} worker(s) in {time.perf_counter() - start:.2f}s: "
+            f"{removed} stale page(s) removed, {copied} asset(s) copied to {options['output']}"
+        )
@@ -0,0 +1,95 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.benchmarking import write_json
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# importlib.import_module() (used by django.setup() to load apps, models,
+# the URLconf...) bypasses the C import path that -X importtime logs, so
+# the child routes it through __import__.
+CHILD_PRELUDE = """
+import importlib, importlib.util, sys
+def import_module(name, package=None):
+    name = importlib.util.resolve_name(name, package) if name.startswith('.') else name
+    __import__(name)
+    return sys.modules[name]
+importlib.import_module = import_module
+"""
+
+TARGETS = {
+    'asgi': "import portfolio.asgi",
+    'wsgi': "import portfolio.wsgi",
+    'setup': "import django; django.setup()",
+    'first-request': (
+        "import django; django.setup()\n"
+        "from django.test import Client; Client().get('/')"
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a fresh interpreter with -X importtime on an entry point and "
+        "report the slowest imports (cumulative and self time) and the time "
+        "per top-level package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='asgi')
+        parser.add_argument('--top', type=int, default=25, help="Number of modules to list")
+        parser.add_argument('--json', dest='json_path', help="Write results as JSON to this file")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'portfolio.settings')}
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', CHILD_PRELUDE + TARGETS[options['target']]],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"Import of {options['target']} failed:\n{completed.stderr}")
+        modules = self.parse(completed.stderr)
+        top = options['top']
+
+        total = sum(module['self_us'] for module in modules)
+        self.stdout.write(f"{len(modules)} modules imported in {total / 1000:.1f}ms ({options['target']})\n")
+        self.stdout.write("Slowest imports (cumulative):")
+        for module in sorted(modules, key=lambda m: m['cumulative_us'], reverse=True)[:top]:
+            self.stdout.write(f"  {module['cumulative_us'] / 1000:>8.1f}ms  {module['name']}")
+        self.stdout.write("\nSlowest modules (self):")
+        for module in sorted(modules, key=lambda m: m['self_us'], reverse=True)[:top]:
+            self.stdout.write(f"  {module['self_us'] / 1000:>8.1f}ms  {module['name']}")
+
+        packages = defaultdict(int)
+        for module in modules:
+            packages[module['name'].split('.')[0]] += module['self_us']
+        self.stdout.write("\nTime per top-level package:")
+        for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+            self.stdout.write(f"  {self_us / 1000:>8.1f}ms  {package}")
+
+        if options['json_path']:
+            write_json(options['json_path'], {
+                'target': options['target'],
+                'total_ms': round(total / 1000, 3),
+                'modules': modules,
+                'packages_ms': {package: round(us / 1000, 3) for package, us in packages.items()},
+            })
+
+    @staticmethod
+    def parse(output):
+        modules = []
+        for line in output.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                modules.append({
+                    'name': match.group(4),
+                    'self_us': int(match.group(1)),
+                    'cumulative_us': int(match.group(2)),
+                    'depth': len(match.group(3)) // 2,
+                })
+        return modules
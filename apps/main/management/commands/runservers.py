@@ -0,0 +1,131 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.chat.writebehind import WORKER_BITS
+
+ROLES = {
+    'http': 'portfolio.asgi_http:application',
+    'ws': 'portfolio.asgi_ws:application',
+}
+
+# A worker dying sooner than this after its start is not restarted in a
+# tight loop: the launcher waits this long first.
+RESTART_DELAY = 1.0
+
+
+def listen(host, port, backlog=1024):
+    """Listening socket shared (inherited) by all the workers of a role."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Command(BaseCommand):
+    help = (
+        "Run N Daphne workers of the HTTP-only application and M workers of "
+        "the WebSocket-only application. Each role listens on its own port; "
+        "its workers share the listening socket, so the kernel spreads "
+        "connections between them. Dead workers are restarted; SIGTERM and "
+        "SIGINT stop them all."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1', help="Address to listen on")
+        parser.add_argument('--http-port', type=int, default=8000)
+        parser.add_argument('--ws-port', type=int, default=8001)
+        parser.add_argument('--http-workers', type=int, default=2)
+        parser.add_argument('--ws-workers', type=int, default=1)
+        parser.add_argument(
+            '--http-nice', type=int, default=0,
+            help="Niceness of the HTTP workers: on a shared host, a page spike then cannot starve the chat workers",
+        )
+        parser.add_argument('--proxy-headers', action='store_true', help="Passed on to Daphne")
+
+    def handle(self, *args, **options):
+        counts = {'http': options['http_workers'], 'ws': options['ws_workers']}
+        if sum(counts.values()) > 1 << WORKER_BITS:
+            raise CommandError(
+                f"At most {1 << WORKER_BITS} workers in all: their numbers (CHAT_ID_WORKER) "
+                "go into the chat message ids, which have room for no more."
+            )
+        if counts['ws'] > 1 and settings.CHANNEL_LAYERS['default']['BACKEND'].endswith('InMemoryChannelLayer'):
+            raise CommandError(
+                "Several WebSocket workers need a shared channel layer (set CHANNEL_REDIS_URL): "
+                "with the in-memory layer admins would only see the conversations of their own worker."
+            )
+        sockets = {}
+        try:
+            for role, port in (('http', options['http_port']), ('ws', options['ws_port'])):
+                if counts[role]:
+                    sockets[role] = listen(options['bind'], port)
+        except OSError as exc:
+            raise CommandError(f"Cannot listen: {exc}")
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        # Worker numbers are unique across roles: they keep chat message
+        # ids unique (CHAT_ID_WORKER) and survive restarts.
+        workers = {}
+        index = 0
+        for role, sock in sockets.items():
+            for _ in range(counts[role]):
+                workers[self.spawn(role, sock, options, index)] = (role, index, time.monotonic())
+                index += 1
+            self.stdout.write(
+                f"{role}: {counts[role]} worker(s) on {options['bind']}:{sock.getsockname()[1]} ({ROLES[role]})"
+            )
+        if 'http' in sockets and 'ws' in sockets and not settings.CHAT_WS_URL:
+            self.stdout.write(
+                f"Chat pages open /ws/chat/ on their own host: route /ws/ to port {options['ws_port']} "
+                "(docs/WEBSOCKET.md) or set CHAT_WS_URL"
+            )
+
+        try:
+            while not self.stopping:
+                time.sleep(0.2)
+                for worker, (role, index, started) in list(workers.items()):
+                    if worker.poll() is None or self.stopping:
+                        continue
+                    del workers[worker]
+                    self.stderr.write(f"{role} worker {worker.pid} exited with {worker.returncode}, restarting")
+                    if time.monotonic() - started < RESTART_DELAY:
+                        time.sleep(RESTART_DELAY)
+                    workers[self.spawn(role, sockets[role], options, index)] = (role, index, time.monotonic())
+        finally:
+            for worker in workers:
+                if worker.poll() is None:
+                    worker.terminate()
+            for worker in workers:
+                try:
+                    worker.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    worker.kill()
+            for sock in sockets.values():
+                sock.close()
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def spawn(self, role, sock, options, index):
+        command = [sys.executable, '-m', 'daphne', '--fd', str(sock.fileno())]
+        if options['proxy_headers']:
+            command.append('--proxy-headers')
+        nice = options['http_nice'] if role == 'http' else 0
+        return subprocess.Popen(
+            [*command, ROLES[role]],
+            env={**os.environ, 'SERVER_ROLE': role, 'CHAT_ID_WORKER': str(index)},
+            pass_fds=[sock.fileno()],
+            preexec_fn=(lambda: os.nice(nice)) if nice else None,
+        )
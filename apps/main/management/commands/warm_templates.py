@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.main.template_loading import warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every template and report the time taken and any template "
+        "that fails to compile. The servers do the same at startup when "
+        "TEMPLATE_PREWARM is set; run this as a deploy check."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fail-on-error', action='store_true', help="Exit with an error if a template fails to compile")
+
+    def handle(self, *args, **options):
+        count, seconds, errors = warm_templates()
+        for name, exc in errors.items():
+            self.stderr.write(f"{name}: {exc}")
+        self.stdout.write(f"Compiled {count} templates in {seconds * 1000:.1f}ms ({len(errors)} failed)")
+        if errors and options['fail_on_error']:
+            raise CommandError(f"{len(errors)} template(s) failed to compile")
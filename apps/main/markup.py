@@ -0,0 +1,115 @@
+"""
+Markdown rendering.
+
+``MARKDOWN_RENDERER`` picks the backend: Python-Markdown (the default,
+with the fenced_code and tables extensions), or the faster markdown-it-py
+or mistune when installed (both are in requirements-dev.txt). All of them
+render the same HTML for the content of this site (see the corpus in
+benchmarking.py and the bench_markdown command); they differ on edge cases
+of the syntax, which is CommonMark for the latter two.
+
+Python-Markdown builds its parser and loads its extensions for every
+``markdown.markdown()`` call: the renderer keeps one configured instance
+per thread instead and resets it between documents.
+
+The backend package is imported on first use, so processes that never
+render Markdown (e.g. WebSocket-only workers) do not pay for it at
+startup; HTTP processes load it during warm-up (see readiness.py).
+"""
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.safestring import mark_safe
+
+from .metrics import timed
+
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables']
+
+
+class PythonMarkdownRenderer:
+    """Python-Markdown, one reusable ``Markdown`` instance per thread (they are not thread-safe)."""
+    name = 'python-markdown'
+
+    def __init__(self):
+        import markdown
+
+        self.markdown = markdown
+        self.local = threading.local()
+
+    def render(self, text):
+        md = getattr(self.local, 'md', None)
+        if md is None:
+            md = self.local.md = self.markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        try:
+            return md.convert(text)
+        finally:
+            md.reset()
+
+
+class MarkdownItRenderer:
+    """markdown-it-py: CommonMark plus tables (fenced code is core syntax)."""
+    name = 'markdown-it'
+
+    def __init__(self):
+        from markdown_it import MarkdownIt
+
+        # Rendering does not mutate the parser: one instance serves every thread.
+        self.md = MarkdownIt('commonmark', {'html': True}).enable('table')
+
+    def render(self, text):
+        return self.md.render(text)
+
+
+class MistuneRenderer:
+    """mistune 3 with its table plugin."""
+    name = 'mistune'
+
+    def __init__(self):
+        import mistune
+
+        self.md = mistune.create_markdown(escape=False, plugins=['table'])
+
+    def render(self, text):
+        return self.md(text)
+
+
+RENDERERS = {
+    renderer.name: renderer
+    for renderer in (PythonMarkdownRenderer, MarkdownItRenderer, MistuneRenderer)
+}
+
+_renderers = {}
+_lock = threading.Lock()
+
+
+def get_renderer(name=None):
+    """The renderer of backend ``name`` (default: ``MARKDOWN_RENDERER``), built once."""
+    name = name or settings.MARKDOWN_RENDERER
+    renderer = _renderers.get(name)
+    if renderer is not None:
+        return renderer
+    if name not in RENDERERS:
+        raise ImproperlyConfigured(f"Unknown MARKDOWN_RENDERER {name!r}; choose one of {', '.join(RENDERERS)}.")
+    with _lock:
+        if name not in _renderers:
+            try:
+                _renderers[name] = RENDERERS[name]()
+            except ImportError as exc:
+                raise ImproperlyConfigured(f"MARKDOWN_RENDERER {name!r} is not installed: {exc}")
+        return _renderers[name]
+
+
+def render_markdown(text):
+    """Convert Markdown ``text`` to safe HTML ('' for empty text)."""
+    if not text:
+        return ''
+    renderer = get_renderer()
+    with timed('md'):
+        return mark_safe(renderer.render(text))
+
+
+def load():
+    """Import the Markdown backend ahead of the first render."""
+    render_markdown('*warm-up*')
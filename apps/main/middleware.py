@@ -0,0 +1,78 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Record per-request view name, DB query count and time, template and
+    markdown render time and response size, aggregate them into the
+    metrics registry and expose them in a ``Server-Timing`` header.
+    Removed from the chain entirely unless ``METRICS_ENABLED`` is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metrics.metrics_enabled():
+            raise MiddlewareNotUsed
+        metrics.install()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name or match._func_path
+
+    def record(self, request, response, stats, duration):
+        view = self.view_name(request)
+        template_time = stats.timings.get('tpl', 0.0)
+        markdown_time = stats.timings.get('md', 0.0)
+
+        metrics.http_requests.inc(view=view, method=request.method, status=str(response.status_code))
+        metrics.http_request_duration.observe(duration, view=view)
+        metrics.http_db_queries.observe(stats.queries, view=view)
+        metrics.http_db_duration.observe(stats.db_time, view=view)
+        metrics.http_template_duration.observe(template_time, view=view)
+        if markdown_time:
+            metrics.http_markdown_duration.observe(markdown_time, view=view)
+        if not response.streaming:
+            metrics.http_response_size.observe(len(response.content), view=view)
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries"',
+            f'tpl;dur={template_time * 1000:.2f}',
+            f'md;dur={markdown_time * 1000:.2f}',
+            f'total;dur={duration * 1000:.2f}',
+        ])
@@ -0,0 +1,63 @@
+from django.db import migrations
+
+
+def run_fts_sql(statements):
+    """
+    RunPython callable executing ``statements`` when the database is SQLite
+    with FTS5 (kept here rather than imported: migrations must not depend
+    on application code that may change).
+    """
+    def run(apps, schema_editor):
+        connection = schema_editor.connection
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+# Standalone FTS5 index (Project has a UUID primary key, so the index
+# cannot share rowids with main_project); triggers keep it in sync.
+PROJECT_FTS_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS main_project_fts USING fts5(
+        project_id UNINDEXED, title, short_description, description, technologies,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS main_project_fts_ai AFTER INSERT ON main_project BEGIN
+        INSERT INTO main_project_fts (project_id, title, short_description, description, technologies)
+        VALUES (new.id, new.title, new.short_description, new.description, new.technologies);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_project_fts_ad AFTER DELETE ON main_project BEGIN
+        DELETE FROM main_project_fts WHERE project_id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS main_project_fts_au
+    AFTER UPDATE OF title, short_description, description, technologies ON main_project BEGIN
+        DELETE FROM main_project_fts WHERE project_id = old.id;
+        INSERT INTO main_project_fts (project_id, title, short_description, description, technologies)
+        VALUES (new.id, new.title, new.short_description, new.description, new.technologies);
+    END""",
+    """INSERT INTO main_project_fts (project_id, title, short_description, description, technologies)
+        SELECT id, title, short_description, description, technologies FROM main_project""",
+]
+
+PROJECT_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS main_project_fts_ai",
+    "DROP TRIGGER IF EXISTS main_project_fts_ad",
+    "DROP TRIGGER IF EXISTS main_project_fts_au",
+    "DROP TABLE IF EXISTS main_project_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_alter_project_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_fts_sql(PROJECT_FTS_SQL), run_fts_sql(PROJECT_FTS_DROP_SQL)),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def split_technologies(value):
+    return [tech.strip() for tech in (value or '').split(',') if tech.strip()]
+
+
+def populate_tags(apps, schema_editor):
+    """Create Technology rows from the comma-separated strings and link them."""
+    Project = apps.get_model('main', 'Project')
+    Technology = apps.get_model('main', 'Technology')
+
+    by_name = {}
+    used_slugs = set(Technology.objects.values_list('slug', flat=True))
+    for technology in Technology.objects.all():
+        by_name[technology.name.lower()] = technology
+
+    for project in Project.objects.all():
+        tags = []
+        for name in split_technologies(project.technologies):
+            technology = by_name.get(name.lower())
+            if technology is None:
+                base = slugify(name) or 'tech'
+                slug, index = base, 2
+                while slug in used_slugs:
+                    slug, index = f"{base}-{index}", index + 1
+                used_slugs.add(slug)
+                technology = by_name[name.lower()] = Technology.objects.create(name=name, slug=slug)
+            if technology not in tags:
+                tags.append(technology)
+        project.tags.set(tags)
+
+
+def restore_strings(apps, schema_editor):
+    Project = apps.get_model('main', 'Project')
+    for project in Project.objects.prefetch_related('tags'):
+        project.technologies = ', '.join(tag.name for tag in project.tags.all())
+        project.save(update_fields=['technologies'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_technology_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tags, restore_strings),
+    ]
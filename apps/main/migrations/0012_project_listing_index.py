@@ -0,0 +1,17 @@
+# Generated by Django 5.2.11 on 2026-10-19 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_populate_technology_tags'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['order', '-created_at', 'id'], name='main_project_listing_idx'),
+        ),
+    ]
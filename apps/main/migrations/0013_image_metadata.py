@@ -0,0 +1,68 @@
+# Generated by Django 5.2.11 on 2026-10-19 10:37
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+project_fts = import_module('apps.main.migrations.0009_project_fts')
+
+# Adding these columns makes SQLite rebuild main_project, which drops the
+# full-text index triggers of 0009: create them again afterwards (and
+# after the rebuild that removing the columns causes when unapplied).
+PROJECT_FTS_TRIGGERS_SQL = [
+    statement for statement in project_fts.PROJECT_FTS_SQL
+    if statement.startswith('CREATE TRIGGER')
+]
+restore_fts_triggers = project_fts.run_fts_sql(PROJECT_FTS_TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_project_listing_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts_triggers),
+        migrations.AddField(
+            model_name='about',
+            name='photo_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Photo Color'),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='photo_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Photo Height'),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='photo_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Photo Placeholder'),
+        ),
+        migrations.AddField(
+            model_name='about',
+            name='photo_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Photo Width'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_color',
+            field=models.CharField(blank=True, editable=False, max_length=7, verbose_name='Image Color'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Image Height'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Image Placeholder'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Image Width'),
+        ),
+        migrations.RunPython(restore_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,7 @@
 from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce, NullIf, Substr
+from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.models import AbstractUser
 
@@ -56,6 +59,14 @@ class SiteSettings(models.Model):
             instance = cls.objects.create()
         return instance
 
+    @classmethod
+    async def aget_instance(cls):
+        """Async version of get_instance()."""
+        instance = await cls.objects.afirst()
+        if not instance:
+            instance = await cls.objects.acreate()
+        return instance
+
 
 class PageContent(models.Model):
     """Model for customizable page content sections."""
@@ -108,6 +119,43 @@ class PageContent(models.Model):
         return f"{self.get_page_display()} - {self.get_section_display()}"
 
 
+class Technology(models.Model):
+    """Model representing a technology tag attached to projects."""
+    name = models.CharField(_("Name"), max_length=100, unique=True)
+    slug = models.SlugField(_("Slug"), max_length=100, unique=True)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name = _("Technology")
+        verbose_name_plural = _("Technologies")
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = unique_slug(Technology, self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def facets(cls):
+        """Technologies used by published projects with their project count (one grouped query)."""
+        return (
+            cls.objects.filter(projects__is_published=True)
+            .annotate(project_count=models.Count('projects'))
+            .order_by('-project_count', 'name')
+        )
+
+
+def unique_slug(model, name):
+    """Slugify ``name``, suffixing it until it is unused for ``model``."""
+    base = slugify(name) or 'tech'
+    slug, index = base, 2
+    while model.objects.filter(slug=slug).exists():
+        slug, index = f"{base}-{index}", index + 1
+    return slug
+
+
 class Project(models.Model):
     """Model representing a portfolio project."""
     id = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
@@ -115,9 +163,18 @@ class Project(models.Model):
     short_description = models.TextField(_("Short Description"), blank=True)
     description = models.TextField(_("Description"))
     image = models.ImageField(_("Image"), upload_to='projects/', blank=True, null=True)
+    # Stored at upload so that rendering never opens the file (see images.py);
+    # no width_field/height_field, which would open it on every instantiation.
+    image_width = models.PositiveIntegerField(_("Image Width"), null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(_("Image Height"), null=True, blank=True, editable=False)
+    image_color = models.CharField(_("Image Color"), max_length=7, blank=True, editable=False)
+    image_placeholder = models.TextField(_("Image Placeholder"), blank=True, editable=False)
     link = models.URLField(_("Project Link"), blank=True, null=True)
     github_link = models.URLField(_("GitHub Link"), blank=True, null=True)
-    technologies = models.CharField(_("Technologies"), max_length=500, help_text=_("Comma-separated list of technologies"))
+    tags = models.ManyToManyField(Technology, verbose_name=_("Technologies"), related_name='projects', blank=True)
+    # Denormalized copy of the tag names, kept by the tags m2m_changed signal
+    # for the full-text index (main_project_fts triggers).
+    technologies = models.CharField(_("Technologies"), max_length=500, blank=True, editable=False, help_text=_("Comma-separated list of technologies"))
     
     # Flags
     is_published = models.BooleanField(_("Is Published"), default=True)
@@ -130,17 +187,46 @@ class Project(models.Model):
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
     updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
 
+    # Display order; the id makes it a unique key for keyset pagination.
+    LISTING_ORDER = ('order', '-created_at', 'id')
+    SUMMARY_LENGTH = 300
+
     class Meta:
         ordering = ['order', '-created_at']
+        indexes = [models.Index(fields=['order', '-created_at', 'id'], name='main_project_listing_idx')]
         verbose_name = _("Project")
         verbose_name_plural = _("Projects")
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def listing(cls):
+        """
+        Projects for cards: the (large) description is deferred and replaced
+        by a ``summary`` annotation (short description, else the start of
+        the description); tags are prefetched.
+        """
+        summary = Coalesce(
+            NullIf('short_description', Value('')),
+            Substr('description', 1, cls.SUMMARY_LENGTH),
+            output_field=models.TextField(),
+        )
+        return cls.objects.defer('description').annotate(summary=summary).prefetch_related('tags')
+
+    @classmethod
+    def published(cls, tech=None, featured=False):
+        """Published projects in display order, optionally for one technology slug or featured only."""
+        queryset = cls.listing().filter(is_published=True)
+        if tech:
+            queryset = queryset.filter(tags__slug=tech)
+        if featured:
+            queryset = queryset.filter(featured=True)
+        return queryset.order_by(*cls.LISTING_ORDER)
+
     def get_technologies_list(self):
-        """Return technologies as a list."""
-        return [tech.strip() for tech in self.technologies.split(',') if tech.strip()]
+        """Return technology names (uses prefetched tags when available)."""
+        return [tag.name for tag in self.tags.all()]
 
 
 class Skill(models.Model):
@@ -176,6 +262,11 @@ class About(models.Model):
     title = models.CharField(_("Title"), max_length=200, default=_("About Me"))
     bio = models.TextField(_("Biography"))
     photo = models.ImageField(_("Photo"), upload_to='about/', blank=True, null=True)
+    # Stored at upload so that rendering never opens the file (see images.py).
+    photo_width = models.PositiveIntegerField(_("Photo Width"), null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(_("Photo Height"), null=True, blank=True, editable=False)
+    photo_color = models.CharField(_("Photo Color"), max_length=7, blank=True, editable=False)
+    photo_placeholder = models.TextField(_("Photo Placeholder"), blank=True, editable=False)
     resume = models.FileField(_("Resume/CV"), upload_to='resumes/', blank=True, null=True)
     updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
 
@@ -197,6 +288,17 @@ class About(models.Model):
             )
         return instance
 
+    @classmethod
+    async def aget_instance(cls):
+        """Async version of get_instance()."""
+        instance = await cls.objects.afirst()
+        if not instance:
+            instance = await cls.objects.acreate(
+                title=cls._meta.get_field('title').get_default(),
+                bio=""
+            )
+        return instance
+
 
 class Contact(models.Model):
     """Model representing a contact message."""
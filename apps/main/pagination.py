@@ -0,0 +1,93 @@
+"""
+Keyset (seek) pagination.
+
+A page is addressed by an opaque cursor holding the sort key of its last
+row, so every page costs the same indexed range scan as the first one (no
+OFFSET) and rows inserted meanwhile do not shift between pages. The sort
+key must be unique: end it with the primary key.
+"""
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class Page:
+    """One page of results and the cursor of the next one (None on the last page)."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+class KeysetPaginator:
+    """
+    Paginate ``queryset`` on ``keys`` (field names, ``-`` prefix for
+    descending), e.g. ``('order', '-created_at', 'id')``.
+    """
+
+    def __init__(self, queryset, keys, per_page):
+        self.keys = [(key.lstrip('-'), key.startswith('-')) for key in keys]
+        self.queryset = queryset.order_by(*keys)
+        self.per_page = per_page
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.keys]
+
+    def encode_cursor(self, obj):
+        # value_to_string() keeps full precision (DjangoJSONEncoder truncates
+        # datetimes to milliseconds, which would skip or repeat rows).
+        values = [field.value_to_string(obj) for field in self.fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return the key values of ``cursor``, or None if it is missing or malformed."""
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if len(values) != len(self.fields):
+                return None
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    def after(self, values):
+        """``Q`` selecting the rows sorted after the key ``values``."""
+        conditions = []
+        for i, (name, descending) in enumerate(self.keys):
+            equal = {self.keys[j][0]: values[j] for j in range(i)}
+            lookup = f"{name}__{'lt' if descending else 'gt'}"
+            conditions.append(Q(**equal, **{lookup: values[i]}))
+        return reduce(or_, conditions)
+
+    def _slice(self, cursor):
+        queryset = self.queryset
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self.after(values))
+        # One extra row tells whether there is a next page.
+        return queryset[:self.per_page + 1]
+
+    def _page(self, rows):
+        if len(rows) > self.per_page:
+            rows = rows[:self.per_page]
+            return Page(rows, self.encode_cursor(rows[-1]))
+        return Page(rows, None)
+
+    def page(self, cursor=None):
+        return self._page(list(self._slice(cursor)))
+
+    async def apage(self, cursor=None):
+        return self._page([obj async for obj in self._slice(cursor)])
@@ -0,0 +1,113 @@
+"""
+Password hashing off the request threads.
+
+PBKDF2 with Django's iteration count costs tens of milliseconds of CPU per
+login or signup. ``PooledPBKDF2PasswordHasher`` (first in PASSWORD_HASHERS,
+same algorithm name and hashes as Django's) computes it in a pool of
+``PASSWORD_HASH_WORKERS`` processes, niced by ``PASSWORD_HASH_NICE`` so
+that page rendering wins the CPU during a login burst, and spread over all
+cores. The request thread only waits for the result.
+
+``@password_admission`` bounds the POSTs of the login and signup views
+hashing at the same time to ``PASSWORD_HASH_CONCURRENCY``. Beyond that a
+request waits ``PASSWORD_HASH_ADMISSION_WAIT`` seconds for a slot, then
+gets a 429: a burst can never hold more than that many request threads.
+"""
+import base64
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.utils.encoding import force_bytes
+
+logger = logging.getLogger(__name__)
+
+
+def derive_key(digest_name, password, salt, iterations):
+    """PBKDF2 as Django's hasher computes it, base64-encoded. Runs in the pool."""
+    key = hashlib.pbkdf2_hmac(digest_name, force_bytes(password), force_bytes(salt), iterations)
+    return base64.b64encode(key).decode('ascii').strip()
+
+
+def _init_worker(nice):
+    if nice:
+        os.nice(nice)
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: forking a process that runs threads (server, chat writer) is unsafe.
+            _pool = ProcessPoolExecutor(
+                settings.PASSWORD_HASH_WORKERS, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(settings.PASSWORD_HASH_NICE,),
+            )
+        return _pool
+
+
+def derive(digest_name, password, salt, iterations):
+    """``derive_key()`` in the pool, or inline when the pool is disabled or broken."""
+    global _pool
+    if settings.PASSWORD_HASH_WORKERS:
+        pool = get_pool()
+        try:
+            return pool.submit(derive_key, digest_name, password, salt, iterations).result()
+        except BrokenProcessPool:
+            logger.error("Password hashing pool broken, hashing inline and restarting it")
+            with _lock:
+                if _pool is pool:
+                    _pool = None
+    return derive_key(digest_name, password, salt, iterations)
+
+
+class PooledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Django's PBKDF2-SHA256 hasher, computed in the password pool."""
+
+    def encode(self, password, salt, iterations=None):
+        self._check_encode_args(password, salt)
+        iterations = iterations or self.iterations
+        hash = derive(self.digest().name, password, salt, iterations)
+        return '%s$%d$%s$%s' % (self.algorithm, iterations, salt, hash)
+
+
+_admission = None
+
+
+def get_admission():
+    global _admission
+    with _lock:
+        if _admission is None:
+            _admission = threading.BoundedSemaphore(settings.PASSWORD_HASH_CONCURRENCY)
+        return _admission
+
+
+def password_admission(view):
+    """Admit a bounded number of concurrent POSTs to ``view``; 429 for the others."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'POST' or not settings.PASSWORD_HASH_CONCURRENCY:
+            return view(request, *args, **kwargs)
+        admission = get_admission()
+        if not admission.acquire(timeout=settings.PASSWORD_HASH_ADMISSION_WAIT):
+            from django.shortcuts import render
+
+            response = render(request, 'pages/error/429.html', status=429)
+            response['Retry-After'] = '1'
+            return response
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            admission.release()
+    return wrapper
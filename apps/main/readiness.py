@@ -0,0 +1,89 @@
+"""
+Process warm-up before accepting traffic.
+
+``warm_up()`` is called by the ASGI/WSGI entry points once Django is set
+up. It does the work the first requests would otherwise pay for: importing
+the URLconf and views (and the lazily imported modules they need), building
+the URL reverse tables, compiling templates, and opening the database
+connection and priming the per-process caches that query it. It runs while
+the entry point is imported, before Daphne listens: a warming process
+accepts no connection (with runservers, its siblings on the shared socket
+take them), and ``/ready/`` answers only once warm-up is over.
+"""
+import time
+
+from django.conf import settings
+
+
+_report = None
+
+
+def report():
+    """Duration in seconds of each warm-up step, or None before warm-up."""
+    return _report
+
+
+def warm_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    # Builds the reverse lookup tables used by {% url %} and redirect().
+    resolver.reverse_dict
+
+
+def warm_modules():
+    from . import emails, markup
+
+    markup.load()
+    for template_name in ('email/contact_notification.html', 'email/contact_confirmation.html'):
+        emails.renderer.get_template(template_name)
+
+
+def warm_template_cache():
+    from .template_loading import warm_templates
+
+    if settings.TEMPLATE_PREWARM:
+        warm_templates()
+
+
+def warm_database():
+    from django.db import connections
+
+    from apps.chat.search import MESSAGE_FTS_TABLE
+    from .search import PROJECT_FTS_TABLE, fts_table_exists
+
+    for connection in connections.all():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    fts_table_exists(PROJECT_FTS_TABLE)
+    fts_table_exists(MESSAGE_FTS_TABLE)
+    # Connections are per thread and this is not a request thread.
+    connections.close_all()
+
+
+STEPS = [
+    ('urls', warm_urls),
+    ('modules', warm_modules),
+    ('templates', warm_template_cache),
+    ('database', warm_database),
+]
+
+
+def warm_up(extra_steps=(), skip=(), force=False):
+    """
+    Run the warm-up steps (plus ``extra_steps``, a list of ``(name, callable)``,
+    minus the ones named in ``skip``) if ``READINESS_WARMUP`` is set or
+    ``force`` is true. Returns the report.
+    """
+    global _report
+    if not (settings.READINESS_WARMUP or force):
+        return None
+    timings = {}
+    for name, step in [*STEPS, *extra_steps]:
+        if name in skip:
+            continue
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    _report = timings
+    return timings
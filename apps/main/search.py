@@ -0,0 +1,107 @@
+"""
+Full-text search backed by SQLite FTS5.
+
+The FTS tables are created by migrations and kept in sync with their source
+tables by SQLite triggers, so bulk_create()/update() are indexed too. On
+other database backends (or an SQLite build without FTS5) searches fall back
+to ``icontains`` lookups.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+PROJECT_FTS_TABLE = 'main_project_fts'
+PROJECT_FTS_FIELDS = ('title', 'short_description', 'description', 'technologies')
+
+_fts_tables = {}
+
+
+def fts_table_exists(table):
+    """Return True if the FTS table was created by the migrations (cached per database)."""
+    if connection.vendor != 'sqlite':
+        return False
+    key = (connection.settings_dict['NAME'], table)
+    if key not in _fts_tables:
+        _fts_tables[key] = table in connection.introspection.table_names()
+    return _fts_tables[key]
+
+
+def to_fts_query(text):
+    """
+    Turn free user input into a safe FTS5 query: every word becomes a quoted
+    prefix term and all terms must match. Returns '' when there is nothing
+    to search for.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(text or ''))
+
+
+def icontains_filter(fields, text):
+    """``Q`` matching every word of ``text`` in at least one of ``fields``."""
+    words = TOKEN_RE.findall(text or '')
+    return reduce(
+        lambda q, word: q & reduce(or_, (Q(**{f'{field}__icontains': word}) for field in fields)),
+        words,
+        Q(),
+    )
+
+
+def search_projects(text, limit=20, published_only=True):
+    """Return projects matching ``text``, best match first (bm25 rank)."""
+    from .models import Project
+
+    query = to_fts_query(text)
+    if not query:
+        return []
+    queryset = Project.listing()
+    if published_only:
+        queryset = queryset.filter(is_published=True)
+
+    if not fts_table_exists(PROJECT_FTS_TABLE):
+        return list(queryset.filter(icontains_filter(PROJECT_FTS_FIELDS, text))[:limit])
+
+    published = 'AND p.is_published' if published_only else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""SELECT f.project_id FROM {PROJECT_FTS_TABLE} f
+                JOIN main_project p ON p.id = f.project_id
+                WHERE {PROJECT_FTS_TABLE} MATCH %s {published}
+                ORDER BY f.rank LIMIT %s""",
+            [query, limit],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    projects = {project.pk.hex: project for project in queryset.filter(pk__in=ids)}
+    return [projects[pk] for pk in ids if pk in projects]
+
+
+def project_match_ids(text):
+    """Subquery of the ids of projects matching ``text`` (for ``pk__in``)."""
+    return RawSQL(f"SELECT project_id FROM {PROJECT_FTS_TABLE} WHERE {PROJECT_FTS_TABLE} MATCH %s", [to_fts_query(text)])
+
+
+class FullTextSearchAdminMixin:
+    """
+    ModelAdmin mixin replacing the ``LIKE '%...%'`` search over
+    ``search_fields`` with an FTS5 lookup. ``fts_table`` names the index,
+    ``fts_match`` is a function of the search text returning the matching
+    primary keys subquery (declare it with ``staticmethod()``) and
+    ``fts_extra_search_fields`` lists cheap fields (e.g. usernames) still
+    searched with ``icontains``. Without the index the default search is used.
+    """
+    fts_table = None
+    fts_match = None
+    fts_extra_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        if not to_fts_query(search_term) or not fts_table_exists(self.fts_table):
+            return super().get_search_results(request, queryset, search_term)
+        condition = Q(pk__in=self.fts_match(search_term))
+        if self.fts_extra_search_fields:
+            condition |= icontains_filter(self.fts_extra_search_fields, search_term)
+        return queryset.filter(condition), bool(self.fts_extra_search_fields)
@@ -0,0 +1,104 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.dispatch import receiver
+
+from . import authcache, fragments, freeze, images
+from .models import Project, Technology
+
+
+def sync_technologies(project_ids):
+    """Rebuild the denormalized ``Project.technologies`` string from the tags."""
+    through = Project.tags.through
+    names = {}
+    rows = (
+        through.objects.filter(project_id__in=project_ids)
+        .order_by('technology__name')
+        .values_list('project_id', 'technology__name')
+    )
+    for project_id, name in rows:
+        names.setdefault(project_id, []).append(name)
+    for project_id in project_ids:
+        # update() rather than save(): no auto_now bump, and the FTS trigger fires
+        Project.objects.filter(pk=project_id).update(technologies=', '.join(names.get(project_id, [])))
+
+
+@receiver(m2m_changed, sender=Project.tags.through)
+def project_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep ``Project.technologies`` in sync with ``Project.tags``."""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_project_ids = list(instance.projects.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        sync_technologies([instance.pk])
+    elif action == 'post_clear':
+        sync_technologies(getattr(instance, '_cleared_project_ids', []))
+    else:
+        sync_technologies(list(pk_set or []))
+
+
+@receiver(post_save, sender=Technology)
+def technology_saved(sender, instance, created, **kwargs):
+    """Propagate a renamed technology to its projects."""
+    if not created:
+        sync_technologies(list(instance.projects.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Technology)
+def technology_deleting(sender, instance, **kwargs):
+    instance._deleted_project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Technology)
+def technology_deleted(sender, instance, **kwargs):
+    sync_technologies(getattr(instance, '_deleted_project_ids', []))
+
+
+def invalidate_fragments(sender, **kwargs):
+    """Drop the cached template fragments rendered from ``sender`` rows."""
+    fragments.invalidate(*fragments.dependents(sender._meta.label))
+
+
+for label in {label for labels in fragments.FRAGMENT_DEPENDENCIES.values() for label in labels}:
+    post_save.connect(invalidate_fragments, sender=label, dispatch_uid=f'fragments-save-{label}')
+    post_delete.connect(invalidate_fragments, sender=label, dispatch_uid=f'fragments-delete-{label}')
+
+
+def refreeze(sender, instance, **kwargs):
+    """Re-freeze the static pages rendered from ``instance`` once committed."""
+    if not settings.FREEZE_DIR:
+        return
+    paths = freeze.paths_for(instance)
+    transaction.on_commit(lambda: freeze.get_refreezer().schedule(paths))
+
+
+for label in freeze.FREEZE_DEPENDENCIES:
+    post_save.connect(refreeze, sender=label, dispatch_uid=f'freeze-save-{label}')
+    post_delete.connect(refreeze, sender=label, dispatch_uid=f'freeze-delete-{label}')
+
+
+def store_image_metadata(sender, instance, raw=False, **kwargs):
+    """Record the size, colour and placeholder of a newly uploaded image."""
+    if not raw:
+        images.update_metadata(instance, images.IMAGE_FIELDS[sender._meta.label])
+
+
+for label in images.IMAGE_FIELDS:
+    pre_save.connect(store_image_metadata, sender=label, dispatch_uid=f'images-{label}')
+
+
+@receiver(user_logged_out)
+def forget_logged_out_session(sender, request, **kwargs):
+    """Drop the cached user of a session being logged out."""
+    if request is not None:
+        authcache.forget_session(request.session.session_key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_sessions(sender, instance, **kwargs):
+    """Drop the cached sessions of a changed user (password, permissions, deletion)."""
+    authcache.forget_user(instance.pk)
@@ -0,0 +1,85 @@
+"""
+Template loading strategy (see ``TEMPLATES`` in settings).
+
+Production uses Django's cached loader: every template is read and compiled
+once per process, and ``warm_templates()`` compiles them all during the
+startup warm-up (``TEMPLATE_PREWARM``, see readiness.py) so the first
+request after a deploy does not pay for it. Development uses
+``ReloadingLoader``, a cached loader that recompiles a template when its
+file changes on disk, which also works under Daphne where runserver's
+autoreloader is not there to reset the cache.
+"""
+import os
+import time
+
+from django.template import Template, TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.loaders import cached
+
+from . import fragments
+
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.svg')
+
+
+def file_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ReloadingLoader(cached.Loader):
+    """Cached loader checking the file's mtime on every lookup (development only)."""
+
+    def __init__(self, engine, loaders):
+        super().__init__(engine, loaders)
+        self.mtimes = {}
+
+    def get_template(self, template_name, skip=None):
+        key = self.cache_key(template_name, skip)
+        cached_template = self.get_template_cache.get(key)
+        if isinstance(cached_template, Template):
+            path = cached_template.origin.name
+            if file_mtime(path) == self.mtimes.get(path):
+                return cached_template
+            # Cached fragments were rendered by the old version.
+            fragments.invalidate(*fragments.FRAGMENT_DEPENDENCIES)
+        # Do not remember missing templates either: they may be created later.
+        self.get_template_cache.pop(key, None)
+        template = super().get_template(template_name, skip)
+        self.mtimes[template.origin.name] = file_mtime(template.origin.name)
+        return template
+
+    def reset(self):
+        super().reset()
+        self.mtimes.clear()
+
+
+def template_names(engine):
+    """Names of every template found in the directories of ``engine``'s loaders."""
+    names = set()
+    for loader in engine.template_loaders:
+        for directory in loader.get_dirs():
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if filename.endswith(TEMPLATE_EXTENSIONS):
+                        names.add(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates(using='django'):
+    """
+    Load (read and compile) every template so the cached loader holds them.
+    Returns ``(count, seconds, errors)`` where ``errors`` maps template
+    names to the exception raised while compiling them.
+    """
+    engine = engines[using].engine
+    errors = {}
+    start = time.perf_counter()
+    names = template_names(engine)
+    for name in names:
+        try:
+            engine.get_template(name)
+        except (TemplateSyntaxError, TemplateDoesNotExist, UnicodeDecodeError) as exc:
+            errors[name] = exc
+    return len(names) - len(errors), time.perf_counter() - start, errors
@@ -0,0 +1,16 @@
+from django import template
+
+from apps.main.composition import get_layout
+
+register = template.Library()
+
+
+@register.inclusion_tag('components/page_sections.html')
+def page_sections(page):
+    """
+    Render the PageContent sections of a page, given its name or the
+    layout the view already loaded (async views must preload it):
+
+        {% page_sections 'home' %}  {% page_sections sections %}
+    """
+    return {'sections': get_layout(page) if isinstance(page, str) else page}
@@ -0,0 +1,44 @@
+import functools
+
+from django import template
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@functools.lru_cache(maxsize=None)
+def load_icon(name):
+    """Return the markup of templates/components/icons/<name>.svg, read once per process."""
+    return mark_safe(get_template(f'components/icons/{name}.svg').template.source)
+
+
+class IconNode(template.Node):
+    def __init__(self, name=None, svg=None):
+        self.name = name
+        self.svg = svg
+
+    def render(self, context):
+        if self.svg is not None:
+            return self.svg
+        return load_icon(self.name.resolve(context))
+
+
+@register.tag
+def icon(parser, token):
+    """
+    Inline an SVG icon: ``{% icon 'mail' %}``. A literal name is resolved
+    when the template is compiled, so the cached template loader keeps the
+    markup and rendering it costs nothing; a variable name is looked up at
+    render time.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires exactly one icon name.")
+    name = parser.compile_filter(bits[1])
+    if name.is_var or name.filters:
+        return IconNode(name=name)
+    try:
+        return IconNode(svg=load_icon(name.var))
+    except template.TemplateDoesNotExist:
+        raise template.TemplateSyntaxError(f"Unknown icon {name.var!r}.")
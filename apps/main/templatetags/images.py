@@ -0,0 +1,22 @@
+from django import template
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def image_size(obj, field):
+    """``width``/``height`` attributes of ``obj.<field>`` from the stored dimensions (see images.py)."""
+    width, height = getattr(obj, f'{field}_width'), getattr(obj, f'{field}_height')
+    if not width or not height:
+        return ''
+    return format_html('width="{}" height="{}"', width, height)
+
+
+@register.simple_tag
+def image_placeholder(obj, field):
+    """CSS background painting the stored colour and LQIP of ``obj.<field>`` until it loads."""
+    color, placeholder = getattr(obj, f'{field}_color'), getattr(obj, f'{field}_placeholder')
+    if not placeholder:
+        return format_html('background-color: {};', color) if color else ''
+    return format_html("background: {} url('{}') center / cover no-repeat;", color or 'transparent', placeholder)
@@ -0,0 +1,869 @@
+import base64
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from html.parser import HTMLParser
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django import urls
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Engine, Template, TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.chat.models import Message
+
+from . import async_views, authcache, freeze, markup, metrics, passwords
+from .benchmarking import MARKDOWN_CORPUS
+from .checks import check_fragment_cache
+from .composition import get_layout
+from .emails import EmailRenderer, build_contact_emails, html_to_text, inline_css
+from .fragments import fragment_key
+from .models import About, Contact, PageContent, Project, SiteSettings, Skill, SocialLink, Technology
+from .pagination import KeysetPaginator
+from .search import search_projects
+from .template_loading import warm_templates
+
+
+@override_settings(PUBLIC_CACHE_SECONDS=300)
+class PublicPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('visitor', password='pass')
+        cls.admin = User.objects.create_user('owner', password='pass', is_staff=True)
+        cls.project = Project.objects.create(title="Projet", description="Description")
+
+    def public_urls(self):
+        return [
+            reverse('home'), reverse('projects'), reverse('about'), reverse('contact'),
+            reverse('project_detail', args=[self.project.pk]),
+        ]
+
+    def fetch(self, url, user=None):
+        self.client.logout()
+        if user:
+            self.client.force_login(user)
+        return self.client.get(url)
+
+    def test_shell_is_identical_for_every_visitor(self):
+        for url in self.public_urls():
+            with self.subTest(url=url):
+                anonymous = self.fetch(url)
+                self.assertEqual(anonymous.status_code, 200)
+                self.assertEqual(self.fetch(url, self.user).content, anonymous.content)
+                self.assertEqual(self.fetch(url, self.admin).content, anonymous.content)
+
+    def test_shell_is_cacheable_by_shared_caches(self):
+        for url in self.public_urls():
+            for user in (None, self.user):
+                with self.subTest(url=url, user=user):
+                    response = self.fetch(url, user)
+                    self.assertIn('public', response['Cache-Control'])
+                    self.assertIn('s-maxage=300', response['Cache-Control'])
+                    self.assertNotIn('Cookie', response.get('Vary', ''))
+                    self.assertFalse(response.cookies)
+
+    def test_session_fragments_for_anonymous_visitor(self):
+        response = self.client.get(reverse('session'))
+        self.assertContains(response, reverse('login'))
+        self.assertNotContains(response, reverse('logout'))
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertContains(response, 'data-token="')
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_session_fragments_show_unread_badge(self):
+        conversation = self.user.conversation
+        Message.objects.create(conversation=conversation, sender=self.admin, content="Bonjour")
+        Message.objects.create(conversation=conversation, sender=self.user, content="Salut")
+        Message.objects.create(conversation=conversation, sender=self.user, content="Ça va ?")
+
+        response = self.fetch(reverse('session'), self.user)
+        self.assertContains(response, reverse('chat:home'))
+        self.assertContains(response, reverse('logout'))
+        self.assertContains(response, '>1</span>', count=2)
+
+        response = self.fetch(reverse('session'), self.admin)
+        self.assertContains(response, reverse('chat:admin_inbox'))
+        self.assertContains(response, '>2</span>', count=2)
+
+    def test_session_fragments_consume_flash_messages(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('logout'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+        response = self.client.get(reverse('session'))
+        self.assertContains(response, "Vous avez été déconnecté.")
+        response = self.client.get(reverse('session'))
+        self.assertNotContains(response, "Vous avez été déconnecté.")
+
+    def test_contact_page_links_the_direct_form_without_javascript(self):
+        response = self.client.get(reverse('contact'))
+        self.assertContains(response, '<input type="hidden" name="csrfmiddlewaretoken" value="">', html=True)
+        self.assertContains(response, '<noscript>')
+        self.assertContains(response, f'href="{reverse("contact_form")}"')
+
+    @override_settings(CONTACT_EMAIL='contact@example.com')
+    def test_direct_contact_form_works_without_javascript(self):
+        client = Client(enforce_csrf_checks=True)
+        data = {'name': "Jeanne", 'email': "jeanne@example.com", 'subject': "Devis", 'message': "Bonjour"}
+        # The shared page's form cannot be posted before the token is filled
+        self.assertEqual(client.post(reverse('contact'), data).status_code, 403)
+
+        response = client.get(reverse('contact_form'))
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotContains(response, '<noscript>')
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+        response = client.post(reverse('contact_form'), {**data, 'csrfmiddlewaretoken': token}, follow=True)
+        self.assertRedirects(response, reverse('contact_form'))
+        self.assertContains(response, "Votre message a été envoyé avec succès")
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class AsyncPagesURLConf:
+    """The public pages on their async views, whatever ASYNC_VIEWS says."""
+    urlpatterns = [
+        urls.path('', async_views.home, name='home'),
+        urls.path('projects/', async_views.projects, name='projects'),
+        urls.path('projects/<uuid:project_id>/', async_views.project_detail, name='project_detail'),
+        urls.path('about/', async_views.about, name='about'),
+        urls.path('', urls.include('portfolio.urls')),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncPagesURLConf, PUBLIC_CACHE_SECONDS=300)
+class AsyncPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Technology.objects.create(name="Django", slug='django')
+        cls.projects = [
+            Project.objects.create(title=f"Projet {i}", description="Description", order=i) for i in range(14)
+        ]
+        cls.projects[0].tags.add(cls.tag)
+        cls.hidden = Project.objects.create(title="Brouillon", description="Description", is_published=False)
+        Skill.objects.create(name="Python", category='backend')
+        SocialLink.objects.create(name="GitHub", url='https://github.com', icon='<svg></svg>')
+        About.objects.create(bio="**Bonjour**")
+        PageContent.objects.create(page='home', section='cta', title="Bienvenue ici")
+        PageContent.objects.create(page='about', section='cta', title="Parlons-en")
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, view, template, *args, **params):
+        response = self.client.get(reverse(name, args=args), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(response.resolver_match.func, view)
+        self.assertTemplateUsed(response, template)
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('s-maxage=300', response['Cache-Control'])
+        return response
+
+    def test_home(self):
+        response = self.get('home', async_views.home, 'pages/home.html')
+        context = response.context
+        self.assertEqual([p.pk for p in context['projects']], [p.pk for p in self.projects[:6]])
+        self.assertEqual([skill.name for skill in context['skills']], ["Python"])
+        self.assertEqual([link.name for link in context['social_links']], ["GitHub"])
+        self.assertIn('<strong>Bonjour</strong>', context['about_bio_html'])
+        self.assertEqual([section['title'] for section in context['sections']], ["Bienvenue ici"])
+        self.assertContains(response, "Bienvenue ici")
+
+    def test_projects_pages_and_filters(self):
+        response = self.get('projects', async_views.projects, 'pages/projects.html')
+        self.assertEqual([p.pk for p in response.context['projects']], [p.pk for p in self.projects[:12]])
+        self.assertEqual([t.slug for t in response.context['technologies']], ['django'])
+        next_query = response.context['next_query']
+        self.assertTrue(next_query.startswith('after='))
+
+        response = self.client.get(f"{reverse('projects')}?{next_query}")
+        self.assertEqual([p.pk for p in response.context['projects']], [p.pk for p in self.projects[12:]])
+        self.assertEqual(response.context['next_query'], '')
+
+        response = self.get('projects', async_views.projects, 'pages/projects.html', tech='django')
+        self.assertEqual([p.pk for p in response.context['projects']], [self.projects[0].pk])
+        self.assertEqual(response.context['active_tech'], 'django')
+
+    def test_project_detail(self):
+        project = self.projects[0]
+        response = self.get('project_detail', async_views.project_detail, 'pages/project_detail.html', project.pk)
+        self.assertEqual(response.context['project'], project)
+        self.assertContains(response, "Projet 0")
+
+    def test_project_detail_not_found(self):
+        for project_id in (self.hidden.pk, uuid.uuid4()):
+            with self.subTest(project_id=project_id):
+                response = self.client.get(reverse('project_detail', args=[project_id]))
+                self.assertEqual(response.status_code, 404)
+                self.assertIs(response.resolver_match.func, async_views.project_detail)
+                self.assertNotIn('public', response.get('Cache-Control', ''))
+
+    def test_about(self):
+        response = self.get('about', async_views.about, 'pages/about.html')
+        self.assertEqual(response.context['about'].bio, "**Bonjour**")
+        self.assertIn('<strong>Bonjour</strong>', response.context['about_bio_html'])
+        self.assertEqual([section['title'] for section in response.context['sections']], ["Parlons-en"])
+
+
+class FreezeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(title="Projet", description="Description")
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(FREEZE_DIR=self.directory, FREEZE_BASE_URL='http://testserver')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        freeze._refreezer = freeze.Refreezer(3600, 1)
+        self.addCleanup(setattr, freeze, '_refreezer', None)
+
+    def read(self, path):
+        with open(freeze.output_file(path), 'rb') as f:
+            return f.read()
+
+    def test_frozen_pages_are_the_served_pages(self):
+        written, removed, _ = freeze.freeze(assets=False)
+        self.assertEqual((written, removed), (4, 0))
+        for path in freeze.public_paths():
+            with self.subTest(path=path):
+                self.assertEqual(self.read(path), self.client.get(path).content)
+
+    def test_saves_queue_the_pages_to_refreeze(self):
+        freeze.freeze(assets=False)
+        refreezer = freeze.get_refreezer()
+        path = freeze.project_path(self.project.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            About.objects.update_or_create(defaults={'bio': "Une biographie"})
+        self.assertEqual(refreezer.pending, {'/', '/about/'})
+
+        self.project.is_published = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        self.assertEqual(refreezer.pending, {'/', '/about/', '/projects/', path})
+        refreezer.timer.cancel()
+
+        freeze.freeze_paths(sorted(refreezer.pending))
+        self.assertFalse(os.path.exists(freeze.output_file(path)))
+        self.assertIn("Une biographie".encode(), self.read('/about/'))
+
+
+@override_settings(FRAGMENT_CACHE_TIMEOUT=3600)
+class PageCompositionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        PageContent.objects.bulk_create(
+            PageContent(page='about', section='custom', title=f"Section {i}", content=f"**gras {i}**", order=30 - i)
+            for i in range(30)
+        )
+        PageContent.objects.create(page='about', section='cta', title="Masquée", is_active=False)
+        PageContent.objects.create(page='home', section='cta', title="Bienvenue ici", content_html='<hr>')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_layout_costs_one_query_then_none(self):
+        with self.assertNumQueries(1):
+            layout = get_layout('about')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_layout('about'), layout)
+        self.assertEqual([section['title'] for section in layout], [f"Section {i}" for i in reversed(range(30))])
+        self.assertEqual(layout[-1]['html'], '<p><strong>gras 0</strong></p>')
+        self.assertEqual(get_layout('home')[0]['html'], '<hr>')
+
+    def test_edits_drop_the_cached_layouts(self):
+        get_layout('about')
+        PageContent.objects.filter(title="Masquée").get().save()
+        section = PageContent.objects.get(title="Section 0")
+        section.page = 'home'
+        section.save()
+        self.assertEqual(len(get_layout('about')), 29)
+        self.assertEqual(len(get_layout('home')), 2)
+
+    def test_pages_render_their_sections(self):
+        response = self.client.get(reverse('about'))
+        self.assertContains(response, '<strong>gras 12</strong>', html=True)
+        self.assertNotContains(response, "Masquée")
+        self.assertContains(self.client.get(reverse('home')), "Bienvenue ici")
+
+
+@override_settings(FRAGMENT_CACHE_TIMEOUT=3600)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def render(self, name, text):
+        template = Template("{% load fragments %}{% fragment name %}{{ text }}{% endfragment %}")
+        return template.render(Context({'name': name, 'text': text}))
+
+    def test_fragments_are_cached_until_invalidated(self):
+        self.assertEqual(self.render('skills', 'avant'), 'avant')
+        self.assertEqual(self.render('skills', 'après'), 'avant')
+        Skill.objects.create(name='Django', category='backend')
+        self.assertEqual(self.render('skills', 'après'), 'après')
+
+    def test_invalidation_drops_every_variant_of_the_dependents(self):
+        keys = {name: fragment_key(name, ['links']) for name in ('header', 'footer', 'skills')}
+        self.assertNotEqual(fragment_key('footer', ['default']), keys['footer'])
+        self.assertEqual(fragment_key('footer', ['links']), keys['footer'])
+
+        SocialLink.objects.create(name='GitHub', url='https://github.com', icon='<svg></svg>')
+        self.assertNotEqual(fragment_key('footer', ['links']), keys['footer'])
+        self.assertEqual(fragment_key('header', ['links']), keys['header'])
+        SiteSettings.get_instance().save()
+        self.assertNotEqual(fragment_key('header', ['links']), keys['header'])
+        self.assertEqual(fragment_key('skills', ['links']), keys['skills'])
+
+    def test_long_timeout_with_a_per_process_cache_is_reported(self):
+        self.assertEqual([warning.id for warning in check_fragment_cache(None)], ['main.W001'])
+        with self.settings(FRAGMENT_CACHE_TIMEOUT=30):
+            self.assertEqual(check_fragment_cache(None), [])
+
+
+class FullTextSearchTests(TestCase):
+    def titles(self, text, **kwargs):
+        return [project.title for project in search_projects(text, **kwargs)]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        project = Project.objects.create(title="Boutique en ligne", description="Paiements sécurisés")
+        Project.objects.create(title="Blog", description="Articles", is_published=False)
+        self.assertEqual(self.titles('securises'), ["Boutique en ligne"])
+        self.assertEqual(self.titles('bout'), ["Boutique en ligne"])
+        self.assertEqual(self.titles('blog'), [])
+        self.assertEqual(self.titles('blog', published_only=False), ["Blog"])
+
+        project.title = "Marketplace"
+        project.save()
+        self.assertEqual(self.titles('boutique'), [])
+        self.assertEqual(self.titles('marketplace paiements'), ["Marketplace"])
+        # update() bypasses save(): the triggers still index it
+        Project.objects.filter(pk=project.pk).update(description="Réservations")
+        self.assertEqual(self.titles('paiements'), [])
+        self.assertEqual(self.titles('reservation'), ["Marketplace"])
+        project.delete()
+        self.assertEqual(self.titles('marketplace'), [])
+
+    def test_user_input_cannot_break_the_query(self):
+        Project.objects.create(title="Outil CLI", description="Terminal")
+        self.assertEqual(self.titles('"outil" (cli*'), ["Outil CLI"])
+        # Operators are plain words that must match too
+        self.assertEqual(self.titles('outil OR blog'), [])
+        self.assertEqual(self.titles('*** ""'), [])
+
+    def test_admin_search_uses_the_index(self):
+        Project.objects.create(title="Application météo", description="Prévisions")
+        Project.objects.create(title="Portfolio", description="Vitrine")
+        self.client.force_login(User.objects.create_superuser('root', password='pass'))
+        response = self.client.get(reverse('admin:main_project_changelist'), {'q': 'meteo previsions'})
+        self.assertEqual([project.title for project in response.context['cl'].result_list], ["Application météo"])
+
+
+class TechnologyTagTests(TestCase):
+    def technologies(self, project):
+        project.refresh_from_db(fields=['technologies'])
+        return project.technologies
+
+    def test_migration_splits_the_technology_strings(self):
+        from importlib import import_module
+        from django.apps import apps
+
+        migration = import_module('apps.main.migrations.0011_populate_technology_tags')
+        Technology.objects.create(name='Python', slug='python')
+        first = Project.objects.create(title="API", description="-")
+        second = Project.objects.create(title="Jeu", description="-")
+        Project.objects.filter(pk=first.pk).update(technologies="Django, python , django,, C++, C")
+        Project.objects.filter(pk=second.pk).update(technologies="Python")
+
+        migration.populate_tags(apps, None)
+        self.assertEqual(list(Technology.objects.values_list('name', 'slug')), [
+            ('C', 'c-2'), ('C++', 'c'), ('Django', 'django'), ('Python', 'python'),
+        ])
+        self.assertEqual(sorted(first.tags.values_list('name', flat=True)), ['C', 'C++', 'Django', 'Python'])
+        self.assertEqual(list(second.tags.values_list('name', flat=True)), ['Python'])
+
+        Project.objects.update(technologies='')
+        migration.restore_strings(apps, None)
+        self.assertEqual(self.technologies(second), 'Python')
+
+    def test_tag_changes_rebuild_the_technology_string(self):
+        project = Project.objects.create(title="API", description="-")
+        django, python, vue = (Technology.objects.create(name=name) for name in ('Django', 'Python', 'Vue'))
+        project.tags.add(python, django)
+        self.assertEqual(self.technologies(project), 'Django, Python')
+        project.tags.remove(django)
+        self.assertEqual(self.technologies(project), 'Python')
+        vue.projects.add(project)
+        self.assertEqual(self.technologies(project), 'Python, Vue')
+
+        vue.name = 'Vue.js'
+        vue.save()
+        self.assertEqual(self.technologies(project), 'Python, Vue.js')
+        python.delete()
+        self.assertEqual(self.technologies(project), 'Vue.js')
+        vue.projects.clear()
+        self.assertEqual(self.technologies(project), '')
+
+    def test_slugs_are_unique(self):
+        self.assertEqual(Technology.objects.create(name='Node.js').slug, 'nodejs')
+        self.assertEqual(Technology.objects.create(name='NodeJS').slug, 'nodejs-2')
+        self.assertEqual(Technology.objects.create(name='++').slug, 'tech')
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Project.objects.bulk_create(
+            Project(title=f"Projet {i}", description="-", order=i % 3) for i in range(10)
+        )
+        # Ties on (order, created_at): only the primary key tells rows apart
+        instant = timezone.now().replace(microsecond=123456)
+        Project.objects.filter(order=1).update(created_at=instant)
+
+    def paginator(self, per_page=3):
+        return KeysetPaginator(Project.objects.all(), Project.LISTING_ORDER, per_page)
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = list(Project.objects.order_by(*Project.LISTING_ORDER).values_list('pk', flat=True))
+        paginator, seen, cursor = self.paginator(), [], None
+        while True:
+            page = paginator.page(cursor)
+            seen += [project.pk for project in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(page), 1)
+
+    def test_cursor_round_trip_keeps_full_precision(self):
+        paginator = self.paginator()
+        project = Project.objects.filter(order=1).first()
+        values = paginator.decode_cursor(paginator.encode_cursor(project))
+        self.assertEqual(values, [project.order, project.created_at, project.pk])
+        self.assertEqual(values[1].microsecond, 123456)
+
+    def test_malformed_cursors_start_over(self):
+        paginator = self.paginator()
+        first = [project.pk for project in paginator.page()]
+        other_fields = base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode()
+        bad_date = base64.urlsafe_b64encode(json.dumps([1, 'hier', 'x']).encode()).decode()
+        for cursor in ('', '!!!', 'e30', other_fields, bad_date):
+            self.assertIsNone(paginator.decode_cursor(cursor))
+            self.assertEqual([project.pk for project in paginator.page(cursor)], first)
+
+    def test_rows_inserted_before_the_cursor_do_not_shift_the_next_page(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = [project.pk for project in paginator.page(first.next_cursor)]
+        Project.objects.create(title="Nouveau", description="-", order=0)
+        self.assertEqual([project.pk for project in paginator.page(first.next_cursor)], second)
+
+    def test_async_pages_match(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        for cursor in (None, first.next_cursor):
+            page, expected = async_to_sync(paginator.apage)(cursor), paginator.page(cursor)
+            self.assertEqual([project.pk for project in page], [project.pk for project in expected])
+            self.assertEqual(page.next_cursor, expected.next_cursor)
+
+
+@override_settings(CONTACT_EMAIL='contact@example.com')
+class ContactEmailTests(TestCase):
+    def setUp(self):
+        self.contact = Contact(
+            name="Jeanne", email="jeanne@example.com", subject="Devis",
+            message="Bonjour <script>alert(1)</script>",
+        )
+
+    def test_css_is_inlined_by_specificity(self):
+        html = inline_css(
+            '<style>p { color: red } .note { color: blue } div .note { margin: 0 }'
+            ' @media (max-width: 600px) { .note { color: green } }</style>'
+            '<div><p class="note" style="font-weight: bold">a</p><br><p>b</p></div>'
+        )
+        self.assertIn(
+            '<p class="note" style="color: red; color: blue; margin: 0; font-weight: bold;">', html
+        )
+        self.assertIn('<p style="color: red;">b</p>', html)
+        self.assertNotIn('color: green;', html)
+        self.assertIn('@media (max-width: 600px)', html)
+
+    def test_contact_emails(self):
+        notification, confirmation = build_contact_emails(self.contact)
+
+        self.assertEqual(notification.to, ['contact@example.com'])
+        self.assertEqual(notification.subject, "[Portfolio] Nouveau message de Jeanne")
+        html, mimetype = notification.alternatives[0]
+        self.assertEqual(mimetype, 'text/html')
+        self.assertRegex(html, r'<h1 style="[^"]*color: #ffffff;[^"]*">')
+        self.assertIn('&lt;script&gt;', html)
+        self.assertNotIn('<script>', html)
+        self.assertIn('@media (max-width: 600px)', html)
+        self.assertIn("Bonjour <script>alert(1)</script>", notification.body)
+        self.assertIn("jeanne@example.com", notification.body)
+        self.assertNotIn('<div', notification.body)
+
+        self.assertEqual(confirmation.to, ['jeanne@example.com'])
+        self.assertEqual(confirmation.subject, "Reçu: Devis")
+        html, _ = confirmation.alternatives[0]
+        self.assertRegex(html, r'<div class="email-container" style="[^"]+">')
+        self.assertIn("Bonjour Jeanne,", confirmation.body)
+        self.assertNotIn("<script>", confirmation.body)
+
+    def test_templates_are_compiled_once(self):
+        renderer = EmailRenderer()
+        with mock.patch('apps.main.emails.inline_css', wraps=inline_css) as inline:
+            template = renderer.get_template('email/contact_confirmation.html')
+            renderer.render_many('email/contact_confirmation.html', [{'name': 'A'}, {'name': 'B'}])
+            self.assertIs(renderer.get_template('email/contact_confirmation.html'), template)
+            self.assertEqual(inline.call_count, 1)
+            renderer.clear()
+            self.assertIsNot(renderer.get_template('email/contact_confirmation.html'), template)
+            self.assertEqual(inline.call_count, 2)
+
+    def test_plaintext_keeps_links(self):
+        text = html_to_text('<body><p>Voir <a href="https://example.com">le site</a></p><p>Fin</p></body>')
+        self.assertEqual(text, "Voir le site (https://example.com)\nFin\n")
+
+    def test_contact_form_sends_both_emails(self):
+        response = self.client.post(reverse('contact'), {
+            'name': "Jeanne", 'email': "jeanne@example.com", 'subject': "Devis", 'message': "Bonjour",
+        })
+        self.assertRedirects(response, reverse('contact'))
+        self.assertEqual([message.to for message in mail.outbox], [['contact@example.com'], ['jeanne@example.com']])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('owner', password='pass', is_staff=True)
+
+    def setUp(self):
+        metrics.registry.clear()
+
+    def test_exposition_format(self):
+        registry = metrics.Registry()
+        requests = registry.counter('requests_total', "Requests.", ('view',))
+        registry.gauge('open', "Open sockets.").set(3)
+        latency = registry.histogram('latency_seconds', "Latency.", buckets=(0.1, 1))
+        requests.inc(view='say "hi"\n')
+        requests.inc(2, view='home')
+        for value in (0.05, 0.5, 0.5, 3):
+            latency.observe(value)
+
+        self.assertIs(registry.counter('requests_total', "Again.", ('view',)), requests)
+        with self.assertRaises(ValueError):
+            requests.inc(status='200')
+        self.assertEqual(registry.exposition(), '\n'.join([
+            '# HELP latency_seconds Latency.',
+            '# TYPE latency_seconds histogram',
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            'latency_seconds_sum 4.05',
+            'latency_seconds_count 4',
+            '# HELP open Open sockets.',
+            '# TYPE open gauge',
+            'open 3',
+            '# HELP requests_total Requests.',
+            '# TYPE requests_total counter',
+            'requests_total{view="home"} 2',
+            'requests_total{view="say \\"hi\\"\\n"} 1',
+        ]) + '\n')
+
+    def test_template_render_is_timed(self):
+        metrics.install()
+        template = engines['django'].from_string('{{ value }}')
+        stats = metrics.RequestStats()
+        token = metrics.current_stats.set(stats)
+        try:
+            self.assertEqual(template.render({'value': 'ok'}), 'ok')
+        finally:
+            metrics.current_stats.reset(token)
+        self.assertGreater(stats.timings['tpl'], 0)
+        # Outside a request nothing is recorded
+        self.assertEqual(template.render({'value': 'ok'}), 'ok')
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_requests_are_recorded(self):
+        response = self.client.get(reverse('contact'))
+        self.assertRegex(response.headers['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=')
+        self.assertEqual(metrics.http_requests.value(view='contact', method='GET', status='200'), 1)
+        self.assertGreater(metrics.http_template_duration.sum(view='contact'), 0)
+        self.assertEqual(metrics.http_response_size.count(view='contact'), 1)
+
+    def test_endpoint_is_disabled_by_default(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+    @override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=[''])
+    def test_endpoint_is_restricted_to_staff(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        self.assertIn('# TYPE http_requests_total counter', response.content.decode())
+
+    @override_settings(METRICS_ENABLED=True, METRICS_ALLOWED_IPS=['10.0.0.5', ' 192.168.1.0/24'])
+    def test_endpoint_answers_allowed_addresses(self):
+        for address, status in (('10.0.0.5', 200), ('192.168.1.20', 200), ('127.0.0.1', 403), ('unknown', 403)):
+            with self.subTest(address=address):
+                self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR=address).status_code, status)
+
+
+class TemplateLoadingTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, source, mtime_ns=None):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(source)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_template_is_recompiled_when_its_file_changes(self):
+        engine = Engine(dirs=[self.directory], loaders=[
+            ('apps.main.template_loading.ReloadingLoader', ['django.template.loaders.filesystem.Loader']),
+        ])
+        self.write('page.html', 'v1', mtime_ns=10**18)
+        template = engine.get_template('page.html')
+        self.assertIs(engine.get_template('page.html'), template)
+
+        self.write('page.html', 'v2', mtime_ns=10**18 + 1)
+        with mock.patch('apps.main.template_loading.fragments.invalidate') as invalidate:
+            self.assertEqual(engine.get_template('page.html').render(Context()), 'v2')
+        invalidate.assert_called_once()
+
+        with self.assertRaises(TemplateDoesNotExist):
+            engine.get_template('later.html')
+        self.write('later.html', 'new')
+        self.assertEqual(engine.get_template('later.html').render(Context()), 'new')
+
+    def test_warm_up_compiles_every_template(self):
+        self.write('a.html', '{{ value }}')
+        self.write('email/b.txt', 'b')
+        self.write('icon.svg', '<svg></svg>')
+        self.write('broken.html', '{% if %}')
+        self.write('notes.md', '{% if %}')
+        templates = [{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [self.directory],
+            'OPTIONS': {'loaders': [('django.template.loaders.cached.Loader', ['django.template.loaders.filesystem.Loader'])]},
+        }]
+        with override_settings(TEMPLATES=templates):
+            count, _, errors = warm_templates()
+            loader = engines['django'].engine.template_loaders[0]
+            cached = {template.origin.template_name for template in loader.get_template_cache.values()
+                      if isinstance(template, Template)}
+        self.assertEqual(count, 3)
+        self.assertEqual(list(errors), ['broken.html'])
+        self.assertIsInstance(errors['broken.html'], TemplateSyntaxError)
+        self.assertEqual(cached, {'a.html', 'email/b.txt', 'icon.svg'})
+
+    def test_project_templates_all_compile(self):
+        count, _, errors = warm_templates()
+        self.assertEqual(errors, {})
+        self.assertGreater(count, 10)
+
+
+class RunServersTests(SimpleTestCase):
+    def test_worker_numbers_must_fit_the_message_ids(self):
+        with self.assertRaisesMessage(CommandError, "At most 16 workers"):
+            call_command('runservers', http_workers=2, ws_workers=15)
+
+
+def png(width, height, color):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('image.png', buffer.getvalue(), content_type='image/png')
+
+
+class ImageMetadataTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        settings_override = override_settings(MEDIA_ROOT=media)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_metadata_is_stored_at_upload(self):
+        project = Project.objects.create(title="Projet", description="Description", image=png(120, 80, (255, 0, 0)))
+        project.refresh_from_db()
+        self.assertEqual((project.image_width, project.image_height, project.image_color), (120, 80, '#ff0000'))
+        self.assertTrue(project.image_placeholder.startswith('data:image/'))
+
+        project.image = None
+        project.save()
+        self.assertEqual((project.image_width, project.image_color, project.image_placeholder), (None, '', ''))
+
+    def test_rendering_never_opens_media_files(self):
+        project = Project.objects.create(title="Projet", description="Description", image=png(120, 80, 'blue'))
+        About.objects.create(bio="Bio", photo=png(40, 40, 'green'))
+        with mock.patch('django.core.files.storage.FileSystemStorage.open', side_effect=AssertionError):
+            for url in (reverse('home'), reverse('projects'), reverse('about'), reverse('project_detail', args=[project.pk])):
+                with self.subTest(url=url):
+                    self.assertContains(self.client.get(url), 'width="120" height="80"' if 'about' not in url else 'width="40"')
+
+    def test_backfill_existing_images(self):
+        project = Project.objects.create(title="Projet", description="Description", image=png(30, 20, 'white'))
+        Project.objects.filter(pk=project.pk).update(image_width=None, image_height=None, image_color='', image_placeholder='')
+        call_command('backfill_image_metadata', stdout=io.StringIO())
+        project.refresh_from_db()
+        self.assertEqual((project.image_width, project.image_height, project.image_color), (30, 20, '#ffffff'))
+
+    def test_missing_media_file(self):
+        project = Project.objects.create(title="Projet", description="Description", image=png(30, 20, 'white'))
+        Project.objects.filter(pk=project.pk).update(image_width=None, image_height=None, image_color='', image_placeholder='')
+        project.image.storage.delete(project.image.name)
+
+        for url in (reverse('home'), reverse('projects'), reverse('project_detail', args=[project.pk])):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+        out = io.StringIO()
+        with self.assertLogs('apps.main.images', 'WARNING'):
+            call_command('backfill_image_metadata', stdout=out)
+        self.assertIn("main.Project.image: 0 image(s) updated, 1 unreadable", out.getvalue())
+
+
+class HTMLTokens(HTMLParser):
+    """HTML as (tag, attributes) and text tokens, whitespace between blocks ignored."""
+
+    def __init__(self, html):
+        super().__init__()
+        self.tokens = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.tokens.append(('start', tag, sorted(attrs)))
+
+    def handle_endtag(self, tag):
+        self.tokens.append(('end', tag))
+
+    def handle_data(self, data):
+        # Inside <pre> whitespace is content: keep it as is.
+        if self.tokens[-1:] and self.tokens[-1][:2] == ('start', 'code'):
+            self.tokens.append(('text', data))
+        elif data.strip():
+            self.tokens.append(('text', re.sub(r'\s+', ' ', data.strip())))
+
+
+class MarkdownRendererTests(SimpleTestCase):
+    def test_reused_instance_renders_like_a_fresh_one(self):
+        import markdown
+
+        renderer = markup.get_renderer('python-markdown')
+        for name, text in MARKDOWN_CORPUS.items():
+            expected = markdown.markdown(text, extensions=markup.MARKDOWN_EXTENSIONS)
+            with self.subTest(document=name):
+                self.assertEqual(renderer.render(text), expected)
+                self.assertEqual(renderer.render(text), expected)
+
+    def test_backends_render_the_corpus_alike(self):
+        backends = []
+        for name in markup.RENDERERS:
+            try:
+                backends.append(markup.get_renderer(name))
+            except ImproperlyConfigured:
+                pass
+        if len(backends) < 2:
+            self.skipTest("only Python-Markdown is installed (see requirements-dev.txt)")
+        reference, *others = backends
+        for renderer in others:
+            for name, text in MARKDOWN_CORPUS.items():
+                with self.subTest(backend=renderer.name, document=name):
+                    self.assertEqual(HTMLTokens(renderer.render(text)).tokens, HTMLTokens(reference.render(text)).tokens)
+
+    def test_unknown_backend(self):
+        with override_settings(MARKDOWN_RENDERER='pandoc'):
+            with self.assertRaises(ImproperlyConfigured):
+                markup.render_markdown('*texte*')
+
+
+class PasswordHashingTests(TestCase):
+    def tearDown(self):
+        passwords._admission = None
+
+    def test_pooled_hasher_matches_django(self):
+        from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+
+        for workers in (1, 0):
+            with self.subTest(workers=workers), override_settings(PASSWORD_HASH_WORKERS=workers):
+                encoded = passwords.PooledPBKDF2PasswordHasher().encode('secret', 'somesalt', 1000)
+                self.assertEqual(encoded, PBKDF2PasswordHasher().encode('secret', 'somesalt', 1000))
+                self.assertTrue(check_password('secret', encoded))
+                self.assertFalse(check_password('other', encoded))
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_ADMISSION_WAIT=0)
+    def test_login_burst_beyond_admission_gets_429(self):
+        User.objects.create_user('alice', password='secret-Password-1')
+        credentials = {'username': 'alice', 'password': 'secret-Password-1'}
+        admission = passwords.get_admission()
+        admission.acquire()
+        try:
+            response = self.client.post(reverse('login'), credentials)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], '1')
+            self.assertEqual(self.client.get(reverse('login')).status_code, 200)
+        finally:
+            admission.release()
+        self.assertEqual(self.client.post(reverse('login'), credentials).status_code, 302)
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        authcache.clear()
+        self.user = User.objects.create_user('visitor', password='old-Password-1')
+        self.client.login(username='visitor', password='old-Password-1')
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('session'))
+        self.assertEqual(response.context['user'], self.user)
+        return [query['sql'] for query in queries if 'django_session' in query['sql'] or 'auth_user' in query['sql']]
+
+    def test_authenticated_user_is_cached(self):
+        self.assertTrue(self.auth_queries())
+        self.assertEqual(self.auth_queries(), [])
+
+    @override_settings(USER_CACHE_SECONDS=0)
+    def test_cache_can_be_disabled(self):
+        self.auth_queries()
+        self.assertTrue(self.auth_queries())
+
+    def test_logout_drops_the_session(self):
+        self.auth_queries()
+        session_key = self.client.session.session_key
+        self.client.post(reverse('logout'))
+        self.assertIsNone(authcache.cached_user(session_key))
+
+    def test_password_change_drops_the_other_sessions(self):
+        self.auth_queries()
+        session_key = self.client.session.session_key
+        self.user.set_password('new-Password-2')
+        self.user.save()
+        self.assertIsNone(authcache.cached_user(session_key))
+        self.assertFalse(self.client.get(reverse('session')).context['user'].is_authenticated)
@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from . import async_views as page_views
+else:
+    page_views = views
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('projects/', views.projects, name='projects'),
-    path('projects/<str:project_id>/', views.project_detail, name='project_detail'),
-    path('about/', views.about, name='about'),
+    path('', page_views.home, name='home'),
+    path('projects/', page_views.projects, name='projects'),
+    path('projects/search/', views.project_search, name='project_search'),
+    path('projects/page/', views.project_page, name='project_page'),
+    path('projects/<str:project_id>/', page_views.project_detail, name='project_detail'),
+    path('about/', page_views.about, name='about'),
     path('contact/', views.contact, name='contact'),
+    path('contact/form/', views.contact_form, name='contact_form'),
+    path('session/', views.session_fragments, name='session'),
+    path('metrics', views.metrics, name='metrics'),
+    path('ready/', views.ready, name='ready'),
     
     # Authentication URLs
     path('accounts/login/', views.login_view, name='login'),
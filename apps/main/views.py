@@ -1,18 +1,25 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.core.mail import EmailMessage
-from django.template.loader import render_to_string
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import never_cache
 from django.conf import settings
-from django.utils.safestring import mark_safe
-from django.utils import timezone
-from django.http import FileResponse, Http404
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse
 
-import markdown as md
-
-from .models import Project, Skill, About, SocialLink, SiteSettings, PageContent
+from .models import Project, Skill, About, SocialLink, SiteSettings, Technology
 from .forms import ContactForm, CustomAuthenticationForm, CustomUserCreationForm
+from .composition import get_layout
+from .caching import public_page
+from .markup import render_markdown
+from .metrics import may_scrape, metrics_enabled, registry
+from .pagination import KeysetPaginator
+from .passwords import password_admission
+from .search import search_projects
+
+
+PROJECT_SEARCH_LIMIT = 30
+PROJECTS_PER_PAGE = 12
 
 
 def serve_media(request, path):
@@ -29,26 +36,17 @@ def get_site_settings():
     return SiteSettings.get_instance()
 
 
-def get_page_content(page, section=None):
-    """Helper function to get page content."""
-    queryset = PageContent.objects.filter(page=page, is_active=True)
-    if section:
-        queryset = queryset.filter(section=section)
-    return queryset.order_by('order')
-
-
+@public_page
 def home(request):
     """Home page view."""
     site_settings = get_site_settings()
-    projects = Project.objects.filter(is_published=True).order_by('order', '-created_at')[:6]
+    projects = Project.published()[:6]
     skills = Skill.objects.filter(is_active=True).order_by('order', 'category')
     about = About.get_instance()
     social_links = SocialLink.objects.filter(is_active=True).order_by('order')
     
     # Convert bio to markdown if it exists
-    about_bio_html = ''
-    if about and about.bio:
-        about_bio_html = mark_safe(md.markdown(about.bio, extensions=['fenced_code', 'tables']))
+    about_bio_html = render_markdown(about.bio) if about else ''
     
     context = {
         'site_settings': site_settings,
@@ -57,25 +55,76 @@ def home(request):
         'about': about,
         'about_bio_html': about_bio_html,
         'social_links': social_links,
+        'sections': get_layout('home'),
     }
     return render(request, 'pages/home.html', context)
 
 
+def get_project_filters(request):
+    """Listing filters from the query string: technology slug and featured flag."""
+    return request.GET.get('tech', ''), request.GET.get('featured') == '1'
+
+
+def get_project_paginator(tech='', featured=False):
+    """Keyset paginator over the published projects, in display order."""
+    return KeysetPaginator(Project.published(tech, featured), Project.LISTING_ORDER, PROJECTS_PER_PAGE)
+
+
+def get_next_query(request, page):
+    """Query string of the page after ``page`` (filters kept), '' on the last page."""
+    if not page.has_next:
+        return ''
+    params = request.GET.copy()
+    params['after'] = page.next_cursor
+    return params.urlencode()
+
+
+@public_page
 def projects(request):
     """Projects page view."""
     site_settings = get_site_settings()
-    projects = Project.objects.filter(is_published=True).order_by('order', '-created_at')
+    tech, featured = get_project_filters(request)
+    page = get_project_paginator(tech, featured).page(request.GET.get('after'))
     context = {
         'site_settings': site_settings,
-        'projects': projects,
+        'projects': page,
+        'next_query': get_next_query(request, page),
+        'technologies': Technology.facets(),
+        'active_tech': tech,
+        'featured': featured,
+        'sections': get_layout('projects'),
     }
     return render(request, 'pages/projects.html', context)
 
 
+@public_page
+def project_page(request):
+    """HTMX partial: the next page of project cards (infinite scroll)."""
+    tech, featured = get_project_filters(request)
+    page = get_project_paginator(tech, featured).page(request.GET.get('after'))
+    context = {'projects': page, 'next_query': get_next_query(request, page)}
+    return render(request, 'pages/partials/project_page.html', context)
+
+
+@public_page
+def project_search(request):
+    """HTMX partial: published projects matching ?q=, best match first."""
+    query = request.GET.get('q', '').strip()
+    context = {'query': query}
+    if query:
+        context['projects'] = search_projects(query, limit=PROJECT_SEARCH_LIMIT)
+    else:
+        page = get_project_paginator().page()
+        context['projects'] = page
+        context['next_query'] = get_next_query(request, page)
+    return render(request, 'pages/partials/project_results.html', context)
+
+
+@public_page
 def project_detail(request, project_id):
     """Project detail view."""
     site_settings = get_site_settings()
-    project = get_object_or_404(Project, id=project_id, is_published=True)
+    project = get_object_or_404(Project.objects.prefetch_related('tags'), id=project_id, is_published=True)
     
     context = {
         'site_settings': site_settings,
@@ -84,6 +133,7 @@ def project_detail(request, project_id):
     return render(request, 'pages/project_detail.html', context)
 
 
+@public_page
 def about(request):
     """About page view."""
     site_settings = get_site_settings()
@@ -91,21 +141,24 @@ def about(request):
     social_links = SocialLink.objects.filter(is_active=True).order_by('order')
     
     # Convert bio to markdown if it exists
-    about_bio_html = ''
-    if about and about.bio:
-        about_bio_html = mark_safe(md.markdown(about.bio, extensions=['fenced_code', 'tables']))
+    about_bio_html = render_markdown(about.bio) if about else ''
     
     context = {
         'site_settings': site_settings,
         'about': about,
         'about_bio_html': about_bio_html,
         'social_links': social_links,
+        'sections': get_layout('about'),
     }
     return render(request, 'pages/about.html', context)
 
 
-def contact(request):
-    """Contact page view."""
+def contact_page(request, direct):
+    """
+    Contact page. The shared version (``direct`` False) gets its CSRF token
+    and flash messages from the session endpoint; the direct one, never
+    cached, renders them itself for visitors without JavaScript.
+    """
     site_settings = get_site_settings()
     social_links = SocialLink.objects.filter(is_active=True).order_by('order')
 
@@ -114,49 +167,16 @@ def contact(request):
         if form.is_valid():
             contact = form.save()
 
-            # Send email notifications
+            # Send email notifications (admin notification + user confirmation)
+            from .emails import build_contact_emails, send_messages
             try:
-                # 1. Send HTML notification to admin
-                admin_context = {
-                    'name': contact.name,
-                    'email': contact.email,
-                    'subject': contact.subject,
-                    'message': contact.message,
-                    'date': timezone.now().strftime('%d/%m/%Y à %H:%M'),
-                }
-                admin_html_content = render_to_string('email/contact_notification.html', admin_context)
-                
-                admin_email = EmailMessage(
-                    subject=f"[Portfolio] Nouveau message de {contact.name}",
-                    body=admin_html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[settings.CONTACT_EMAIL],
-                )
-                admin_email.content_subtype = 'html'
-                admin_email.send(fail_silently=False)
-                
-                # 2. Send HTML confirmation email to user
-                user_context = {
-                    'name': contact.name,
-                    'subject': contact.subject,
-                    'date': timezone.now().strftime('%d/%m/%Y à %H:%M'),
-                }
-                user_html_content = render_to_string('email/contact_confirmation.html', user_context)
-                
-                confirmation_email = EmailMessage(
-                    subject=f"Reçu: {contact.subject}",
-                    body=user_html_content,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    to=[contact.email],
-                )
-                confirmation_email.content_subtype = 'html'
-                confirmation_email.send(fail_silently=False)
+                send_messages(build_contact_emails(contact))
                 
                 messages.success(request, "Votre message a été envoyé avec succès avec confirmation email!", extra_tags='success_contact')
             except Exception:
                 messages.error(request, f"Une erreur s'est produite lors de l'envoie d'email. Cependant, nous avons reçu quand même votre message.", extra_tags='error_contact')
             
-            return redirect('contact')
+            return redirect('contact_form' if direct else 'contact')
     else:
         form = ContactForm()
     
@@ -164,10 +184,54 @@ def contact(request):
         'site_settings': site_settings,
         'form': form,
         'social_links':social_links,
+        'sections': get_layout('contact'),
+        'direct': direct,
     }
     return render(request, 'pages/contact.html', context)
 
 
+@public_page
+def contact(request):
+    """Contact page view."""
+    return contact_page(request, direct=False)
+
+
+@never_cache
+def contact_form(request):
+    """Contact page with its CSRF token and messages inline (works without JavaScript)."""
+    return contact_page(request, direct=True)
+
+
+@never_cache
+def session_fragments(request):
+    """
+    HTMX partial: the visitor's auth links, unread chat badge, flash messages
+    and CSRF token, swapped into the shared page shell (see caching.py).
+    """
+    user = request.user
+    context = {'authenticated': user.is_authenticated}
+    if user.is_authenticated:
+        from apps.chat.models import Conversation
+
+        context['is_admin'] = user.is_staff or user.is_superuser
+        context['unread_count'] = Conversation.unread_count_for(user)
+    return render(request, 'components/session.html', context)
+
+
+def ready(request):
+    """Readiness probe: answered once the process serves, hence after its warm-up."""
+    return HttpResponse('ready', content_type='text/plain')
+
+
+def metrics(request):
+    """Prometheus metrics for this process (404 unless METRICS_ENABLED, 403 unless allowed)."""
+    if not metrics_enabled():
+        raise Http404
+    if not may_scrape(request):
+        raise PermissionDenied
+    return HttpResponse(registry.exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 def handler404(request, exception):
     """Custom 404 error handler."""
     return render(request, 'pages/error/404.html', status=404)
@@ -178,6 +242,7 @@ def handler500(request):
     return render(request, 'pages/error/500.html', status=500)
 
 
+@password_admission
 def login_view(request):
     """Login page view."""
     if request.user.is_authenticated:
@@ -205,6 +270,7 @@ def login_view(request):
     return render(request, 'account/login.html', context)
 
 
+@password_admission
 def signup_view(request):
     """Signup page view."""
     if request.user.is_authenticated:
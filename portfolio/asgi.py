@@ -10,19 +10,33 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
 
-# Import routing after Django is set up
-from apps.chat.routing import websocket_urlpatterns
+# Initialize Django (app registry) before importing anything that touches models
+django_asgi_app = get_asgi_application()
 
+from channels.routing import ProtocolTypeRouter
+from django.conf import settings
+
+from apps.chat.writebehind import recover as recover_chat_log
+from apps.main.readiness import warm_up
+from .routing import LazyApplication, websocket_application
+
+websocket_app = LazyApplication(websocket_application)
+
+# HTTP and WebSocket in one process; asgi_http.py and asgi_ws.py split them.
 application = ProtocolTypeRouter({
-    'http': get_asgi_application(),
-    'websocket': AuthMiddlewareStack(
-        URLRouter(
-            websocket_urlpatterns
-        )
-    )
+    'http': django_asgi_app,
+    'websocket': websocket_app,
 })
+
+warm_up(extra_steps=[('websocket', websocket_app.load)])
+
+if settings.WS_DEFLATE:
+    from apps.chat.compression import install as install_ws_deflate
+
+    install_ws_deflate()
+
+# Store the chat messages a crashed process had not written yet.
+recover_chat_log()
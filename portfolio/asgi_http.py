@@ -0,0 +1,34 @@
+"""
+HTTP-only ASGI entry point: pages, admin and HTMX partials. The chat
+WebSocket is served by ``portfolio/asgi_ws.py`` in separate processes.
+
+Run with ``daphne portfolio.asgi_http:application`` or through the
+``runservers`` command.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
+os.environ.setdefault('SERVER_ROLE', 'http')
+
+# Initialize Django (app registry) before importing anything that touches models
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter
+from django.conf import settings
+
+from apps.chat.writebehind import recover as recover_chat_log
+from apps.main.readiness import warm_up
+from .routing import ConcurrencyLimit
+
+application = ProtocolTypeRouter({
+    'http': ConcurrencyLimit(django_asgi_app, settings.HTTP_MAX_CONCURRENCY),
+})
+
+warm_up()
+
+# Pages save chat messages too: check CHAT_ID_WORKER and replay the logs of
+# crashed processes (a log is replayed by one process only).
+recover_chat_log()
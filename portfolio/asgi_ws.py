@@ -0,0 +1,41 @@
+"""
+WebSocket-only ASGI entry point for the chat (``ws/chat/``). Pages are
+served by ``portfolio/asgi_http.py`` in separate processes.
+
+Run with ``daphne portfolio.asgi_ws:application`` or through the
+``runservers`` command.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio.settings')
+os.environ.setdefault('SERVER_ROLE', 'ws')
+
+# Initialize Django (app registry) before importing anything that touches models
+get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter
+from django.conf import settings
+
+from apps.chat.writebehind import recover as recover_chat_log
+from apps.main.readiness import warm_up
+from .routing import ConcurrencyLimit, websocket_application
+
+websocket_app = websocket_application()
+
+application = ProtocolTypeRouter({
+    'websocket': ConcurrencyLimit(websocket_app, settings.WS_MAX_CONNECTIONS),
+})
+
+# No pages are rendered here: only the database needs warming.
+warm_up(skip=('urls', 'modules', 'templates'))
+
+if settings.WS_DEFLATE:
+    from apps.chat.compression import install as install_ws_deflate
+
+    install_ws_deflate()
+
+# Store the chat messages a crashed process had not written yet.
+recover_chat_log()
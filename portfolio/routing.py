@@ -0,0 +1,85 @@
+"""
+Building blocks of the ASGI entry points.
+
+``portfolio/asgi.py`` serves HTTP and the chat WebSocket from one process;
+``asgi_http.py`` and ``asgi_ws.py`` serve one protocol each so that page
+rendering and long-lived chat sockets get their own event loop, threads
+and database connections, and can be scaled separately (see the
+``runservers`` command).
+"""
+import asyncio
+
+
+class LazyApplication:
+    """
+    ASGI application built by ``factory`` on first use, keeping its imports
+    (Channels auth, chat routing and consumers) off the startup path of
+    processes that never receive that kind of connection.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.app = None
+
+    def load(self):
+        if self.app is None:
+            self.app = self.factory()
+        return self.app
+
+    async def __call__(self, scope, receive, send):
+        return await self.load()(scope, receive, send)
+
+
+def websocket_application():
+    from channels.routing import URLRouter
+
+    # Import routing after Django is set up
+    from apps.chat.auth import CachedAuthMiddlewareStack
+    from apps.chat.routing import websocket_urlpatterns
+
+    return CachedAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+
+class ConcurrencyLimit:
+    """
+    Bound the work one process takes on.
+
+    HTTP requests beyond ``limit`` wait for a slot. Django runs the sync
+    code of each request (views, ORM calls) on a thread of its own, so
+    ``limit`` also bounds the threads and database connections of an HTTP
+    process. WebSocket connections beyond ``limit`` are
+    refused with close code 1013 (try again later) so the client reconnects,
+    possibly to another worker. A ``limit`` of 0 means unlimited.
+    """
+
+    def __init__(self, app, limit=0):
+        self.app = app
+        self.limit = limit
+        self.active = 0
+        self.semaphore = None
+
+    def setup(self):
+        if self.limit and self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.limit)
+
+    async def __call__(self, scope, receive, send):
+        self.setup()
+        if not self.limit or scope['type'] == 'lifespan':
+            return await self.app(scope, receive, send)
+        if scope['type'] == 'websocket':
+            if self.active >= self.limit:
+                message = await receive()
+                if message['type'] == 'websocket.connect':
+                    await send({'type': 'websocket.close', 'code': 1013})
+                return
+            self.active += 1
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                self.active -= 1
+        async with self.semaphore:
+            self.active += 1
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                self.active -= 1
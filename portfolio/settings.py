@@ -35,8 +35,14 @@ ALLOWED_HOSTS = env('ALLOWED_HOSTS', '*').split(',')
 
 # Application definition
 
-INSTALLED_APPS = [
-    'daphne',
+# The 'daphne' app only swaps runserver for an ASGI one, but importing it
+# loads Twisted and its TLS stack (~300ms): it is only installed with
+# DAPHNE_RUNSERVER=True, for a development runserver serving the chat
+# WebSocket. Production starts the daphne server directly.
+DAPHNE_RUNSERVER = env('DAPHNE_RUNSERVER', False, bool)
+
+INSTALLED_APPS = ['daphne'] if DAPHNE_RUNSERVER else []
+INSTALLED_APPS += [
     'channels',
     'django.contrib.admin',
     'django.contrib.auth',
@@ -50,29 +56,49 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.main.middleware.RequestMetricsMiddleware',
+    'apps.main.caching.PublicCacheMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.main.authcache.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'portfolio.urls'
 
+# Templates are always served from an in-process cache. With TEMPLATE_RELOAD
+# (the default in DEBUG) a template is recompiled when its file changes;
+# otherwise it is compiled once per process, and TEMPLATE_PREWARM compiles
+# all of them during the startup warm-up (see apps/main/template_loading.py).
+TEMPLATE_RELOAD = env('TEMPLATE_RELOAD', DEBUG, bool)
+TEMPLATE_PREWARM = env('TEMPLATE_PREWARM', not DEBUG, bool)
+
+TEMPLATE_SOURCE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATE_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.chat.context_processors.chat',
+            ],
+            'loaders': [
+                (
+                    'apps.main.template_loading.ReloadingLoader' if TEMPLATE_RELOAD else 'django.template.loaders.cached.Loader',
+                    TEMPLATE_SOURCE_LOADERS,
+                ),
             ],
         },
     },
@@ -81,6 +107,36 @@ TEMPLATES = [
 WSGI_APPLICATION = env('WSGI_APPLICATION', 'portfolio.wsgi.application')
 ASGI_APPLICATION = env('ASGI_APPLICATION')
 
+# Process role: 'http' and 'ws' are set by the split entry points
+# (portfolio/asgi_http.py and asgi_ws.py, started by the runservers command),
+# 'all' is the combined portfolio/asgi.py. Each role has its own concurrency
+# limit (0 = unlimited) and connection lifetime: a worker opens at most one
+# database connection per thread running ORM code.
+SERVER_ROLE = env('SERVER_ROLE', 'all')
+
+# Django runs the sync code of every HTTP request on a thread of its own, so
+# HTTP_MAX_CONCURRENCY bounds the threads and database connections of an
+# HTTP process as well as its requests in flight.
+HTTP_MAX_CONCURRENCY = env('HTTP_MAX_CONCURRENCY', 16, int)
+HTTP_CONN_MAX_AGE = env('HTTP_CONN_MAX_AGE', 0, int)
+
+# The chat's ORM calls run on the CHAT_DB_THREADS threads of its pool
+# (apps/chat/executor.py), whatever the number of sockets.
+WS_MAX_CONNECTIONS = env('WS_MAX_CONNECTIONS', 1000, int)
+# Session and user lookups of the chat socket run on one thread per
+# process: keep its connection.
+WS_CONN_MAX_AGE = env('WS_CONN_MAX_AGE', 60, int)
+
+# permessage-deflate on the chat WebSocket (apps/chat/compression.py):
+# messages under WS_DEFLATE_MIN_SIZE bytes are sent as is, the compression
+# window is kept between messages with WS_DEFLATE_CONTEXT_TAKEOVER, and
+# zlib uses at most WS_DEFLATE_MAX_MEMORY bytes per connection.
+WS_DEFLATE = env('WS_DEFLATE', False, bool)
+WS_DEFLATE_MIN_SIZE = env('WS_DEFLATE_MIN_SIZE', 256, int)
+WS_DEFLATE_CONTEXT_TAKEOVER = env('WS_DEFLATE_CONTEXT_TAKEOVER', True, bool)
+WS_DEFLATE_MAX_MEMORY = env('WS_DEFLATE_MAX_MEMORY', 64 * 1024, int)
+WS_DEFLATE_MAX_MESSAGE_SIZE = env('WS_DEFLATE_MAX_MESSAGE_SIZE', 1024 * 1024, int)
+
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
@@ -88,6 +144,7 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / env('DB_NAME', 'db.sqlite3'),
+        'CONN_MAX_AGE': WS_CONN_MAX_AGE if SERVER_ROLE == 'ws' else HTTP_CONN_MAX_AGE,
     }
 }
 
@@ -111,6 +168,41 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# PBKDF2 runs in a pool of PASSWORD_HASH_WORKERS processes (0: in the
+# request thread), niced by PASSWORD_HASH_NICE; at most
+# PASSWORD_HASH_CONCURRENCY login/signup POSTs hash at once, the others wait
+# PASSWORD_HASH_ADMISSION_WAIT seconds then get a 429 (see apps/main/passwords.py).
+# The pooled hasher replaces Django's PBKDF2PasswordHasher (same algorithm).
+PASSWORD_HASHERS = [
+    'apps.main.passwords.PooledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_WORKERS = env('PASSWORD_HASH_WORKERS', os.cpu_count() or 1, int)
+PASSWORD_HASH_NICE = env('PASSWORD_HASH_NICE', 5, int)
+PASSWORD_HASH_CONCURRENCY = env('PASSWORD_HASH_CONCURRENCY', 2 * (os.cpu_count() or 1), int)
+PASSWORD_HASH_ADMISSION_WAIT = env('PASSWORD_HASH_ADMISSION_WAIT', 2.0, float)
+
+# Session storage: db, cached_db (reads served by CACHES; with several
+# processes it needs a shared cache backend, as a logout only clears the
+# local one) or signed_cookies (no server-side storage, but a copied cookie
+# stays valid until it expires, even after logout).
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_BACKEND = env('SESSION_BACKEND', 'db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+# Users of authenticated sessions are cached in each process for
+# USER_CACHE_SECONDS (0 disables it), up to USER_CACHE_SIZE sessions; see
+# apps/main/authcache.py.
+USER_CACHE_SECONDS = env('USER_CACHE_SECONDS', 10, int)
+USER_CACHE_SIZE = env('USER_CACHE_SIZE', 10000, int)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -160,9 +252,112 @@ LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
-# Channel layers configuration for WebSocket
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+# Channel layers configuration for WebSocket. The in-memory layer only
+# reaches sockets of the same process: running several WebSocket workers
+# needs a shared layer (CHANNEL_REDIS_URL, requires channels-redis).
+CHANNEL_REDIS_URL = env('CHANNEL_REDIS_URL', '')
+
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [CHANNEL_REDIS_URL]},
+        }
     }
-}
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+# Chat consumer database work runs on its own pool (apps/chat/executor.py):
+# threads, calls allowed to wait for a thread, and lifetime in seconds of
+# each thread's connection.
+CHAT_DB_THREADS = env('CHAT_DB_THREADS', 4, int)
+CHAT_DB_MAX_PENDING = env('CHAT_DB_MAX_PENDING', 256, int)
+CHAT_DB_CONN_MAX_AGE = env('CHAT_DB_CONN_MAX_AGE', WS_CONN_MAX_AGE, int)
+
+# Users whose conversation id each process keeps for the connect path, and
+# for how many seconds (apps/chat/conversations.py).
+CHAT_CONVERSATION_CACHE_SIZE = env('CHAT_CONVERSATION_CACHE_SIZE', 10000, int)
+CHAT_CONVERSATION_CACHE_SECONDS = env('CHAT_CONVERSATION_CACHE_SECONDS', 60, int)
+
+# Admins receive the messages of the conversations they subscribe to, and
+# at most one inbox summary per CHAT_INBOX_INTERVAL seconds (apps/chat/inbox.py).
+CHAT_INBOX_INTERVAL = env('CHAT_INBOX_INTERVAL', 1.0, float)
+
+# URL of the chat socket for the pages, e.g. wss://chat.example.com/ws/chat/.
+# Empty: /ws/chat/ on the page's own host, which with runservers needs a
+# proxy routing /ws/ to the WebSocket port (docs/WEBSOCKET.md).
+CHAT_WS_URL = env('CHAT_WS_URL', '')
+
+# Insert chat messages from a single writer thread, up to CHAT_WRITE_BATCH_SIZE
+# per transaction, waiting at most CHAT_WRITE_BATCH_WINDOW seconds for more.
+CHAT_COALESCE_WRITES = env('CHAT_COALESCE_WRITES', False, bool)
+CHAT_WRITE_BATCH_SIZE = env('CHAT_WRITE_BATCH_SIZE', 64, int)
+CHAT_WRITE_BATCH_WINDOW = env('CHAT_WRITE_BATCH_WINDOW', 0.005, float)
+
+# Broadcast chat messages before they are stored (apps/chat/writebehind.py):
+# ids are allocated in process, messages are appended to a log in
+# CHAT_LOG_DIR and inserted in batches by a background thread; the logs of
+# crashed processes are replayed at startup. Processes writing messages need
+# distinct CHAT_ID_WORKER numbers (0-15): runservers sets them, other
+# setups must (processes refuse to start with write-behind and -1).
+CHAT_WRITE_BEHIND = env('CHAT_WRITE_BEHIND', False, bool)
+CHAT_LOG_DIR = env('CHAT_LOG_DIR', str(BASE_DIR / 'var' / 'chat-log'))
+CHAT_ID_WORKER = env('CHAT_ID_WORKER', -1, int)
+
+# Markdown backend: python-markdown, or markdown-it / mistune when installed
+# (faster, same output for this site's content; see apps/main/markup.py).
+MARKDOWN_RENDERER = env('MARKDOWN_RENDERER', 'python-markdown')
+
+# Serve the public pages (home, projects, project detail, about) with the
+# async views; set to False to fall back to the sync views.
+ASYNC_VIEWS = env('ASYNC_VIEWS', True, bool)
+
+# Per-request instrumentation (Server-Timing header and /metrics endpoint).
+# When disabled the middleware removes itself from the chain.
+METRICS_ENABLED = env('METRICS_ENABLED', False, bool)
+# /metrics is readable by staff users and by these addresses or networks
+# (comma-separated, e.g. the Prometheus server). Behind a reverse proxy every
+# request comes from the proxy's address: scrape the workers directly and
+# do not proxy /metrics (or deny it in the proxy).
+METRICS_ALLOWED_IPS = env('METRICS_ALLOWED_IPS', '').split(',')
+
+# Cache backend: Django's per-process LocMemCache, or Redis shared by all the
+# processes when CACHE_REDIS_URL is set (requires redis-py).
+CACHE_REDIS_URL = env('CACHE_REDIS_URL', '')
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+
+# Lifetime (seconds) of the cached header/footer/skills fragments and page
+# layouts; 0 disables the fragment cache. Entries are invalidated by model
+# signals, but only in the process that saved the change unless the cache is
+# shared: without CACHE_REDIS_URL other processes serve stale fragments for
+# up to this long (see apps/main/fragments.py and checks.py).
+FRAGMENT_CACHE_TIMEOUT = env('FRAGMENT_CACHE_TIMEOUT', 3600 if CACHE_REDIS_URL else 30, int)
+
+# Shared-cache lifetime (s-maxage, seconds) of the public pages, which are
+# identical for every visitor (see apps/main/caching.py); 0 keeps them private.
+# The shared cache must never store /session/ (see docs/WEBSOCKET.md).
+PUBLIC_CACHE_SECONDS = env('PUBLIC_CACHE_SECONDS', 300, int)
+
+# Static freeze of the public pages for nginx (see apps/main/freeze.py and
+# the freeze command); empty disables it. Saving content re-freezes the
+# pages it appears on, FREEZE_DELAY seconds after the first save of a burst.
+# FREEZE_BASE_URL is the public address, for the absolute links in pages.
+FREEZE_DIR = env('FREEZE_DIR', '')
+FREEZE_BASE_URL = env('FREEZE_BASE_URL', 'http://localhost')
+FREEZE_WORKERS = env('FREEZE_WORKERS', os.cpu_count() or 1, int)
+FREEZE_DELAY = env('FREEZE_DELAY', 2.0, float)
+
+# Warm the process up (URLconf, views, templates, database) before it
+# the server listens, so traffic waits for it (see apps/main/readiness.py).
+READINESS_WARMUP = env('READINESS_WARMUP', not DEBUG, bool)